@@ -5,16 +5,21 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import conditional_get
+from app.core.response_cache import cached_response
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import AlertStatus
+from app.core.constants import AlertStatus, IncidentStatus, VersionedEntity
 from app.models.user import User
 from app.schemas.common import PaginatedResponse, MessageResponse
 from app.schemas.alert import (
     AlertRuleCreate, AlertRuleUpdate, AlertRuleResponse,
-    AlertResponse, AlertAcknowledge,
+    AlertBacktestRequest, AlertBacktestResponse,
+    AlertResponse, AlertAcknowledge, AlertIncidentResponse,
     EscalationPolicyCreate, EscalationPolicyResponse,
 )
+from app.services.alert_backtest import AlertBacktestService
 from app.services.alert_service import AlertService
+from app.services.incident_service import IncidentService
 
 router = APIRouter()
 
@@ -32,6 +37,7 @@ async def create_alert_rule(
 
 
 @router.get("/rules", response_model=list[AlertRuleResponse])
+@cached_response(VersionedEntity.ALERT_RULES)
 async def list_alert_rules(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -41,6 +47,21 @@ async def list_alert_rules(
     return await service.get_rules(farm_id)
 
 
+@router.post("/rules/backtest", response_model=AlertBacktestResponse)
+async def backtest_alert_rules(
+    farm_id: UUID,
+    data: AlertBacktestRequest,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = AlertBacktestService(db)
+    results = await service.backtest(
+        farm_id, data.rules, data.start, data.end,
+        zone_id=data.zone_id, max_events=data.max_events,
+    )
+    return AlertBacktestResponse(start=data.start, end=data.end, results=results)
+
+
 @router.patch("/rules/{rule_id}", response_model=AlertRuleResponse)
 async def update_alert_rule(
     farm_id: UUID,
@@ -64,8 +85,23 @@ async def delete_alert_rule(
     await service.delete_rule(rule_id)
 
 
+# --- Incidents ---
+@router.get("/incidents", response_model=list[AlertIncidentResponse])
+async def list_incidents(
+    farm_id: UUID,
+    status: IncidentStatus | None = None,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_active_user),
+):
+    service = IncidentService(db)
+    return await service.list_incidents(farm_id, status=status)
+
+
 # --- Alerts ---
-@router.get("/", response_model=PaginatedResponse[AlertResponse])
+@router.get(
+    "/", response_model=PaginatedResponse[AlertResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.ALERTS))],
+)
 async def list_alerts(
     farm_id: UUID,
     status: AlertStatus | None = None,
@@ -113,7 +149,10 @@ async def resolve_alert(
     return await service.resolve_alert(alert_id, current_user.id)
 
 
-@router.get("/count/active", response_model=dict)
+@router.get(
+    "/count/active", response_model=dict,
+    dependencies=[Depends(conditional_get(VersionedEntity.ALERTS))],
+)
 async def count_active_alerts(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -133,4 +172,4 @@ async def create_escalation_policy(
     _: User = Depends(require_role("admin", "farm_manager")),
 ):
     service = AlertService(db)
-    return await service.create_escalation_policy(farm_id, data)
+    return await service.create_escalation_policy(farm_id, data.model_dump(mode="json"))
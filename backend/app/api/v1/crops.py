@@ -5,8 +5,10 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import conditional_get, get_read_db
+from app.core.response_cache import cached_response
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import CropCycleStatus
+from app.core.constants import CropCycleStatus, VersionedEntity
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.crop import (
@@ -31,6 +33,7 @@ async def create_profile(
 
 
 @router.get("/profiles", response_model=list[CropProfileResponse])
+@cached_response(VersionedEntity.CROP_PROFILES)
 async def list_profiles(
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
@@ -40,6 +43,7 @@ async def list_profiles(
 
 
 @router.get("/profiles/{profile_id}", response_model=CropProfileResponse)
+@cached_response(VersionedEntity.CROP_PROFILES)
 async def get_profile(
     profile_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -81,7 +85,10 @@ async def create_cycle(
     return await service.create_cycle(data)
 
 
-@router.get("/cycles", response_model=PaginatedResponse[CropCycleResponse])
+@router.get(
+    "/cycles", response_model=PaginatedResponse[CropCycleResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.CROPS))],
+)
 async def list_cycles(
     farm_id: UUID,
     status: CropCycleStatus | None = None,
@@ -131,7 +138,7 @@ async def add_growth_log(
 @router.get("/cycles/{cycle_id}/growth-logs", response_model=list[GrowthLogResponse])
 async def list_growth_logs(
     cycle_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = CropService(db)
@@ -1,22 +1,50 @@
 """Dashboard aggregation endpoint."""
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.constants import VersionedEntity
+from app.core.database import async_session_factory
+from app.core.dependencies import conditional_get, get_read_db
 from app.core.security import get_current_active_user
 from app.models.user import User
-from app.services.dashboard_service import DashboardService
+from app.schemas.common import PaginatedResponse
+from app.schemas.dashboard import PortfolioEntry
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.farm_service import FarmService
 
 router = APIRouter()
+portfolio_router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(conditional_get(VersionedEntity.DASHBOARD, hourly=True))])
 async def get_dashboard(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
 ):
-    service = DashboardService(db)
-    return await service.get_dashboard(farm_id)
+    dashboard = await DashboardReadModel.get(farm_id)
+    if dashboard is None:
+        # Its own session: the rebuild reads in a snapshot begun for it.
+        async with async_session_factory() as session:
+            dashboard = await DashboardReadModel.rebuild(session, farm_id)
+    return dashboard
+
+
+@portfolio_router.get("/portfolio", response_model=PaginatedResponse[PortfolioEntry])
+async def get_portfolio(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Dashboards of every farm the user can access, a page at a time."""
+    farms, total = await FarmService(db).page_user_farms(current_user, skip, limit)
+    dashboards = await DashboardReadModel.get_portfolio(db, [farm.id for farm in farms])
+    items = []
+    for farm in farms:
+        dashboard, cached = dashboards[farm.id]
+        items.append(
+            PortfolioEntry(farm_id=farm.id, name=farm.name, cached=cached, dashboard=dashboard)
+        )
+    return PaginatedResponse(items=items, total=total, skip=skip, limit=limit)
@@ -4,7 +4,10 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.database import get_db
+from app.core.dependencies import get_read_db
+from app.core.response_cache import cached_response
 from app.core.security import get_current_active_user, require_role
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
@@ -89,6 +92,7 @@ async def create_recipe(
 
 
 @router.get("/recipes", response_model=list[DosingRecipeResponse])
+@cached_response(VersionedEntity.DOSING_RECIPES)
 async def list_recipes(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -117,7 +121,7 @@ async def list_dosing_events(
     pump_id: UUID | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = DosingService(db)
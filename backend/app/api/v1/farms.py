@@ -4,7 +4,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.database import get_db
+from app.core.response_cache import cached_response
 from app.core.security import get_current_active_user, require_role
 from app.models.user import User
 from app.schemas.common import PaginatedResponse, MessageResponse
@@ -43,6 +45,7 @@ async def list_farms(
 
 
 @router.get("/{farm_id}", response_model=FarmResponse)
+@cached_response(VersionedEntity.FARM_LAYOUT)
 async def get_farm(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -86,6 +89,7 @@ async def create_zone(
 
 
 @router.get("/{farm_id}/zones", response_model=list[ZoneResponse])
+@cached_response(VersionedEntity.FARM_LAYOUT)
 async def list_zones(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -132,6 +136,7 @@ async def create_rack(
 
 
 @router.get("/{farm_id}/zones/{zone_id}/racks", response_model=list[RackResponse])
+@cached_response(VersionedEntity.FARM_LAYOUT)
 async def list_racks(
     farm_id: UUID,
     zone_id: UUID,
@@ -153,3 +158,17 @@ async def create_tray(
 ):
     service = FarmService(db)
     return await service.create_tray(rack_id, data)
+
+
+@router.post(
+    "/{farm_id}/racks/{rack_id}/trays/bulk", response_model=list[TrayResponse], status_code=201
+)
+async def create_trays(
+    farm_id: UUID,
+    rack_id: UUID,
+    data: list[TrayCreate],
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = FarmService(db)
+    return await service.create_trays(rack_id, [tray.model_dump() for tray in data])
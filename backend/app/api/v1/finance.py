@@ -6,8 +6,9 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import get_read_db
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import CostCategory
+from app.core.constants import CostCategory, CountMode
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.finance import CostCreate, CostResponse
@@ -35,15 +36,18 @@ async def list_costs(
     end_date: date | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    count: CountMode = CountMode.EXACT,
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = FinanceService(db)
-    costs, total = await service.list_costs(
+    page = await service.list_costs(
         farm_id, skip=skip, limit=limit,
         category=category, start_date=start_date, end_date=end_date,
+        cursor=cursor, count=count,
     )
-    return PaginatedResponse(items=costs, total=total, skip=skip, limit=limit)
+    return PaginatedResponse.from_page(page, skip, limit)
 
 
 @router.delete("/costs/{cost_id}", status_code=204)
@@ -62,7 +66,7 @@ async def get_revenue_summary(
     farm_id: UUID,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(require_role("admin", "farm_manager")),
 ):
     service = FinanceService(db)
@@ -72,7 +76,7 @@ async def get_revenue_summary(
 @router.get("/costs-by-category")
 async def get_costs_by_category(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(require_role("admin", "farm_manager")),
 ):
     service = FinanceService(db)
@@ -83,7 +87,7 @@ async def get_costs_by_category(
 async def get_monthly_revenue(
     farm_id: UUID,
     year: int = Query(..., ge=2020, le=2030),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(require_role("admin", "farm_manager")),
 ):
     service = FinanceService(db)
@@ -93,7 +97,7 @@ async def get_monthly_revenue(
 @router.get("/profit-by-crop")
 async def get_profit_by_crop(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(require_role("admin", "farm_manager")),
 ):
     service = FinanceService(db)
@@ -4,7 +4,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.database import get_db
+from app.core.dependencies import conditional_get, get_read_db
 from app.core.security import get_current_active_user, require_role
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
@@ -28,7 +30,10 @@ async def create_harvest(
     return await service.create_harvest(data, current_user.id)
 
 
-@router.get("/", response_model=PaginatedResponse[HarvestResponse])
+@router.get(
+    "/", response_model=PaginatedResponse[HarvestResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.HARVESTS))],
+)
 async def list_harvests(
     farm_id: UUID,
     skip: int = Query(0, ge=0),
@@ -44,7 +49,7 @@ async def list_harvests(
 @router.get("/calendar", response_model=list[HarvestCalendarEntry])
 async def get_harvest_calendar(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = HarvestService(db)
@@ -54,7 +59,7 @@ async def get_harvest_calendar(
 @router.get("/yield-report", response_model=list[YieldReportResponse])
 async def get_yield_report(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = HarvestService(db)
@@ -65,7 +70,7 @@ async def get_yield_report(
 async def get_monthly_yield(
     farm_id: UUID,
     year: int = Query(..., ge=2020, le=2030),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = HarvestService(db)
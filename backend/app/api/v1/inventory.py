@@ -5,13 +5,14 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import get_read_db
 from app.core.security import get_current_active_user, require_role
 from app.core.constants import InventoryCategory
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.inventory import (
     InventoryItemCreate, InventoryItemUpdate, InventoryItemResponse,
-    StockTransactionCreate, StockTransactionResponse,
+    StockTransactionCreate, StockTransactionBatchEntry, StockTransactionResponse,
 )
 from app.services.inventory_service import InventoryService
 
@@ -35,7 +36,7 @@ async def list_items(
     category: InventoryCategory | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = InventoryService(db)
@@ -46,7 +47,7 @@ async def list_items(
 @router.get("/items/low-stock", response_model=list[InventoryItemResponse])
 async def get_low_stock(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = InventoryService(db)
@@ -100,13 +101,26 @@ async def create_transaction(
     return await service.create_transaction(item_id, data, current_user.id)
 
 
+@router.post("/transactions", response_model=list[StockTransactionResponse], status_code=201)
+async def create_transactions(
+    farm_id: UUID,
+    data: list[StockTransactionBatchEntry],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_role("admin", "farm_manager", "operator")),
+):
+    service = InventoryService(db)
+    return await service.create_transactions(
+        farm_id, [entry.model_dump() for entry in data], current_user.id
+    )
+
+
 @router.get("/items/{item_id}/transactions", response_model=list[StockTransactionResponse])
 async def list_transactions(
     farm_id: UUID,
     item_id: UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = InventoryService(db)
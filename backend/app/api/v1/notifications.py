@@ -0,0 +1,44 @@
+"""Per-user notification inbox endpoints."""
+from fastapi import APIRouter, Depends, Query
+
+from app.core.security import get_current_active_user
+from app.models.user import User
+from app.schemas.notification import (
+    STREAM_ID_PATTERN,
+    MarkReadRequest,
+    NotificationInboxResponse,
+    UnreadCountResponse,
+)
+from app.services.notification_service import NotificationService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=NotificationInboxResponse)
+async def get_notifications(
+    after: str | None = Query(None, pattern=STREAM_ID_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Newest notifications first; pass the last ``cursor`` as ``after`` to get only new ones."""
+    items, unread = await NotificationService.get_inbox(current_user.id, after=after, limit=limit)
+    return NotificationInboxResponse(
+        items=items,
+        unread_count=unread,
+        cursor=items[0]["id"] if items else after,
+    )
+
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(current_user: User = Depends(get_current_active_user)):
+    return UnreadCountResponse(count=await NotificationService.unread_count(current_user.id))
+
+
+@router.post("/read", response_model=UnreadCountResponse)
+async def mark_notifications_read(
+    data: MarkReadRequest,
+    current_user: User = Depends(get_current_active_user),
+):
+    return UnreadCountResponse(
+        count=await NotificationService.mark_read(current_user.id, data.up_to)
+    )
@@ -5,8 +5,9 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import conditional_get, get_read_db
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import OrderStatus
+from app.core.constants import OrderStatus, VersionedEntity
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.order import (
@@ -80,7 +81,10 @@ async def create_order(
     return await service.create_order(farm_id, data, current_user.id)
 
 
-@router.get("/", response_model=PaginatedResponse[OrderResponse])
+@router.get(
+    "/", response_model=PaginatedResponse[OrderResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.ORDERS))],
+)
 async def list_orders(
     farm_id: UUID,
     status: OrderStatus | None = None,
@@ -124,7 +128,7 @@ async def update_order(
 async def get_traceability(
     farm_id: UUID,
     order_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = OrderService(db)
@@ -0,0 +1,203 @@
+"""WebSocket endpoint for live farm updates."""
+import asyncio
+import json
+import uuid
+from uuid import UUID
+
+from fastapi import APIRouter, Query, WebSocket, status
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import UnauthorizedException
+from app.core.security import verify_token
+from app.models.user import User
+from app.repositories.alert_repo import AlertRepository
+from app.repositories.sensor_repo import SensorRepository
+from app.services.farm_service import FarmService
+from app.services.notification_service import NotificationService, event_seq
+from app.services.realtime_hub import SensorStream, realtime_hub
+
+router = APIRouter()
+admin_router = APIRouter()
+
+
+async def _authorize(token: str, farm_id: UUID | None) -> bool:
+    """Check the JWT and farm access with a session held only for the handshake.
+
+    ``farm_id=None`` asks for every farm, which only superusers may watch.
+    """
+    try:
+        payload = verify_token(token)
+        user_id = uuid.UUID(payload.get("sub") or "")
+    except (UnauthorizedException, ValueError):
+        return False
+    if payload.get("type") != "access":
+        return False
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        if user is None or not user.is_active:
+            return False
+        if farm_id is None:
+            return user.is_superuser
+        return await FarmService(db).can_access(farm_id, user)
+
+
+async def _snapshot(farm_id: UUID) -> dict:
+    """Compact current state from the latest-value cache, for clients too far behind."""
+    # Take the cursor first: anything newer is delivered live, at worst twice.
+    cursor = await NotificationService.latest_event_id(farm_id)
+    async with AsyncSessionLocal() as db:
+        sensors = await SensorRepository(db).get_farm_sensors(farm_id)
+        alerts = await AlertRepository(db).get_active_alerts(farm_id)
+    return {
+        "type": "snapshot",
+        "id": cursor,
+        "farm_id": str(farm_id),
+        "data": {
+            "sensors": [
+                {
+                    "sensor_id": str(s.id),
+                    "zone_id": str(s.zone_id) if s.zone_id else None,
+                    "sensor_type": s.sensor_type,
+                    "value": float(s.last_value),
+                    "recorded_at": s.last_reading_at.isoformat() if s.last_reading_at else None,
+                }
+                for s in sensors
+                if s.last_value is not None
+            ],
+            "active_alerts": [
+                {
+                    "alert_id": str(a.id),
+                    "severity": a.severity,
+                    "title": a.title,
+                    "created_at": a.created_at.isoformat(),
+                }
+                for a in alerts
+            ],
+        },
+    }
+
+
+async def _catch_up(
+    websocket: WebSocket, farm_id: UUID, last_event_id: str, stream: SensorStream
+) -> str:
+    """Replay events missed since ``last_event_id``, or send a snapshot.
+
+    Returns the ID the client is now caught up to.
+    """
+    events = await NotificationService.read_events_since(
+        farm_id, last_event_id, settings.EVENT_RESUME_LIMIT
+    )
+    if events is None:
+        snapshot = await _snapshot(farm_id)
+        await websocket.send_text(json.dumps(snapshot))
+        return snapshot["id"]
+    for event in events:
+        if event["type"] == "sensor_reading":
+            stream.add(event)
+        else:
+            await websocket.send_text(json.dumps(event))
+    return events[-1]["id"] if events else last_event_id
+
+
+async def _forward(
+    websocket: WebSocket, queue: asyncio.Queue, stream: SensorStream, cursor: str | None
+) -> None:
+    """Send queued events, coalescing sensor readings.
+
+    Events at or before ``cursor`` were already replayed; they are skipped
+    until the first newer event arrives.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            item = await asyncio.wait_for(queue.get(), stream.seconds_until_flush(loop.time()))
+        except asyncio.TimeoutError:
+            item = None
+        if item is not None and cursor is not None:
+            event_id = item["id"] if isinstance(item, dict) else json.loads(item).get("id")
+            if event_id and event_seq(event_id) <= event_seq(cursor):
+                continue
+            cursor = None
+        if isinstance(item, dict):
+            stream.add(item)
+        elif item is not None:
+            await websocket.send_text(item)
+        frame = stream.flush(loop.time())
+        if frame is not None:
+            await websocket.send_text(frame)
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    # Clients don't send anything meaningful; read only to notice the close.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def _stream(
+    websocket: WebSocket,
+    token: str,
+    farm_id: UUID | None,
+    stream: SensorStream,
+    last_event_id: str | None = None,
+) -> None:
+    if not await _authorize(token, farm_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    key = str(farm_id) if farm_id else realtime_hub.ALL_FARMS
+    # Subscribe before catching up so nothing published in between is lost.
+    queue = await realtime_hub.subscribe(key)
+    tasks = []
+    try:
+        cursor = None
+        if farm_id and last_event_id:
+            cursor = await _catch_up(websocket, farm_id, last_event_id, stream)
+        tasks = [
+            asyncio.create_task(_forward(websocket, queue, stream, cursor)),
+            asyncio.create_task(_wait_for_disconnect(websocket)),
+        ]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Collect results so a send on a closed socket isn't logged as unhandled.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await realtime_hub.unsubscribe(key, queue)
+
+
+@router.websocket("/ws")
+async def farm_updates(
+    websocket: WebSocket,
+    farm_id: UUID,
+    token: str = Query(...),
+    interval: float = Query(settings.WS_SENSOR_INTERVAL_SECONDS, ge=0.1, le=60),
+    zone_id: list[UUID] | None = Query(None),
+    sensor_type: list[str] | None = Query(None),
+    last_event_id: str | None = Query(None, pattern=r"^\d+-\d+$"),
+):
+    """Live updates for one farm.
+
+    Sensor readings are coalesced to at most one frame per ``interval``
+    seconds, optionally limited to some zones and sensor types; alerts and
+    other events are sent as they arrive. Every message carries an event
+    ``id``; a client reconnecting with ``last_event_id`` gets the events it
+    missed, or a ``snapshot`` message when it is too far behind.
+    """
+    stream = SensorStream(
+        interval,
+        zone_ids={str(z) for z in zone_id} if zone_id else None,
+        sensor_types=set(sensor_type) if sensor_type else None,
+    )
+    await _stream(websocket, token, farm_id, stream, last_event_id)
+
+
+@admin_router.websocket("/ws")
+async def all_farm_updates(
+    websocket: WebSocket,
+    token: str = Query(...),
+    interval: float = Query(settings.WS_SENSOR_INTERVAL_SECONDS, ge=0.1, le=60),
+):
+    """Every farm's traffic, for superuser admin views."""
+    await _stream(websocket, token, None, SensorStream(interval))
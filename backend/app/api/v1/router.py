@@ -17,12 +17,16 @@ from app.api.v1 import (
     finance,
     vision,
     dashboard,
+    realtime,
+    webhooks,
+    notifications,
 )
 
 api_v1_router = APIRouter()
 
 api_v1_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_v1_router.include_router(users.router, prefix="/users", tags=["Users"])
+api_v1_router.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
 api_v1_router.include_router(farms.router, prefix="/farms", tags=["Farms"])
 api_v1_router.include_router(sensors.router, prefix="/farms/{farm_id}/sensors", tags=["Sensors"])
 api_v1_router.include_router(crops.router, prefix="/crops", tags=["Crops"])
@@ -36,3 +40,7 @@ api_v1_router.include_router(tasks.router, prefix="/farms/{farm_id}/tasks", tags
 api_v1_router.include_router(finance.router, prefix="/farms/{farm_id}/finance", tags=["Finance"])
 api_v1_router.include_router(vision.router, prefix="/farms/{farm_id}/vision", tags=["Vision"])
 api_v1_router.include_router(dashboard.router, prefix="/farms/{farm_id}/dashboard", tags=["Dashboard"])
+api_v1_router.include_router(dashboard.portfolio_router, prefix="/dashboard", tags=["Dashboard"])
+api_v1_router.include_router(webhooks.router, prefix="/farms/{farm_id}/webhooks", tags=["Webhooks"])
+api_v1_router.include_router(realtime.router, prefix="/farms/{farm_id}", tags=["Realtime"])
+api_v1_router.include_router(realtime.admin_router, tags=["Realtime"])
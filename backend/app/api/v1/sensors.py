@@ -6,8 +6,9 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import conditional_get, get_read_db
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import SensorType
+from app.core.constants import SensorType, VersionedEntity
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.sensor import (
@@ -30,7 +31,10 @@ async def create_sensor(
     return await service.create_sensor(farm_id, data)
 
 
-@router.get("/", response_model=list[SensorResponse])
+@router.get(
+    "/", response_model=list[SensorResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.SENSORS))],
+)
 async def list_sensors(
     farm_id: UUID,
     zone_id: UUID | None = None,
@@ -42,7 +46,10 @@ async def list_sensors(
     return await service.get_farm_sensors(farm_id, zone_id=zone_id, sensor_type=sensor_type)
 
 
-@router.get("/summary", response_model=list[SensorSummaryResponse])
+@router.get(
+    "/summary", response_model=list[SensorSummaryResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.SENSORS))],
+)
 async def get_sensor_summary(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -106,7 +113,7 @@ async def get_readings(
     start: datetime | None = None,
     end: datetime | None = None,
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = SensorService(db)
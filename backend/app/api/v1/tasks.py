@@ -5,8 +5,9 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.dependencies import conditional_get
 from app.core.security import get_current_active_user, require_role
-from app.core.constants import TaskStatus, TaskPriority
+from app.core.constants import CountMode, TaskStatus, TaskPriority, VersionedEntity
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
 from app.schemas.task import (
@@ -28,7 +29,10 @@ async def create_task(
     return await service.create_task(data, current_user.id)
 
 
-@router.get("/", response_model=PaginatedResponse[TaskResponse])
+@router.get(
+    "/", response_model=PaginatedResponse[TaskResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.TASKS))],
+)
 async def list_tasks(
     farm_id: UUID,
     status: TaskStatus | None = None,
@@ -36,18 +40,23 @@ async def list_tasks(
     assigned_to: UUID | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    count: CountMode = CountMode.EXACT,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
 ):
     service = TaskService(db)
-    tasks, total = await service.list_tasks(
+    page = await service.list_tasks(
         farm_id, skip=skip, limit=limit, status=status,
-        priority=priority, assigned_to=assigned_to,
+        priority=priority, assigned_to=assigned_to, cursor=cursor, count=count,
     )
-    return PaginatedResponse(items=tasks, total=total, skip=skip, limit=limit)
+    return PaginatedResponse.from_page(page, skip, limit)
 
 
-@router.get("/overdue", response_model=list[TaskResponse])
+@router.get(
+    "/overdue", response_model=list[TaskResponse],
+    dependencies=[Depends(conditional_get(VersionedEntity.TASKS, hourly=True))],
+)
 async def get_overdue_tasks(
     farm_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -4,7 +4,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import CountMode
 from app.core.database import get_db
+from app.core.dependencies import get_read_db
 from app.core.security import get_current_active_user, require_role
 from app.models.user import User
 from app.schemas.common import PaginatedResponse
@@ -34,14 +36,17 @@ async def list_scans(
     crop_cycle_id: UUID | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    count: CountMode = CountMode.EXACT,
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = VisionService(db)
-    scans, total = await service.list_scans(
-        farm_id, skip=skip, limit=limit, crop_cycle_id=crop_cycle_id
+    page = await service.list_scans(
+        farm_id, skip=skip, limit=limit, crop_cycle_id=crop_cycle_id,
+        cursor=cursor, count=count,
     )
-    return PaginatedResponse(items=scans, total=total, skip=skip, limit=limit)
+    return PaginatedResponse.from_page(page, skip, limit)
 
 
 @router.get("/scans/{scan_id}", response_model=PlantScanResponse)
@@ -58,7 +63,7 @@ async def get_scan(
 @router.get("/anomaly-stats")
 async def get_anomaly_stats(
     farm_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(get_current_active_user),
 ):
     service = VisionService(db)
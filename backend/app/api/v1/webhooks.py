@@ -0,0 +1,88 @@
+"""Webhook endpoint management."""
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.security import require_role
+from app.models.user import User
+from app.schemas.webhook import (
+    WebhookDeadLetterResponse,
+    WebhookEndpointCreate,
+    WebhookEndpointCreated,
+    WebhookEndpointResponse,
+    WebhookEndpointUpdate,
+)
+from app.services.webhook_service import WebhookService
+
+router = APIRouter()
+
+
+@router.post("/", response_model=WebhookEndpointCreated, status_code=201)
+async def create_webhook(
+    farm_id: UUID,
+    data: WebhookEndpointCreate,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    return await service.create_endpoint(farm_id, data.model_dump(mode="json"))
+
+
+@router.get("/", response_model=list[WebhookEndpointResponse])
+async def list_webhooks(
+    farm_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    return await service.list_endpoints(farm_id)
+
+
+@router.patch("/{endpoint_id}", response_model=WebhookEndpointResponse)
+async def update_webhook(
+    farm_id: UUID,
+    endpoint_id: UUID,
+    data: WebhookEndpointUpdate,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    return await service.update_endpoint(
+        farm_id, endpoint_id, data.model_dump(mode="json", exclude_unset=True)
+    )
+
+
+@router.delete("/{endpoint_id}", status_code=204)
+async def delete_webhook(
+    farm_id: UUID,
+    endpoint_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    await service.delete_endpoint(farm_id, endpoint_id)
+
+
+@router.get("/{endpoint_id}/dead-letters", response_model=list[WebhookDeadLetterResponse])
+async def list_dead_letters(
+    farm_id: UUID,
+    endpoint_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    return await service.list_dead_letters(farm_id, endpoint_id)
+
+
+@router.post("/{endpoint_id}/dead-letters/{dead_letter_id}/redeliver", status_code=202)
+async def redeliver_dead_letter(
+    farm_id: UUID,
+    endpoint_id: UUID,
+    dead_letter_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("admin", "farm_manager")),
+):
+    service = WebhookService(db)
+    await service.redeliver(farm_id, endpoint_id, dead_letter_id)
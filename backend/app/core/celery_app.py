@@ -1,5 +1,9 @@
+import asyncio
+
 from celery import Celery
+from celery.schedules import crontab
 
+from app.core import redis_client
 from app.core.config import settings
 
 celery_app = Celery(
@@ -20,6 +24,39 @@ celery_app.conf.update(
         "app.tasks.dosing_tasks.*": {"queue": "dosing"},
         "app.tasks.vision_tasks.*": {"queue": "vision"},
     },
+    beat_schedule={
+        "run-escalations": {"task": "tasks.run_escalations", "schedule": 30.0},
+        "close-stale-incidents": {"task": "tasks.close_stale_incidents", "schedule": 300.0},
+        "relay-outbox": {"task": "tasks.relay_outbox", "schedule": 2.0},
+        "purge-outbox": {"task": "tasks.purge_outbox", "schedule": 3600.0},
+        "reconcile-dashboards": {
+            "task": "tasks.reconcile_dashboards",
+            "schedule": crontab(hour=3, minute=30),
+        },
+    },
 )
 
 celery_app.autodiscover_tasks(["app.tasks"])
+
+
+def run_async(coro):
+    """Run a task's coroutine on its own event loop, with Redis open for it.
+
+    Writes made in tasks bump response versions on commit like any other,
+    which needs Redis. The client is opened and closed with the loop because
+    its connections can't be shared across loops; it only connects on first
+    use, so tasks that don't touch Redis pay nothing for it.
+    """
+
+    async def with_redis():
+        await redis_client.init_redis()
+        try:
+            return await coro
+        finally:
+            await redis_client.close_redis()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(with_redis())
+    finally:
+        loop.close()
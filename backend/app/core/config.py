@@ -14,15 +14,32 @@ class Settings(BaseSettings):
     DATABASE_URL_SYNC: str = "postgresql://greenos:greenos_dev@db:5432/greenos"
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 10
+    # Read-only endpoints and reports use the replica when set; see
+    # app.core.read_replica for when they fall back to the primary.
+    DATABASE_REPLICA_URL: str | None = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 1.0
+    DB_READ_YOUR_WRITES_SECONDS: int = 10
+    # sequential | concurrent | single; see app.services.dashboard_service
+    DASHBOARD_QUERY_MODE: str = "single"
+    # Outlives one missed nightly reconciliation; a missing document is
+    # rebuilt on the next read.
+    DASHBOARD_READ_MODEL_TTL_HOURS: int = 48
 
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+    # Entries are invalidated by writes; the TTL only reclaims the memory of
+    # superseded ones.
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
 
     # MQTT
     MQTT_HOST: str = "mqtt"
     MQTT_PORT: int = 1883
     MQTT_USERNAME: str | None = None
     MQTT_PASSWORD: str | None = None
+    # How long the outbox relay waits for the broker's PUBACK before it
+    # retries a device command.
+    MQTT_PUBACK_TIMEOUT_SECONDS: float = 10.0
 
     # Auth
     SECRET_KEY: str = "change-me-in-production"
@@ -30,6 +47,43 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Alerts
+    ALERT_INCIDENT_WINDOW_MINUTES: int = 10
+    ALERT_ROLLUP_INTERVAL_MINUTES: int = 5
+    ANOMALY_SCORE_THRESHOLD: float = 4.0
+
+    # Realtime
+    WS_SENSOR_INTERVAL_SECONDS: float = 1.0
+    EVENT_STREAM_MAXLEN: int = 10000
+    EVENT_RESUME_LIMIT: int = 1000
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_RETENTION_HOURS: int = 24
+
+    # Notifications
+    NOTIFICATION_INBOX_SIZE: int = 100
+    NOTIFICATION_INBOX_TTL_DAYS: int = 30
+
+    # Email
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_START_TLS: bool = False
+    EMAIL_FROM: str = "alerts@greenos.local"
+    EMAIL_POOL_SIZE: int = 4
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_DIGEST_MINUTES: int = 15
+
+    # Webhooks
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_BATCH_SIZE: int = 100
+    # How long a worker owns a claimed batch while posting it; should outlast
+    # a batch's slowest endpoint, or the rest get posted twice.
+    WEBHOOK_LEASE_SECONDS: int = 300
+
     # Celery
     CELERY_BROKER_URL: str = "redis://redis:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/2"
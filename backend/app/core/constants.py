@@ -10,6 +10,14 @@ class SensorType(str, Enum):
     DISSOLVED_OXYGEN = "dissolved_oxygen"
     WATER_LEVEL = "water_level"
     LIGHT = "light"
+    VPD = "vpd"
+    DLI = "dli"
+
+
+class VirtualFormulaType(str, Enum):
+    VPD = "vpd"
+    DLI = "dli"
+    RATIO = "ratio"
 
 
 class AlertSeverity(str, Enum):
@@ -25,10 +33,37 @@ class AlertStatus(str, Enum):
     EXPIRED = "expired"
 
 
+class IncidentStatus(str, Enum):
+    OPEN = "open"
+    CLOSED = "closed"
+
+
 class AlertCondition(str, Enum):
     ABOVE = "above"
     BELOW = "below"
     OUTSIDE_RANGE = "outside_range"
+    SUSTAINED = "sustained"
+    HYSTERESIS = "hysteresis"
+    RATE_OF_CHANGE = "rate_of_change"
+    ANOMALY = "anomaly"
+    COMPOUND = "compound"
+
+
+class OutboxDestination(str, Enum):
+    REDIS = "redis"
+    MQTT = "mqtt"
+    WEBHOOK = "webhook"
+    DASHBOARD = "dashboard"
+    ALERTS = "alerts"
+    NOTIFICATIONS = "notifications"
+    ESCALATION = "escalation"
+
+
+class WebhookEventType(str, Enum):
+    ALERT = "alert"
+    HARVEST = "harvest"
+    ORDER = "order"
+    DOSING_EVENT = "dosing_event"
 
 
 class CropCycleStatus(str, Enum):
@@ -158,6 +193,36 @@ class AnalysisStatus(str, Enum):
     FAILED = "failed"
 
 
+class DashboardQueryMode(str, Enum):
+    SEQUENTIAL = "sequential"
+    CONCURRENT = "concurrent"
+    SINGLE = "single"
+
+
+class CountMode(str, Enum):
+    """How a paged list computes its total."""
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class VersionedEntity(str, Enum):
+    """Entity types with a per-farm version behind response ETags and caching."""
+
+    DASHBOARD = "dashboard"
+    SENSORS = "sensors"
+    ALERTS = "alerts"
+    CROPS = "crops"
+    TASKS = "tasks"
+    HARVESTS = "harvests"
+    ORDERS = "orders"
+    CROP_PROFILES = "crop_profiles"
+    FARM_LAYOUT = "farm_layout"
+    ALERT_RULES = "alert_rules"
+    DOSING_RECIPES = "dosing_recipes"
+
+
 class AnomalyType(str, Enum):
     NUTRIENT_DEFICIENCY = "nutrient_deficiency"
     PEST = "pest"
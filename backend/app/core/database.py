@@ -1,8 +1,77 @@
-from typing import AsyncGenerator
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
 
 from app.core.config import settings
+from app.core.read_replica import ReadReplica
+from app.core.response_versions import ResponseVersions
+
+logger = logging.getLogger(__name__)
+
+AFTER_COMMIT_KEY = "after_commit"
+
+
+class AppSyncSession(Session):
+    pass
+
+
+@event.listens_for(AppSyncSession, "after_flush")
+def _mark_flush_written(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(AppSyncSession, "do_orm_execute")
+def _mark_statement_written(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Run ``callback`` once the session's transaction commits; a rollback drops it.
+
+    For side effects outside the database that must not happen unless the
+    transaction does. Only ``AppSession`` runs them.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
+class AppSession(AsyncSession):
+    """Bumps the response versions touched in a transaction once it commits.
+
+    Callbacks registered with ``after_commit`` run then too. When a replica is configured, a commit that wrote anything also keeps the
+    session's user (``info["user_id"]``, set on authentication) reading from
+    the primary for a while.
+    """
+
+    sync_session_class = AppSyncSession
+
+    async def commit(self) -> None:
+        await super().commit()
+        await ResponseVersions.bump(ResponseVersions.pop_pending(self))
+        wrote = self.info.pop("wrote", False)
+        user_id = self.info.get("user_id")
+        if wrote and user_id is not None and ReadReplica.enabled():
+            await ReadReplica.mark_write(user_id)
+        await run_after_commit(self)
+
+    async def rollback(self) -> None:
+        ResponseVersions.pop_pending(self)
+        self.info.pop(AFTER_COMMIT_KEY, None)
+        self.info.pop("wrote", None)
+        await super().rollback()
+
 
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -13,9 +82,26 @@ engine = create_async_engine(
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=AppSession,
     expire_on_commit=False,
 )
+# Name used by the Celery tasks.
+async_session_factory = AsyncSessionLocal
+
+replica_engine = (
+    create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        echo=settings.DEBUG,
+    )
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
+
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else None
+)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -28,6 +114,51 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+@asynccontextmanager
+async def read_session(primary: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    """A session on the read replica, or on the primary if there is none or it lags.
+
+    ``primary`` is used as the fallback instead of opening a new session.
+    """
+    if ReplicaSessionLocal is not None:
+        async with ReplicaSessionLocal() as session:
+            if await ReadReplica.within_lag(session):
+                yield session
+                return
+    if primary is not None:
+        yield primary
+        return
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def begin_snapshot(session: AsyncSession) -> None:
+    """Begin ``session``'s transaction so all its reads see one snapshot.
+
+    PostgreSQL's default READ COMMITTED takes a new snapshot per statement, so
+    the transaction is REPEATABLE READ there (SERIALIZABLE elsewhere). Call it
+    before the session's first statement; a transaction already begun keeps
+    the isolation it was begun with.
+    """
+    if session.in_transaction():
+        return
+    postgres = session.bind.dialect.name == "postgresql"
+    await session.connection(
+        execution_options={"isolation_level": "REPEATABLE READ" if postgres else "SERIALIZABLE"}
+    )
+
+
+def sessionmaker_for(session: AsyncSession) -> async_sessionmaker:
+    """The sessionmaker for more sessions on the database ``session`` is on.
+
+    For services that fan queries out over extra sessions, so the work of a
+    ``read_session`` stays on the replica it was given.
+    """
+    if replica_engine is not None and session.bind is replica_engine:
+        return ReplicaSessionLocal
+    return AsyncSessionLocal
+
+
 async def init_db() -> None:
     async with engine.begin() as conn:
         pass  # Verify connection works
@@ -35,3 +166,5 @@ async def init_db() -> None:
 
 async def close_db() -> None:
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
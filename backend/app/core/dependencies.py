@@ -1,9 +1,17 @@
 from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncGenerator
+from uuid import UUID
 
-from fastapi import Depends, Query
+from fastapi import Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.constants import VersionedEntity
+from app.core.database import get_db, read_session
+from app.core.read_replica import ReadReplica
+from app.core.response_versions import ResponseVersions
 from app.core.security import get_current_active_user, get_current_user
+from app.models.user import User
 
 
 @dataclass
@@ -12,9 +20,57 @@ class PaginationParams:
     limit: int = Query(100, ge=1, le=1000, description="Max records to return")
 
 
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints: the read replica when it's safe.
+
+    Falls back to the request's primary session when there is no replica,
+    when it lags, or right after the user wrote something. Endpoints behind
+    ``conditional_get`` or ``cached_response`` keep ``get_db``: a replica
+    behind the commit that moved a version would serve old data under the
+    new ETag or cache key.
+    """
+    if ReadReplica.enabled() and not await ReadReplica.recently_wrote(current_user.id):
+        async with read_session(db) as session:
+            yield session
+    else:
+        yield db
+
+
+def conditional_get(*entities: VersionedEntity, hourly: bool = False):
+    """Dependency adding an ETag over the farm's ``entities`` versions.
+
+    A matching ``If-None-Match`` is answered with 304 before the endpoint
+    runs. ``hourly`` also rolls the ETag every hour, for responses with
+    time-windowed numbers that change without a write.
+    """
+
+    async def dependency(
+        farm_id: UUID,
+        request: Request,
+        response: Response,
+        _: User = Depends(get_current_active_user),
+    ) -> None:
+        scope = f"{request.url.path}?{request.url.query}"
+        if hourly:
+            scope += datetime.utcnow().strftime("@%Y-%m-%dT%H")
+        etag = await ResponseVersions.etag(farm_id, entities, scope)
+        if etag is None:
+            return
+        if ResponseVersions.matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+    return dependency
+
+
 __all__ = [
     "get_db",
+    "get_read_db",
     "get_current_user",
     "get_current_active_user",
     "PaginationParams",
+    "conditional_get",
 ]
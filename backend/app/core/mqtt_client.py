@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+
+from gmqtt import Client as MQTTClient
+from gmqtt.storage import HeapPersistentStorage
+
+from app.core.config import settings
+
+# gmqtt's default: an unacknowledged QoS 1 message is resent after this long.
+RETRY_DELIVER_SECONDS = 5
+
+
+class AckTrackingStorage(HeapPersistentStorage):
+    """gmqtt's in-flight QoS 1 queue, with a future per message for its PUBACK.
+
+    gmqtt's ``publish`` returns nothing, but it queues every QoS 1 message
+    here before returning and removes it when the PUBACK arrives.
+    """
+
+    def __init__(self, timeout: float):
+        super().__init__(timeout)
+        self.last_mid: int | None = None
+        self._acks: dict[int, asyncio.Future] = {}
+
+    def push_message_nowait(self, mid, raw_package):
+        self.last_mid = mid
+        self._acks[mid] = asyncio.get_running_loop().create_future()
+        return super().push_message_nowait(mid, raw_package)
+
+    async def remove_message_by_mid(self, mid):
+        await super().remove_message_by_mid(mid)
+        ack = self._acks.pop(mid, None)
+        if ack is not None and not ack.done():
+            ack.set_result(None)
+
+    def ack(self, mid: int) -> asyncio.Future:
+        return self._acks[mid]
+
+
+mqtt_client: MQTTClient | None = None
+_storage: AckTrackingStorage | None = None
+
+
+async def init_mqtt() -> None:
+    global mqtt_client, _storage
+    storage = AckTrackingStorage(RETRY_DELIVER_SECONDS)
+    client = MQTTClient(
+        f"greenos-{uuid.uuid4().hex[:12]}",
+        persistent_storage=storage,
+        retry_deliver_timeout=RETRY_DELIVER_SECONDS,
+    )
+    if settings.MQTT_USERNAME:
+        client.set_auth_credentials(settings.MQTT_USERNAME, settings.MQTT_PASSWORD)
+    await client.connect(settings.MQTT_HOST, settings.MQTT_PORT)
+    mqtt_client, _storage = client, storage
+
+
+async def close_mqtt() -> None:
+    global mqtt_client, _storage
+    if mqtt_client:
+        await mqtt_client.disconnect()
+        mqtt_client, _storage = None, None
+
+
+async def publish_acked(topic: str, payload: str) -> None:
+    """Publish at QoS 1 and return once the broker has acknowledged it.
+
+    Connects first if this process has no client yet. Raises
+    ``asyncio.TimeoutError`` if no PUBACK arrives within
+    ``MQTT_PUBACK_TIMEOUT_SECONDS``.
+    """
+    if mqtt_client is None:
+        await init_mqtt()
+    mqtt_client.publish(topic, payload, qos=1)
+    await asyncio.wait_for(
+        _storage.ack(_storage.last_mid), settings.MQTT_PUBACK_TIMEOUT_SECONDS
+    )
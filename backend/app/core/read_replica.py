@@ -0,0 +1,85 @@
+"""When reads may go to the read replica.
+
+Reads are sent to ``DATABASE_REPLICA_URL`` unless one of two guards sends
+them to the primary instead:
+
+* staleness: the replica's replay lag, checked at most every
+  ``DB_REPLICA_LAG_CHECK_SECONDS`` per process, is above
+  ``DB_REPLICA_MAX_LAG_SECONDS``;
+* read-your-writes: the user committed a write in the last
+  ``DB_READ_YOUR_WRITES_SECONDS``, recorded in Redis so it holds across API
+  workers. Without Redis every read of a signed-in user stays on the primary.
+"""
+import logging
+import time
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import redis_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary doesn't read as lag.
+LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReadReplica:
+    WRITE_KEY_PREFIX = "greenos:wrote"
+
+    _lag: float | None = None
+    _checked_at: float | None = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(settings.DATABASE_REPLICA_URL)
+
+    @staticmethod
+    def write_key(user_id: UUID | str) -> str:
+        return f"{ReadReplica.WRITE_KEY_PREFIX}:{user_id}"
+
+    @staticmethod
+    async def mark_write(user_id: UUID | str) -> None:
+        """Keep ``user_id``'s reads on the primary until the replica has caught up."""
+        client = redis_client.redis_client
+        if not client:
+            return
+        try:
+            await client.set(
+                ReadReplica.write_key(user_id), 1, ex=settings.DB_READ_YOUR_WRITES_SECONDS
+            )
+        except Exception as e:
+            logger.error(f"Failed to record write by user {user_id}: {e}")
+
+    @staticmethod
+    async def recently_wrote(user_id: UUID | str) -> bool:
+        client = redis_client.redis_client
+        if not client:
+            return True
+        try:
+            return bool(await client.exists(ReadReplica.write_key(user_id)))
+        except Exception as e:
+            logger.error(f"Failed to check recent writes by user {user_id}: {e}")
+            return True
+
+    @classmethod
+    async def within_lag(cls, session: AsyncSession) -> bool:
+        """Whether the replica behind ``session`` is fresh enough to read from."""
+        now = time.monotonic()
+        checked_at = cls._checked_at
+        if checked_at is None or now - checked_at >= settings.DB_REPLICA_LAG_CHECK_SECONDS:
+            try:
+                cls._lag = float(await session.scalar(LAG_SQL) or 0)
+            except Exception as e:
+                logger.error(f"Failed to check replica lag: {e}")
+                cls._lag = None
+            cls._checked_at = now
+            if cls._lag is not None and cls._lag > settings.DB_REPLICA_MAX_LAG_SECONDS:
+                logger.warning(f"Replica is {cls._lag:.1f}s behind; reading from the primary")
+        return cls._lag is not None and cls._lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
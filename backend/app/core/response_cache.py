@@ -0,0 +1,106 @@
+"""Redis cache for read-mostly GET endpoints, invalidated by writes.
+
+``cached_response(*tags)`` stores the serialized response under a key built
+from the request path, farm, query string, caller's role and the current versions of
+``tags`` (see ``ResponseVersions``). A committed write to any tagged entity
+type moves its version, so later requests miss and rebuild; superseded
+entries expire after ``RESPONSE_CACHE_TTL_SECONDS``.
+
+Endpoints keep their ``response_model``; it is used to serialize the result
+once, on a miss. Without Redis the endpoint runs uncached.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core import redis_client
+from app.core.config import settings
+from app.core.constants import VersionedEntity
+from app.core.response_versions import ResponseVersions
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "greenos:cache"
+REQUEST_PARAM = "_cache_request"
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def _role(user: User | None) -> str:
+    if user is None:
+        return "anonymous"
+    if user.is_superuser:
+        return "superuser"
+    return user.role.name if user.role else "none"
+
+
+def _serialize(request: Request, result: Any) -> bytes:
+    route = request.scope.get("route")
+    response_model = getattr(route, "response_model", None)
+    if response_model is None:
+        return json.dumps(jsonable_encoder(result)).encode()
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+
+async def _cache_key(
+    request: Request, user: User | None, tags: tuple[VersionedEntity, ...]
+) -> str | None:
+    farm_id = request.path_params.get("farm_id") or request.query_params.get("farm_id")
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    fingerprint = await ResponseVersions.fingerprint(farm_id, tags, query)
+    if fingerprint is None:
+        return None
+    # The concrete path, so every path parameter (not just the farm) is keyed.
+    digest = hashlib.sha1(f"{request.url.path}|{fingerprint}".encode()).hexdigest()[:20]
+    return f"{KEY_PREFIX}:{farm_id or 'global'}:{_role(user)}:{digest}"
+
+
+def cached_response(*tags: VersionedEntity, ttl: int | None = None) -> Callable:
+    """Cache a GET endpoint's JSON response until an entity in ``tags`` changes."""
+
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        request_param = inspect.Parameter(
+            REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        )
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop(REQUEST_PARAM)
+            user = next((v for v in kwargs.values() if isinstance(v, User)), None)
+            client = redis_client.redis_client
+            key = await _cache_key(request, user, tags) if client else None
+            if key:
+                try:
+                    body = await client.get(key)
+                except Exception as e:
+                    logger.error(f"Failed to read cached response {key}: {e}")
+                    body = None
+                if body is not None:
+                    return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+            body = _serialize(request, await endpoint(*args, **kwargs))
+            if key:
+                try:
+                    await client.set(key, body, ex=ttl or settings.RESPONSE_CACHE_TTL_SECONDS)
+                except Exception as e:
+                    logger.error(f"Failed to cache response {key}: {e}")
+            return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+        wrapper.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), request_param]
+        )
+        return wrapper
+
+    return decorator
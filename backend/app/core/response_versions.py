@@ -0,0 +1,118 @@
+"""Per-farm, per-entity-type version counters behind response ETags and caching.
+
+Services and repositories ``touch`` the entity types a write changes; the
+counters are bumped in Redis once the transaction commits (see
+``AppSession``), so a client never gets a new ETag for data it can't read
+yet. A read endpoint hashes the counters it depends on into its ETag and can
+answer ``If-None-Match`` without running its query; the response cache puts
+the same hash in its keys, so a write invalidates entries by moving readers
+to new keys. Data not owned by a farm is counted in a global hash that every
+farm's fingerprint includes.
+
+Each hash carries a random ``epoch`` so that counters lost with a Redis flush
+restart under different ETags instead of matching old ones.
+"""
+import hashlib
+import logging
+import uuid
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import redis_client
+from app.core.constants import VersionedEntity
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "response_versions"
+
+
+class ResponseVersions:
+    KEY_PREFIX = "greenos:versions"
+
+    @staticmethod
+    def key(farm_id: uuid.UUID | str | None) -> str:
+        """The farm's hash, or the global one for data not owned by a farm."""
+        return f"{ResponseVersions.KEY_PREFIX}:{farm_id or 'global'}"
+
+    @staticmethod
+    def touch(db: AsyncSession, farm_id: uuid.UUID | None, *entities: VersionedEntity) -> None:
+        """Mark ``entities`` as changed by the current transaction.
+
+        With ``farm_id=None`` the change counts for every farm.
+        """
+        pending = db.info.setdefault(PENDING_KEY, set())
+        scope = str(farm_id) if farm_id else None
+        pending.update((scope, entity.value) for entity in entities)
+
+    @staticmethod
+    def pop_pending(db: AsyncSession) -> set[tuple[str | None, str]]:
+        return db.info.pop(PENDING_KEY, set())
+
+    @staticmethod
+    async def bump(touched: Iterable[tuple[str | None, str]]) -> None:
+        touched = list(touched)
+        if not touched:
+            return
+        client = redis_client.redis_client
+        if not client:
+            # Cached responses for these stay valid until their TTL.
+            logger.warning(f"Redis not initialized, response versions not bumped: {touched}")
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for farm_id, entity in touched:
+                    pipe.hincrby(ResponseVersions.key(farm_id), entity, 1)
+                await pipe.execute()
+        except Exception as e:
+            # The write is committed either way; readers just keep the old
+            # versions until the next bump.
+            logger.error(f"Failed to bump response versions {touched}: {e}")
+
+    @staticmethod
+    async def fingerprint(
+        farm_id: uuid.UUID | str | None, entities: Iterable[VersionedEntity], scope: str = ""
+    ) -> str | None:
+        """A digest of the ``entities`` versions, or ``None`` without Redis.
+
+        Covers both the farm's and the global versions. ``scope`` separates
+        responses built from the same entities, e.g. different query strings.
+        """
+        client = redis_client.redis_client
+        if not client:
+            return None
+        fields = ["epoch", *(entity.value for entity in entities)]
+        keys = [ResponseVersions.key(None)]
+        if farm_id:
+            keys.append(ResponseVersions.key(farm_id))
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hsetnx(key, "epoch", uuid.uuid4().hex)
+                    pipe.hmget(key, fields)
+                results = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to read response versions for farm {farm_id}: {e}")
+            return None
+        parts = [str(farm_id), scope]
+        for versions in results[1::2]:
+            parts.extend(f"{name}={version or 0}" for name, version in zip(fields, versions))
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+
+    @staticmethod
+    async def etag(
+        farm_id: uuid.UUID, entities: Iterable[VersionedEntity], scope: str = ""
+    ) -> str | None:
+        """A weak ETag over the ``entities`` versions, or ``None`` without Redis."""
+        digest = await ResponseVersions.fingerprint(farm_id, entities, scope)
+        return f'W/"{digest}"' if digest else None
+
+    @staticmethod
+    def matches(if_none_match: str | None, etag: str) -> bool:
+        """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -77,6 +77,8 @@ async def get_current_user(
     if user is None:
         raise UnauthorizedException(detail="User not found")
 
+    # Lets the session's commit apply read-your-writes to this user.
+    db.info["user_id"] = user.id
     return user
 
 
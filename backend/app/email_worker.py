@@ -0,0 +1,54 @@
+"""Email worker process: ``python -m app.email_worker``.
+
+Moves queued emails, due retries and due digests from Redis into the pooled
+SMTP sender.
+"""
+import asyncio
+import logging
+import signal
+import time
+
+from app.core.logging_config import setup_logging
+from app.core.redis_client import close_redis, init_redis
+from app.services.email_service import EmailQueue, EmailWorker, SMTPPool
+
+logger = logging.getLogger(__name__)
+
+POP_TIMEOUT_SECONDS = 1.0
+DIGEST_POLL_SECONDS = 30.0
+
+
+async def run() -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await init_redis()
+    recovered = await EmailQueue.recover()
+    worker = EmailWorker(SMTPPool())
+    await worker.start()
+    logger.info(f"Email worker started, {recovered} unsettled emails re-queued")
+    next_digest_check = 0.0
+    try:
+        while not stopping.is_set():
+            try:
+                if time.monotonic() >= next_digest_check:
+                    await EmailQueue.queue_due_digests()
+                    next_digest_check = time.monotonic() + DIGEST_POLL_SECONDS
+                await EmailQueue.requeue_due_retries()
+                email = await EmailQueue.pop(POP_TIMEOUT_SECONDS)
+                if email is not None:
+                    await worker.submit(email)
+            except Exception as e:
+                logger.error(f"Email intake failed: {e}")
+                await asyncio.sleep(POP_TIMEOUT_SECONDS)
+    finally:
+        await worker.stop()
+        await close_redis()
+        logger.info("Email worker stopped")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(run())
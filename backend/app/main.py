@@ -9,6 +9,7 @@ from app.core.database import close_db, init_db
 from app.core.exceptions import AppException, app_exception_handler
 from app.core.logging_config import setup_logging
 from app.core.redis_client import close_redis, init_redis
+from app.services.realtime_hub import realtime_hub
 
 
 @asynccontextmanager
@@ -16,7 +17,9 @@ async def lifespan(app: FastAPI):
     setup_logging()
     await init_db()
     await init_redis()
+    await realtime_hub.start()
     yield
+    await realtime_hub.stop()
     await close_redis()
     await close_db()
 
@@ -3,7 +3,7 @@ from app.models.user import User, Role, Permission, role_permissions, user_farms
 from app.models.farm import Farm, Zone, Rack, Tray
 from app.models.sensor import Sensor, SensorReading
 from app.models.crop import CropProfile, CropCycle, GrowthLog
-from app.models.alert import AlertRule, Alert, EscalationPolicy
+from app.models.alert import AlertRule, Alert, AlertIncident, EscalationPolicy
 from app.models.dosing import DosingPump, DosingRecipe, DosingEvent
 from app.models.inventory import InventoryItem, StockTransaction
 from app.models.harvest import Harvest, YieldTarget
@@ -12,6 +12,8 @@ from app.models.order import Customer, Order, OrderItem, Subscription, Invoice
 from app.models.task import Task, TaskPhoto
 from app.models.finance import Cost
 from app.models.vision import PlantScan, AnomalyDetection
+from app.models.outbox import OutboxEvent
+from app.models.webhook import WebhookDeadLetter, WebhookDelivery, WebhookEndpoint
 
 __all__ = [
     "Base",
@@ -32,6 +34,7 @@ __all__ = [
     "GrowthLog",
     "AlertRule",
     "Alert",
+    "AlertIncident",
     "EscalationPolicy",
     "DosingPump",
     "DosingRecipe",
@@ -52,4 +55,8 @@ __all__ = [
     "Cost",
     "PlantScan",
     "AnomalyDetection",
+    "OutboxEvent",
+    "WebhookEndpoint",
+    "WebhookDelivery",
+    "WebhookDeadLetter",
 ]
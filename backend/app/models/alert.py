@@ -3,7 +3,9 @@ from datetime import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, Integer, JSON, Numeric, String, Text
+from sqlalchemy import (
+    BigInteger, Boolean, ForeignKey, Index, Integer, JSON, Numeric, String, Text, text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
@@ -40,6 +42,9 @@ class AlertRule(BaseModel):
     condition: Mapped[str] = mapped_column(String(20), nullable=False)
     threshold_min: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 4), nullable=True)
     threshold_max: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 4), nullable=True)
+    clear_threshold: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 4), nullable=True)
+    duration_minutes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    expression: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     severity: Mapped[str] = mapped_column(String(20), nullable=False)
     cooldown_minutes: Mapped[int] = mapped_column(Integer, default=15, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
@@ -55,6 +60,44 @@ class AlertRule(BaseModel):
     alerts: Mapped[list["Alert"]] = relationship(back_populates="alert_rule")
 
 
+class AlertIncident(BaseModel):
+    __tablename__ = "alert_incidents"
+    __table_args__ = (
+        # At most one open incident per zone (NULL zone included), so two
+        # workers correlating at once can't both open one.
+        Index(
+            "uq_alert_incidents_open_zone",
+            "farm_id",
+            "zone_id",
+            unique=True,
+            postgresql_where=text("status = 'open'"),
+            postgresql_nulls_not_distinct=True,
+            sqlite_where=text("status = 'open'"),
+        ),
+    )
+
+    farm_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("farms.id", ondelete="CASCADE"), nullable=False
+    )
+    zone_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("zones.id", ondelete="SET NULL"), nullable=True
+    )
+    root_sensor_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    sensor_types: Mapped[list] = mapped_column(JSON, nullable=False)
+    severity: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="open", nullable=False)
+    alert_count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    suppressed_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    unreported_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    opened_at: Mapped[datetime] = mapped_column(nullable=False)
+    last_alert_at: Mapped[datetime] = mapped_column(nullable=False)
+    last_notified_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    closed_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    farm: Mapped["Farm"] = relationship(foreign_keys=[farm_id])
+    alerts: Mapped[list["Alert"]] = relationship(back_populates="incident")
+
+
 class Alert(BaseModel):
     __tablename__ = "alerts"
 
@@ -65,6 +108,9 @@ class Alert(BaseModel):
         ForeignKey("sensors.id", ondelete="CASCADE"), nullable=False
     )
     sensor_reading_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    incident_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("alert_incidents.id", ondelete="SET NULL"), nullable=True
+    )
     severity: Mapped[str] = mapped_column(String(20), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -77,5 +123,6 @@ class Alert(BaseModel):
     resolved_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
 
     alert_rule: Mapped["AlertRule"] = relationship(back_populates="alerts")
+    incident: Mapped[Optional["AlertIncident"]] = relationship(back_populates="alerts")
     sensor: Mapped["Sensor"] = relationship(foreign_keys=[sensor_id])
     acknowledger: Mapped[Optional["User"]] = relationship(foreign_keys=[acknowledged_by])
@@ -18,5 +18,8 @@ class TimestampMixin:
 
 class BaseModel(TimestampMixin, Base):
     __abstract__ = True
+    # Fetch created_at/updated_at with RETURNING as part of each INSERT and
+    # UPDATE, so flushed objects are usable without a refresh.
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
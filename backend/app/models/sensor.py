@@ -3,7 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, Index, JSON, Numeric, String, func
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Index, Integer, JSON, Numeric, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, BaseModel, TimestampMixin
@@ -35,6 +35,9 @@ class Sensor(BaseModel):
     sensor_metadata: Mapped[Optional[dict]] = mapped_column(
         "metadata", JSON, nullable=True
     )
+    anomaly_state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    virtual_formula: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    virtual_state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
     farm: Mapped["Farm"] = relationship(back_populates="sensors")
     zone: Mapped[Optional["Zone"]] = relationship(back_populates="sensors")
@@ -49,12 +52,15 @@ class SensorReading(Base):
         Index("ix_sensor_readings_sensor_recorded", "sensor_id", "recorded_at"),
     )
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
     sensor_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("sensors.id", ondelete="CASCADE"), nullable=False
     )
     value: Mapped[Decimal] = mapped_column(Numeric(10, 4), nullable=False)
     raw_value: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 4), nullable=True)
+    anomaly_score: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 4), nullable=True)
     recorded_at: Mapped[datetime] = mapped_column(nullable=False)
     received_at: Mapped[datetime] = mapped_column(default=func.now(), nullable=False)
 
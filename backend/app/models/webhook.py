@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, JSON, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import BaseModel
+
+if TYPE_CHECKING:
+    from app.models.farm import Farm
+
+
+class WebhookEndpoint(BaseModel):
+    __tablename__ = "webhook_endpoints"
+
+    farm_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    url: Mapped[str] = mapped_column(String(2000), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    secret: Mapped[str] = mapped_column(String(128), nullable=False)
+    event_types: Mapped[list] = mapped_column(JSON, nullable=False)
+    max_concurrency: Mapped[int] = mapped_column(Integer, default=4, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+    farm: Mapped["Farm"] = relationship(foreign_keys=[farm_id])
+
+
+class WebhookDelivery(BaseModel):
+    """A pending delivery of one event to one endpoint; deleted once delivered."""
+
+    __tablename__ = "webhook_deliveries"
+    __table_args__ = (Index("ix_webhook_deliveries_next_attempt_at", "next_attempt_at"),)
+
+    endpoint_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("webhook_endpoints.id", ondelete="CASCADE"), nullable=False
+    )
+    event_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(default=func.now(), nullable=False)
+    last_status: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    endpoint: Mapped["WebhookEndpoint"] = relationship(foreign_keys=[endpoint_id])
+
+
+class WebhookDeadLetter(BaseModel):
+    """A delivery that ran out of attempts, kept for inspection and redelivery."""
+
+    __tablename__ = "webhook_dead_letters"
+
+    endpoint_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("webhook_endpoints.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    event_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_status: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -2,13 +2,17 @@ import uuid
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import select, func, desc
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.alert import Alert, AlertRule, EscalationPolicy
+from app.core.constants import VersionedEntity
+from app.models.alert import Alert, AlertIncident, AlertRule, EscalationPolicy
 from app.repositories.base import BaseRepository
 
 
 class AlertRuleRepository(BaseRepository[AlertRule]):
+    versioned_as = VersionedEntity.ALERT_RULES
+
     def __init__(self, db: AsyncSession):
         super().__init__(AlertRule, db)
 
@@ -24,6 +28,16 @@ class AlertRuleRepository(BaseRepository[AlertRule]):
         )
         return list(result.scalars().all())
 
+    async def get_active_compound_rules(self, farm_id: uuid.UUID) -> list[AlertRule]:
+        result = await self.db.execute(
+            select(AlertRule).where(
+                AlertRule.farm_id == farm_id,
+                AlertRule.condition == "compound",
+                AlertRule.is_active.is_(True),
+            )
+        )
+        return list(result.scalars().all())
+
 
 class AlertRepository(BaseRepository[Alert]):
     def __init__(self, db: AsyncSession):
@@ -73,3 +87,56 @@ class AlertRepository(BaseRepository[Alert]):
 class EscalationPolicyRepository(BaseRepository[EscalationPolicy]):
     def __init__(self, db: AsyncSession):
         super().__init__(EscalationPolicy, db)
+
+
+class AlertIncidentRepository(BaseRepository[AlertIncident]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(AlertIncident, db)
+
+    async def get_open_incident(
+        self, farm_id: uuid.UUID, zone_id: uuid.UUID | None
+    ) -> AlertIncident | None:
+        """The zone's open incident, locked until the transaction ends."""
+        query = select(AlertIncident).where(
+            AlertIncident.farm_id == farm_id,
+            AlertIncident.status == "open",
+        )
+        if zone_id is None:
+            query = query.where(AlertIncident.zone_id.is_(None))
+        else:
+            query = query.where(AlertIncident.zone_id == zone_id)
+        result = await self.db.execute(
+            query.with_for_update().execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def create_open_incident(self, data: dict) -> AlertIncident | None:
+        """Open an incident; ``None`` if another transaction opened the zone's first."""
+        try:
+            async with self.db.begin_nested():
+                return await self.create(data)
+        except IntegrityError:
+            return None
+
+    async def get_incidents(
+        self, farm_id: uuid.UUID, status: str | None = None, limit: int = 100
+    ) -> list[AlertIncident]:
+        query = select(AlertIncident).where(AlertIncident.farm_id == farm_id)
+        if status:
+            query = query.where(AlertIncident.status == status)
+        result = await self.db.execute(
+            query.order_by(desc(AlertIncident.last_alert_at)).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_stale_open_incidents(self, before: datetime) -> list[AlertIncident]:
+        result = await self.db.execute(
+            select(AlertIncident)
+            .where(
+                AlertIncident.status == "open",
+                AlertIncident.last_alert_at < before,
+            )
+            # Incidents locked by a correlating alert are still live.
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
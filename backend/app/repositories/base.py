@@ -1,18 +1,98 @@
+import base64
+import json
 import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Any, Generic, Type, TypeVar
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, and_, bindparam, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import ColumnElement
 
+from app.core.constants import CountMode, VersionedEntity
+from app.core.exceptions import BadRequestException
+from app.core.response_versions import ResponseVersions
 from app.models.base import BaseModel
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 
+# A sort key for keyset paging: an expression and whether it sorts descending.
+SortKey = tuple[ColumnElement, bool]
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    items: list[ModelType]
+    total: int | None
+    next_cursor: str | None
+    total_estimated: bool = False
+
+
+def encode_cursor(values: list[Any]) -> str:
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: list[SortKey]) -> list[Any]:
+    """The values ``encode_cursor`` was given, converted back to the keys' types."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        raw = json.loads(payload)
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise ValueError(cursor)
+        values = []
+        for value, (expression, _) in zip(raw, keys):
+            python_type = expression.type.python_type
+            if python_type in (date, datetime):
+                values.append(python_type.fromisoformat(value))
+            elif python_type in (uuid.UUID, Decimal, int):
+                values.append(python_type(value))
+            else:
+                values.append(value)
+        return values
+    except (ValueError, TypeError, NotImplementedError):
+        raise BadRequestException(detail="Invalid cursor", error_code="INVALID_CURSOR")
+
+
+def _after(keys: list[SortKey], values: list[Any]) -> ColumnElement[bool]:
+    """Rows sorting after ``values`` in the order given by ``keys``."""
+    if len({descending for _, descending in keys}) == 1:
+        # Row-value comparison, which an index on the keys can serve.
+        row, cursor = tuple_(*(e for e, _ in keys)), tuple_(*values)
+        return row < cursor if keys[0][1] else row > cursor
+    clauses = []
+    for i, (expression, descending) in enumerate(keys):
+        ties = [e == v for (e, _), v in zip(keys[:i], values[:i])]
+        step = expression < values[i] if descending else expression > values[i]
+        clauses.append(and_(*ties, step))
+    return or_(*clauses)
+
 
 class BaseRepository(Generic[ModelType]):
-    def __init__(self, model: Type[ModelType], db: AsyncSession):
+    # Entity type whose response versions create/update/delete move, which
+    # invalidates cached responses tagged with it.
+    versioned_as: VersionedEntity | None = None
+
+    def __init__(
+        self, model: Type[ModelType], db: AsyncSession, versioned_as: VersionedEntity | None = None
+    ):
         self.model = model
         self.db = db
+        if versioned_as is not None:
+            self.versioned_as = versioned_as
+
+    def version_scope(self, db_obj: ModelType) -> uuid.UUID | None:
+        """The farm owning ``db_obj``; ``None`` versions it for every farm."""
+        return getattr(db_obj, "farm_id", None)
+
+    def _touch(self, db_obj: ModelType) -> None:
+        if self.versioned_as is not None:
+            ResponseVersions.touch(self.db, self.version_scope(db_obj), self.versioned_as)
 
     async def get_by_id(self, id: uuid.UUID) -> ModelType | None:
         result = await self.db.execute(select(self.model).where(self.model.id == id))
@@ -37,28 +117,205 @@ class BaseRepository(Generic[ModelType]):
         result = await self.db.execute(query)
         return result.scalar() or 0
 
+    async def get_page(
+        self,
+        query: Select | None = None,
+        *,
+        limit: int = 20,
+        skip: int = 0,
+        cursor: str | None = None,
+        count: CountMode = CountMode.EXACT,
+        order_by: list[SortKey] | None = None,
+    ) -> Page[ModelType]:
+        """One page of ``query`` (default: every row), newest first.
+
+        ``order_by`` defaults to ``created_at`` descending; ``id`` is always
+        added as the last key so the order is total. Without a ``cursor`` the
+        page starts ``skip`` rows in; with one, it starts right after the row
+        the cursor was taken from, so deep pages cost no more than the first.
+
+        The total is only computed for pages without a cursor: ``EXACT``
+        counts with ``COUNT(*) OVER ()`` in the page query itself and
+        ``ESTIMATED`` uses the PostgreSQL planner's row estimate (other
+        databases count exactly).
+        """
+        query = select(self.model) if query is None else query
+        keys = list(order_by or [(self.model.created_at, True)])
+        keys.append((self.model.id, keys[-1][1]))
+
+        estimated = None
+        if cursor is None and count == CountMode.ESTIMATED:
+            estimated = await self._estimate_count(query)
+        window = cursor is None and count != CountMode.NONE and estimated is None
+
+        page_query = query.add_columns(*(e for e, _ in keys))
+        if window:
+            page_query = page_query.add_columns(func.count().over())
+        page_query = page_query.order_by(
+            *(e.desc() if descending else e.asc() for e, descending in keys)
+        )
+        if cursor is not None:
+            page_query = page_query.where(_after(keys, decode_cursor(cursor, keys)))
+        else:
+            page_query = page_query.offset(skip)
+        rows = (await self.db.execute(page_query.limit(limit + 1))).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][1:len(keys) + 1])) if has_more else None
+
+        total = estimated
+        if window:
+            if rows:
+                total = rows[0][-1]
+            elif skip:
+                # Past the end: the window had no rows to report the count on.
+                total = await self.db.scalar(
+                    select(func.count()).select_from(query.order_by(None).subquery())
+                )
+            else:
+                total = 0
+        return Page(
+            items=[row[0] for row in rows],
+            total=total,
+            next_cursor=next_cursor,
+            total_estimated=estimated is not None,
+        )
+
+    async def _estimate_count(self, query: Select) -> int | None:
+        """The planner's row estimate for ``query``; ``None`` off PostgreSQL."""
+        dialect = self.db.get_bind().dialect
+        if dialect.name != "postgresql":
+            return None
+        sql = query.order_by(None).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        connection = await self.db.connection()
+        plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
     async def create(self, obj_data: dict) -> ModelType:
         db_obj = self.model(**obj_data)
         self.db.add(db_obj)
         await self.db.flush()
-        await self.db.refresh(db_obj)
+        self._touch(db_obj)
         return db_obj
 
+    async def bulk_create(self, rows: list[dict]) -> list[ModelType]:
+        """Insert ``rows`` with one multi-row INSERT ... RETURNING.
+
+        Returns the new objects in the order of ``rows``, already in the
+        session, without the per-object flush and refresh of ``create``.
+        """
+        if not rows:
+            return []
+        result = await self.db.execute(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True), rows
+        )
+        db_objs = list(result.scalars().all())
+        for db_obj in db_objs:
+            self._touch(db_obj)
+        return db_objs
+
+    async def bulk_update(self, rows: list[dict]) -> int:
+        """Update rows by ``id`` with one executemany UPDATE; returns the rows matched.
+
+        Every dict needs an ``id`` and the same other keys. Objects of these
+        rows already in the session get the new values.
+        """
+        if not rows:
+            return 0
+        table = self.model.__table__
+        columns = [key for key in rows[0] if key != "id"]
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({column: bindparam(f"b_{column}") for column in columns})
+        )
+        result = await self.db.execute(
+            statement,
+            [{f"b_{key}": value for key, value in row.items()} for row in rows],
+        )
+        for row in rows:
+            db_obj = self.db.identity_map.get(self.db.identity_key(self.model, row["id"]))
+            if db_obj is None:
+                continue
+            for column in columns:
+                set_committed_value(db_obj, column, row[column])
+            self._touch(db_obj)
+        return result.rowcount
+
+    async def upsert(
+        self,
+        rows: list[dict],
+        index_elements: list[str],
+        update_columns: list[str] | None = None,
+    ) -> list[ModelType]:
+        """Insert ``rows``, updating those that conflict on ``index_elements``.
+
+        ``update_columns`` defaults to every other column given in the rows.
+        Uses one ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` (PostgreSQL
+        and SQLite) and returns the resulting objects in no particular order;
+        asking for the order of ``rows`` would cost a statement per row.
+        """
+        if not rows:
+            return []
+        dialect = self.db.get_bind().dialect.name
+        dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect)
+        if dialect_insert is None:
+            raise NotImplementedError(f"upsert is not supported on {dialect}")
+        if update_columns is None:
+            update_columns = [key for key in rows[0] if key not in index_elements and key != "id"]
+        statement = dialect_insert(self.model)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                **{column: statement.excluded[column] for column in update_columns},
+                "updated_at": func.now(),
+            },
+        )
+        result = await self.db.execute(
+            statement.returning(self.model),
+            rows,
+            execution_options={"populate_existing": True},
+        )
+        db_objs = list(result.scalars().all())
+        for db_obj in db_objs:
+            self._touch(db_obj)
+        return db_objs
+
     async def update(self, id: uuid.UUID, obj_data: dict) -> ModelType | None:
-        db_obj = await self.get_by_id(id)
-        if db_obj is None:
-            return None
-        for key, value in obj_data.items():
-            if value is not None and hasattr(db_obj, key):
-                setattr(db_obj, key, value)
-        await self.db.flush()
-        await self.db.refresh(db_obj)
+        """Set the non-``None`` column values in ``obj_data`` with one UPDATE ... RETURNING.
+
+        A loaded object for the row is updated in place and returned.
+        """
+        columns = self.model.__mapper__.column_attrs.keys()
+        values = {
+            key: value for key, value in obj_data.items() if value is not None and key in columns
+        }
+        if not values:
+            db_obj = await self.get_by_id(id)
+        else:
+            result = await self.db.execute(
+                update(self.model).where(self.model.id == id).values(values).returning(self.model),
+                execution_options={"populate_existing": True},
+            )
+            db_obj = result.scalar_one_or_none()
+        if db_obj is not None:
+            self._touch(db_obj)
         return db_obj
 
     async def delete(self, id: uuid.UUID) -> bool:
-        db_obj = await self.get_by_id(id)
+        """Delete the row with one DELETE ... RETURNING.
+
+        Child rows go through the foreign keys' ON DELETE CASCADE rather than
+        being loaded and deleted one by one.
+        """
+        result = await self.db.execute(
+            delete(self.model).where(self.model.id == id).returning(self.model)
+        )
+        db_obj = result.scalar_one_or_none()
         if db_obj is None:
             return False
-        await self.db.delete(db_obj)
-        await self.db.flush()
+        self._touch(db_obj)
         return True
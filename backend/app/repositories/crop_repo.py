@@ -5,11 +5,14 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.constants import VersionedEntity
 from app.models.crop import CropProfile, CropCycle, GrowthLog
 from app.repositories.base import BaseRepository
 
 
 class CropProfileRepository(BaseRepository[CropProfile]):
+    versioned_as = VersionedEntity.CROP_PROFILES
+
     def __init__(self, db: AsyncSession):
         super().__init__(CropProfile, db)
 
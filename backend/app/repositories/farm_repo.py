@@ -1,18 +1,24 @@
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.constants import VersionedEntity
 from app.models.farm import Farm, Zone, Rack, Tray
 from app.models.user import user_farms
 from app.repositories.base import BaseRepository
 
 
 class FarmRepository(BaseRepository[Farm]):
+    versioned_as = VersionedEntity.FARM_LAYOUT
+
     def __init__(self, db: AsyncSession):
         super().__init__(Farm, db)
 
+    def version_scope(self, db_obj: Farm) -> uuid.UUID:
+        return db_obj.id
+
     async def get_user_farms(self, user_id: uuid.UUID) -> list[Farm]:
         result = await self.db.execute(
             select(Farm)
@@ -22,6 +28,27 @@ class FarmRepository(BaseRepository[Farm]):
         )
         return list(result.scalars().all())
 
+    async def get_farm_page(
+        self, user_id: uuid.UUID | None, skip: int, limit: int
+    ) -> tuple[list[Farm], int]:
+        """Active farms by name; only ``user_id``'s farms unless it is ``None``."""
+        query = select(Farm).where(Farm.is_active.is_(True))
+        if user_id is not None:
+            query = query.join(user_farms, user_farms.c.farm_id == Farm.id).where(
+                user_farms.c.user_id == user_id
+            )
+        total = await self.db.scalar(select(func.count()).select_from(query.subquery()))
+        result = await self.db.execute(query.order_by(Farm.name, Farm.id).offset(skip).limit(limit))
+        return list(result.scalars().all()), total
+
+    async def is_member(self, farm_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+        result = await self.db.execute(
+            select(user_farms.c.farm_id).where(
+                user_farms.c.farm_id == farm_id, user_farms.c.user_id == user_id
+            )
+        )
+        return result.first() is not None
+
     async def get_farm_with_zones(self, farm_id: uuid.UUID) -> Farm | None:
         result = await self.db.execute(
             select(Farm)
@@ -32,15 +59,23 @@ class FarmRepository(BaseRepository[Farm]):
 
 
 class ZoneRepository(BaseRepository[Zone]):
+    versioned_as = VersionedEntity.FARM_LAYOUT
+
     def __init__(self, db: AsyncSession):
         super().__init__(Zone, db)
 
 
+# Racks and trays don't carry their farm, so their writes invalidate every
+# farm's layout; layout changes are rare enough for that to be cheap.
 class RackRepository(BaseRepository[Rack]):
+    versioned_as = VersionedEntity.FARM_LAYOUT
+
     def __init__(self, db: AsyncSession):
         super().__init__(Rack, db)
 
 
 class TrayRepository(BaseRepository[Tray]):
+    versioned_as = VersionedEntity.FARM_LAYOUT
+
     def __init__(self, db: AsyncSession):
         super().__init__(Tray, db)
@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.outbox import OutboxEvent
+from app.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository[OutboxEvent]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(OutboxEvent, db)
+
+    async def has_due(self, now: datetime, max_attempts: int) -> bool:
+        return bool(
+            await self.db.scalar(select(exists().where(*self._due(now, max_attempts))))
+        )
+
+    async def claim_batch(
+        self, now: datetime, limit: int, max_attempts: int
+    ) -> list[OutboxEvent]:
+        """Lock up to ``limit`` deliverable events, skipping rows another relay holds."""
+        result = await self.db.execute(
+            select(OutboxEvent)
+            .where(*self._due(now, max_attempts))
+            .order_by(OutboxEvent.available_at, OutboxEvent.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def get_pending_ids(
+        self, farm_id: uuid.UUID, destinations: list[str]
+    ) -> list[uuid.UUID]:
+        """Ids of the farm's committed events to ``destinations`` not yet relayed."""
+        result = await self.db.execute(
+            select(OutboxEvent.id).where(
+                OutboxEvent.farm_id == farm_id,
+                OutboxEvent.destination.in_(destinations),
+                OutboxEvent.published_at.is_(None),
+            )
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _due(now: datetime, max_attempts: int) -> list:
+        return [
+            OutboxEvent.published_at.is_(None),
+            OutboxEvent.available_at <= now,
+            OutboxEvent.attempts < max_attempts,
+        ]
+
+    async def purge_published(self, before: datetime) -> int:
+        result = await self.db.execute(
+            delete(OutboxEvent).where(
+                OutboxEvent.published_at.is_not(None),
+                OutboxEvent.published_at < before,
+            )
+        )
+        return result.rowcount or 0
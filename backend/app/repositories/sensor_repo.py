@@ -26,6 +26,36 @@ class SensorRepository(BaseRepository[Sensor]):
         result = await self.db.execute(query.order_by(Sensor.name))
         return list(result.scalars().all())
 
+    async def lock(self, sensor_ids: list[uuid.UUID]) -> list[Sensor]:
+        """Lock the sensors' rows until the transaction ends and reload them.
+
+        Rows are locked in id order so concurrent writers can't deadlock.
+        """
+        if not sensor_ids:
+            return []
+        result = await self.db.execute(
+            select(Sensor)
+            .where(Sensor.id.in_(sensor_ids))
+            .order_by(Sensor.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def latest_by_type(sensors: list[Sensor]) -> dict[str, Sensor]:
+        """The most recently reporting sensor of each type with a cached ``last_value``."""
+        latest: dict[str, Sensor] = {}
+        for sensor in sensors:
+            if sensor.last_value is None:
+                continue
+            current = latest.get(sensor.sensor_type)
+            if current is None or (sensor.last_reading_at or datetime.min) > (
+                current.last_reading_at or datetime.min
+            ):
+                latest[sensor.sensor_type] = sensor
+        return latest
+
 
 class SensorReadingRepository:
     def __init__(self, db: AsyncSession):
@@ -35,7 +65,6 @@ class SensorReadingRepository:
         reading = SensorReading(**data)
         self.db.add(reading)
         await self.db.flush()
-        await self.db.refresh(reading)
         return reading
 
     async def get_readings(
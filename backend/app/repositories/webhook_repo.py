@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.webhook import WebhookDeadLetter, WebhookDelivery, WebhookEndpoint
+from app.repositories.base import BaseRepository
+
+
+class WebhookEndpointRepository(BaseRepository[WebhookEndpoint]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(WebhookEndpoint, db)
+
+    async def get_subscribed(self, farm_id: uuid.UUID, event_type: str) -> list[WebhookEndpoint]:
+        result = await self.db.execute(
+            select(WebhookEndpoint).where(
+                WebhookEndpoint.farm_id == farm_id,
+                WebhookEndpoint.is_active.is_(True),
+            )
+        )
+        # Few endpoints per farm; filtering the JSON list here keeps the query portable.
+        return [e for e in result.scalars().all() if event_type in e.event_types]
+
+
+class WebhookDeliveryRepository(BaseRepository[WebhookDelivery]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(WebhookDelivery, db)
+
+    async def claim_due(self, now: datetime, limit: int) -> list[WebhookDelivery]:
+        """Lock up to ``limit`` due deliveries, skipping rows another worker holds."""
+        result = await self.db.execute(
+            select(WebhookDelivery)
+            .options(selectinload(WebhookDelivery.endpoint))
+            .where(WebhookDelivery.next_attempt_at <= now)
+            .order_by(WebhookDelivery.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=WebhookDelivery)
+        )
+        return list(result.scalars().all())
+
+    async def lock_by_ids(self, ids: list[uuid.UUID]) -> list[WebhookDelivery]:
+        if not ids:
+            return []
+        result = await self.db.execute(
+            select(WebhookDelivery).where(WebhookDelivery.id.in_(ids)).with_for_update()
+        )
+        return list(result.scalars().all())
+
+
+class WebhookDeadLetterRepository(BaseRepository[WebhookDeadLetter]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(WebhookDeadLetter, db)
@@ -3,20 +3,44 @@ from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from app.services.alert_expression import ExpressionError, compile_expression
+
+
+def _check_expression(expression: str | None) -> str | None:
+    if expression is not None:
+        try:
+            compile_expression(expression)
+        except ExpressionError as e:
+            raise ValueError(f"Invalid expression: {e}") from None
+    return expression
+
 
 class AlertRuleCreate(BaseModel):
-    sensor_type: str
+    sensor_type: str | None = None
     condition: str
     threshold_min: float | None = None
     threshold_max: float | None = None
+    clear_threshold: float | None = None
+    duration_minutes: int | None = Field(None, ge=1)
+    expression: str | None = Field(None, max_length=500)
     severity: str = "warning"
     zone_id: UUID | None = None
     cooldown_minutes: int = Field(15, ge=1)
     notify_channels: list[str] | None = None
     escalation_policy_id: UUID | None = None
 
+    _validate_expression = field_validator("expression")(_check_expression)
+
     @model_validator(mode="after")
     def validate_thresholds(self):
+        if self.condition == "compound":
+            if self.expression is None:
+                raise ValueError("expression required when condition is 'compound'")
+            # Compound rules span several types; duration_minutes is the trend window.
+            self.sensor_type = "compound"
+            return self
+        if self.sensor_type is None:
+            raise ValueError("sensor_type required")
         if self.condition == "above" and self.threshold_max is None:
             raise ValueError("threshold_max required when condition is 'above'")
         if self.condition == "below" and self.threshold_min is None:
@@ -24,14 +48,82 @@ class AlertRuleCreate(BaseModel):
         if self.condition == "outside_range":
             if self.threshold_min is None or self.threshold_max is None:
                 raise ValueError("Both threshold_min and threshold_max required for 'outside_range'")
+        if self.condition == "sustained":
+            if self.threshold_min is None and self.threshold_max is None:
+                raise ValueError("threshold_min or threshold_max required for 'sustained'")
+            if self.duration_minutes is None:
+                raise ValueError("duration_minutes required for 'sustained'")
+        if self.condition == "rate_of_change":
+            if self.threshold_min is None and self.threshold_max is None:
+                raise ValueError("threshold_min or threshold_max (units per hour) required for 'rate_of_change'")
+            if self.duration_minutes is None:
+                raise ValueError("duration_minutes (trend window) required for 'rate_of_change'")
+        if self.condition == "anomaly" and self.threshold_max is None:
+            raise ValueError("threshold_max (z-score) required when condition is 'anomaly'")
+        if self.condition == "hysteresis":
+            if (self.threshold_min is None) == (self.threshold_max is None):
+                raise ValueError("Exactly one of threshold_min or threshold_max required for 'hysteresis'")
+            if self.clear_threshold is None:
+                raise ValueError("clear_threshold required for 'hysteresis'")
+            if self.threshold_max is not None and self.clear_threshold >= self.threshold_max:
+                raise ValueError("clear_threshold must be below threshold_max")
+            if self.threshold_min is not None and self.clear_threshold <= self.threshold_min:
+                raise ValueError("clear_threshold must be above threshold_min")
         return self
 
 
+class AlertBacktestRequest(BaseModel):
+    rules: list[AlertRuleCreate] = Field(..., min_length=1, max_length=20)
+    start: datetime
+    end: datetime
+    zone_id: UUID | None = None
+    max_events: int = Field(500, ge=0, le=5000)
+
+    @model_validator(mode="after")
+    def validate_window(self):
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        if (self.end - self.start).days > 366:
+            raise ValueError("Backtest window cannot exceed one year")
+        if any(rule.condition == "compound" for rule in self.rules):
+            raise ValueError("Compound rules cannot be backtested")
+        return self
+
+
+class BacktestEvent(BaseModel):
+    sensor_id: UUID
+    triggered_at: datetime
+    value: float
+
+
+class AlertRuleBacktestResult(BaseModel):
+    rule_index: int
+    sensor_type: str
+    condition: str
+    violations: int
+    alerts_fired: int
+    suppressed_by_cooldown: int
+    first_alert_at: datetime | None = None
+    last_alert_at: datetime | None = None
+    daily_counts: dict[str, int]
+    events: list[BacktestEvent]
+    events_truncated: bool
+
+
+class AlertBacktestResponse(BaseModel):
+    start: datetime
+    end: datetime
+    results: list[AlertRuleBacktestResult]
+
+
 class AlertRuleUpdate(BaseModel):
     sensor_type: str | None = None
     condition: str | None = None
     threshold_min: float | None = None
     threshold_max: float | None = None
+    clear_threshold: float | None = None
+    duration_minutes: int | None = Field(None, ge=1)
+    expression: str | None = Field(None, max_length=500)
     severity: str | None = None
     zone_id: UUID | None = None
     cooldown_minutes: int | None = None
@@ -39,6 +131,8 @@ class AlertRuleUpdate(BaseModel):
     notify_channels: list[str] | None = None
     escalation_policy_id: UUID | None = None
 
+    _validate_expression = field_validator("expression")(_check_expression)
+
 
 class AlertRuleResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -50,6 +144,9 @@ class AlertRuleResponse(BaseModel):
     condition: str
     threshold_min: float | None = None
     threshold_max: float | None = None
+    clear_threshold: float | None = None
+    duration_minutes: int | None = None
+    expression: str | None = None
     severity: str
     cooldown_minutes: int
     is_active: bool
@@ -66,6 +163,7 @@ class AlertResponse(BaseModel):
     alert_rule_id: UUID
     sensor_id: UUID
     sensor_reading_id: int | None = None
+    incident_id: UUID | None = None
     severity: str
     title: str
     message: str | None = None
@@ -77,13 +175,37 @@ class AlertResponse(BaseModel):
     created_at: datetime
 
 
+class AlertIncidentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    farm_id: UUID
+    zone_id: UUID | None = None
+    root_sensor_type: str
+    sensor_types: list[str]
+    severity: str
+    status: str
+    alert_count: int
+    suppressed_count: int
+    opened_at: datetime
+    last_alert_at: datetime
+    closed_at: datetime | None = None
+
+
 class AlertAcknowledge(BaseModel):
     notes: str | None = None
 
 
+class EscalationStep(BaseModel):
+    delay_minutes: int = Field(..., ge=0)
+    channels: list[str] = []
+    notify_roles: list[str] = []
+    notify_user_ids: list[UUID] = []
+
+
 class EscalationPolicyCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
-    steps: list[dict]
+    steps: list[EscalationStep] = Field(..., min_length=1)
 
 
 class EscalationPolicyResponse(BaseModel):
@@ -9,9 +9,25 @@ T = TypeVar("T")
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: list[T]
-    total: int
+    # None when not counted: count=none, or a page fetched with a cursor.
+    total: int | None
     skip: int
     limit: int
+    # Pass as ``cursor`` to get the next page; None on the last page.
+    next_cursor: str | None = None
+    total_estimated: bool = False
+
+    @classmethod
+    def from_page(cls, page, skip: int, limit: int) -> "PaginatedResponse":
+        """Build the response from a repository ``Page``."""
+        return cls(
+            items=page.items,
+            total=page.total,
+            skip=skip,
+            limit=limit,
+            next_cursor=page.next_cursor,
+            total_estimated=page.total_estimated,
+        )
 
 
 class MessageResponse(BaseModel):
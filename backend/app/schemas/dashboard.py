@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from pydantic import BaseModel
 
 from app.schemas.harvest import HarvestCalendarEntry
@@ -15,3 +17,11 @@ class DashboardResponse(BaseModel):
     total_zones: int
     active_sensors: int
     monthly_yield_kg: float
+
+
+class PortfolioEntry(BaseModel):
+    farm_id: UUID
+    name: str
+    # False when computed for this request instead of read from the cache.
+    cached: bool
+    dashboard: dict
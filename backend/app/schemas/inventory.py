@@ -54,6 +54,10 @@ class StockTransactionCreate(BaseModel):
     reference: str | None = None
 
 
+class StockTransactionBatchEntry(StockTransactionCreate):
+    inventory_item_id: UUID
+
+
 class StockTransactionResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+STREAM_ID_PATTERN = r"^\d+-\d+$"
+
+
+class NotificationInboxResponse(BaseModel):
+    items: list[dict]
+    unread_count: int
+    cursor: str | None = None
+
+
+class UnreadCountResponse(BaseModel):
+    count: int
+
+
+class MarkReadRequest(BaseModel):
+    up_to: str = Field(..., pattern=STREAM_ID_PATTERN)
@@ -1,7 +1,9 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.core.constants import VirtualFormulaType
 
 
 class SensorCreate(BaseModel):
@@ -13,6 +15,22 @@ class SensorCreate(BaseModel):
     hardware_id: str | None = None
     calibration_offset: float = 0
     metadata: dict | None = None
+    virtual_formula: VirtualFormulaType | None = None
+
+    @model_validator(mode="after")
+    def validate_virtual(self):
+        if self.virtual_formula is None:
+            return self
+        if self.zone_id is None:
+            raise ValueError("Virtual sensors require a zone_id")
+        if self.virtual_formula in (VirtualFormulaType.VPD, VirtualFormulaType.DLI):
+            if self.sensor_type != self.virtual_formula.value:
+                raise ValueError(f"sensor_type must be '{self.virtual_formula.value}'")
+        if self.virtual_formula == VirtualFormulaType.RATIO:
+            metadata = self.metadata or {}
+            if not metadata.get("numerator") or not metadata.get("denominator"):
+                raise ValueError("Ratio sensors require 'numerator' and 'denominator' in metadata")
+        return self
 
 
 class SensorUpdate(BaseModel):
@@ -39,6 +57,7 @@ class SensorResponse(BaseModel):
     hardware_id: str | None = None
     calibration_offset: float
     is_active: bool
+    virtual_formula: str | None = None
     last_reading_at: datetime | None = None
     last_value: float | None = None
     created_at: datetime
@@ -58,6 +77,7 @@ class SensorReadingResponse(BaseModel):
     sensor_id: UUID
     value: float
     raw_value: float | None = None
+    anomaly_score: float | None = None
     recorded_at: datetime
     received_at: datetime
 
@@ -68,5 +88,6 @@ class SensorSummaryResponse(BaseModel):
     name: str
     latest_value: float | None = None
     latest_reading_at: datetime | None = None
+    anomaly_score: float | None = None
     status: str = "normal"
     zone_name: str | None = None
@@ -0,0 +1,67 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict, Field, field_validator
+
+from app.core.constants import WebhookEventType
+from app.services.webhook_targets import check_host
+
+
+def _check_url(url: AnyHttpUrl | None) -> AnyHttpUrl | None:
+    # Names are resolved and checked when the endpoint is saved.
+    if url is not None:
+        check_host(url.host)
+    return url
+
+
+class WebhookEndpointCreate(BaseModel):
+    url: AnyHttpUrl
+    description: str | None = Field(None, max_length=255)
+    event_types: list[WebhookEventType] = Field(..., min_length=1)
+    max_concurrency: int = Field(4, ge=1, le=32)
+
+    _validate_url = field_validator("url")(_check_url)
+
+
+class WebhookEndpointUpdate(BaseModel):
+    url: AnyHttpUrl | None = None
+    description: str | None = Field(None, max_length=255)
+    event_types: list[WebhookEventType] | None = Field(None, min_length=1)
+    max_concurrency: int | None = Field(None, ge=1, le=32)
+    is_active: bool | None = None
+
+    _validate_url = field_validator("url")(_check_url)
+
+
+class WebhookEndpointResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    farm_id: UUID
+    url: str
+    description: str | None = None
+    event_types: list[str]
+    max_concurrency: int
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class WebhookEndpointCreated(WebhookEndpointResponse):
+    """Returned once on creation; the signing secret is not shown again."""
+
+    secret: str
+
+
+class WebhookDeadLetterResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    endpoint_id: UUID
+    event_id: UUID
+    event_type: str
+    payload: dict
+    attempts: int
+    last_status: int | None = None
+    last_error: str | None = None
+    created_at: datetime
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.crop import CropProfile
+from app.repositories.crop_repo import CropProfileRepository
 
 logger = logging.getLogger(__name__)
 
@@ -174,18 +175,12 @@ DEFAULT_CROP_PROFILES = [
 
 async def seed_crop_profiles(session: AsyncSession):
     """Create default crop profiles."""
-    for profile_data in DEFAULT_CROP_PROFILES:
-        existing = await session.execute(
-            select(CropProfile).where(
-                CropProfile.name == profile_data["name"],
-                CropProfile.is_system_default.is_(True),
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
-
-        profile = CropProfile(**profile_data)
-        session.add(profile)
+    existing = await session.execute(
+        select(CropProfile.name).where(CropProfile.is_system_default.is_(True))
+    )
+    seeded = set(existing.scalars().all())
+    missing = [p for p in DEFAULT_CROP_PROFILES if p["name"] not in seeded]
+    await CropProfileRepository(session).bulk_create(missing)
 
     await session.commit()
-    logger.info(f"Seeded {len(DEFAULT_CROP_PROFILES)} default crop profiles")
+    logger.info(f"Seeded {len(missing)} default crop profiles")
@@ -2,10 +2,10 @@
 import asyncio
 import logging
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import Role, Permission
+from app.repositories.base import BaseRepository
 
 logger = logging.getLogger(__name__)
 
@@ -89,36 +89,22 @@ ROLE_PERMISSIONS = {
 
 
 async def seed_roles_and_permissions(session: AsyncSession):
-    """Create default roles and permissions."""
-    # Create permissions
-    perm_objects = {}
-    for perm_name in PERMISSIONS:
-        existing = await session.execute(
-            select(Permission).where(Permission.name == perm_name)
-        )
-        perm = existing.scalar_one_or_none()
-        if not perm:
-            perm = Permission(name=perm_name, description=f"Permission: {perm_name}")
-            session.add(perm)
-            await session.flush()
-        perm_objects[perm_name] = perm
+    """Create default roles and permissions, refreshing existing descriptions."""
+    permissions = await BaseRepository(Permission, session).upsert(
+        [{"codename": name, "description": f"Permission: {name}"} for name in PERMISSIONS],
+        index_elements=["codename"],
+    )
+    roles = await BaseRepository(Role, session).upsert(
+        [
+            {"name": name, "description": f"{name.replace('_', ' ').title()} role"}
+            for name in ROLE_PERMISSIONS
+        ],
+        index_elements=["name"],
+    )
 
-    # Create roles with permissions
-    for role_name, role_perms in ROLE_PERMISSIONS.items():
-        existing = await session.execute(
-            select(Role).where(Role.name == role_name)
-        )
-        role = existing.scalar_one_or_none()
-        if not role:
-            role = Role(
-                name=role_name,
-                description=f"{role_name.replace('_', ' ').title()} role",
-            )
-            session.add(role)
-            await session.flush()
-
-        # Assign permissions
-        role.permissions = [perm_objects[p] for p in role_perms if p in perm_objects]
+    by_codename = {p.codename: p for p in permissions}
+    for role in roles:
+        role.permissions = [by_codename[p] for p in ROLE_PERMISSIONS[role.name] if p in by_codename]
 
     await session.commit()
     logger.info("Seeded default roles and permissions")
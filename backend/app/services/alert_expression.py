@@ -0,0 +1,230 @@
+"""Boolean expressions over a zone's sensor types for compound alert rules.
+
+Grammar (keywords are case-insensitive)::
+
+    expr       := and_expr ("OR" and_expr)*
+    and_expr   := unary ("AND" unary)*
+    unary      := "NOT" unary | "(" expr ")" | predicate
+    predicate  := SENSOR_TYPE (OP NUMBER | ("rising" | "falling") [NUMBER])
+    OP         := ">" | ">=" | "<" | "<=" | "==" | "!="
+
+``rising``/``falling`` compare the sensor's trend slope (units per hour)
+against an optional minimum rate, default 0. Evaluation is three-valued: a
+predicate whose input has no value yet is unknown, and a rule only fires when
+the whole expression is definitely true.
+"""
+import operator
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.constants import SensorType
+
+_TOKEN = re.compile(r"\s*(?:(-?\d+(?:\.\d+)?|-?\.\d+)|(>=|<=|==|!=|>|<)|([()])|([A-Za-z_]+))")
+
+_COMPARATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_SENSOR_TYPES = {t.value for t in SensorType}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Comparison:
+    sensor_type: str
+    op: str
+    value: float
+
+    def evaluate(self, values: dict[str, float], trends: dict[str, float | None]) -> bool | None:
+        current = values.get(self.sensor_type)
+        if current is None:
+            return None
+        return _COMPARATORS[self.op](current, self.value)
+
+    def sensor_types(self) -> set[str]:
+        return {self.sensor_type}
+
+    def trend_types(self) -> set[str]:
+        return set()
+
+
+@dataclass(frozen=True)
+class Trend:
+    sensor_type: str
+    direction: str
+    rate: float = 0.0
+
+    def evaluate(self, values: dict[str, float], trends: dict[str, float | None]) -> bool | None:
+        slope = trends.get(self.sensor_type)
+        if slope is None:
+            return None
+        return slope > self.rate if self.direction == "rising" else slope < -self.rate
+
+    def sensor_types(self) -> set[str]:
+        return {self.sensor_type}
+
+    def trend_types(self) -> set[str]:
+        return {self.sensor_type}
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: "Node"
+
+    def evaluate(self, values: dict[str, float], trends: dict[str, float | None]) -> bool | None:
+        result = self.operand.evaluate(values, trends)
+        return None if result is None else not result
+
+    def sensor_types(self) -> set[str]:
+        return self.operand.sensor_types()
+
+    def trend_types(self) -> set[str]:
+        return self.operand.trend_types()
+
+
+@dataclass(frozen=True)
+class And:
+    operands: tuple["Node", ...]
+
+    def evaluate(self, values: dict[str, float], trends: dict[str, float | None]) -> bool | None:
+        unknown = False
+        for operand in self.operands:
+            result = operand.evaluate(values, trends)
+            if result is False:
+                return False
+            unknown = unknown or result is None
+        return None if unknown else True
+
+    def sensor_types(self) -> set[str]:
+        return set().union(*(o.sensor_types() for o in self.operands))
+
+    def trend_types(self) -> set[str]:
+        return set().union(*(o.trend_types() for o in self.operands))
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: tuple["Node", ...]
+
+    def evaluate(self, values: dict[str, float], trends: dict[str, float | None]) -> bool | None:
+        unknown = False
+        for operand in self.operands:
+            result = operand.evaluate(values, trends)
+            if result is True:
+                return True
+            unknown = unknown or result is None
+        return None if unknown else False
+
+    def sensor_types(self) -> set[str]:
+        return set().union(*(o.sensor_types() for o in self.operands))
+
+    def trend_types(self) -> set[str]:
+        return set().union(*(o.trend_types() for o in self.operands))
+
+
+Node = Comparison | Trend | Not | And | Or
+
+
+def _tokenize(source: str) -> list[str]:
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if not match:
+            raise ExpressionError(f"Unexpected character at position {pos}: {source[pos]!r}")
+        tokens.append(match.group(match.lastindex))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def keyword(self, word: str) -> bool:
+        token = self.peek()
+        if token is not None and token.upper() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def take(self, what: str) -> str:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError(f"Expected {what} at end of expression")
+        self.pos += 1
+        return token
+
+    def number(self) -> float:
+        token = self.take("a number")
+        try:
+            return float(token)
+        except ValueError:
+            raise ExpressionError(f"Expected a number, got {token!r}") from None
+
+    def parse(self) -> Node:
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise ExpressionError(f"Unexpected token {self.peek()!r}")
+        return node
+
+    def or_expr(self) -> Node:
+        operands = [self.and_expr()]
+        while self.keyword("OR"):
+            operands.append(self.and_expr())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def and_expr(self) -> Node:
+        operands = [self.unary()]
+        while self.keyword("AND"):
+            operands.append(self.unary())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def unary(self) -> Node:
+        if self.keyword("NOT"):
+            return Not(self.unary())
+        if self.peek() == "(":
+            self.pos += 1
+            node = self.or_expr()
+            if self.take("')'") != ")":
+                raise ExpressionError("Expected ')'")
+            return node
+        return self.predicate()
+
+    def predicate(self) -> Node:
+        sensor_type = self.take("a sensor type").lower()
+        if sensor_type not in _SENSOR_TYPES:
+            raise ExpressionError(f"Unknown sensor type {sensor_type!r}")
+        token = self.take("a comparison or 'rising'/'falling'")
+        if token in _COMPARATORS:
+            return Comparison(sensor_type, token, self.number())
+        direction = token.lower()
+        if direction not in ("rising", "falling"):
+            raise ExpressionError(f"Expected a comparison after {sensor_type!r}, got {token!r}")
+        rate = 0.0
+        if self.peek() is not None and self.peek()[0] in "0123456789.":
+            rate = self.number()
+        return Trend(sensor_type, direction, rate)
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> Node:
+    """Parse ``source`` into an expression tree, raising ExpressionError."""
+    tokens = _tokenize(source)
+    if not tokens:
+        raise ExpressionError("Expression is empty")
+    return _Parser(tokens).parse()
@@ -2,13 +2,37 @@ import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
 
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import NotFoundException
-from app.models.alert import Alert, AlertRule
+from app.core.constants import AlertCondition, VersionedEntity
+from app.core.database import after_commit
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.response_versions import ResponseVersions
+from app.models.alert import Alert, AlertIncident, AlertRule, EscalationPolicy
 from app.models.sensor import Sensor, SensorReading
 from app.models.user import User
-from app.repositories.alert_repo import AlertRepository, AlertRuleRepository
+from app.repositories.alert_repo import (
+    AlertRepository,
+    AlertRuleRepository,
+    EscalationPolicyRepository,
+)
+from app.repositories.sensor_repo import SensorRepository
+from app.schemas.alert import AlertRuleCreate
+from app.services.alert_expression import compile_expression
+from app.services.alert_state import (
+    STATEFUL_CONDITIONS,
+    StateChanges,
+    advance_state,
+    alert_state_store,
+    latch,
+    observe_trend,
+    rearm,
+)
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.escalation_service import EscalationService, escalation_scheduler
+from app.services.incident_service import IncidentService
+from app.services.outbox_service import OutboxService
 
 
 class AlertService:
@@ -16,6 +40,11 @@ class AlertService:
         self.db = db
         self.rule_repo = AlertRuleRepository(db)
         self.alert_repo = AlertRepository(db)
+        self.policy_repo = EscalationPolicyRepository(db)
+        self.sensor_repo = SensorRepository(db)
+        self.incidents = IncidentService(db)
+        self.escalations = EscalationService(db)
+        self.outbox = OutboxService(db)
 
     # Rules
     async def create_rule(self, farm_id: uuid.UUID, data: dict) -> AlertRule:
@@ -23,48 +52,257 @@ class AlertService:
         return await self.rule_repo.create(data)
 
     async def update_rule(self, rule_id: uuid.UUID, data: dict) -> AlertRule:
-        rule = await self.rule_repo.update(rule_id, data)
+        rule = await self.rule_repo.get_by_id(rule_id)
         if not rule:
             raise NotFoundException(detail="Alert rule not found")
+        # A partial update must still leave a rule the create schema accepts,
+        # e.g. a switch to hysteresis needs a clear_threshold.
+        merged = {field: getattr(rule, field) for field in AlertRuleCreate.model_fields}
+        merged.update({key: value for key, value in data.items() if value is not None})
+        try:
+            AlertRuleCreate.model_validate(merged)
+        except ValidationError as e:
+            raise BadRequestException(detail=e.errors()[0]["msg"])
+        rule = await self.rule_repo.update(rule_id, data)
+        await alert_state_store.discard(rule_id)
         return rule
 
     async def delete_rule(self, rule_id: uuid.UUID) -> None:
         if not await self.rule_repo.delete(rule_id):
             raise NotFoundException(detail="Alert rule not found")
+        await alert_state_store.discard(rule_id)
 
     async def list_rules(self, farm_id: uuid.UUID) -> list[AlertRule]:
         return await self.rule_repo.get_multi(limit=1000, farm_id=farm_id)
 
+    # Escalation policies
+    async def create_escalation_policy(
+        self, farm_id: uuid.UUID, data: dict
+    ) -> EscalationPolicy:
+        data["farm_id"] = farm_id
+        return await self.policy_repo.create(data)
+
     # Alert evaluation
+    async def evaluate_stored_reading(self, sensor_id: uuid.UUID, reading_id: int) -> list[Alert]:
+        """Evaluate a reading queued by ``OutboxService.evaluate_alerts``.
+
+        Readings or sensors deleted since then have nothing left to alert on.
+        """
+        sensor = await self.sensor_repo.get_by_id(sensor_id)
+        reading = await self.db.get(SensorReading, reading_id)
+        if sensor is None or reading is None:
+            return []
+        return await self.evaluate_reading(sensor, reading)
+
     async def evaluate_reading(
         self, sensor: Sensor, reading: SensorReading
     ) -> list[Alert]:
+        """Raise the alerts ``reading`` triggers.
+
+        Rule state changes are written once the session commits, so a retry
+        after a failure starts from the state this evaluation started from.
+        """
         rules = await self.rule_repo.get_active_rules_for_sensor_type(
             sensor.farm_id, sensor.sensor_type
         )
+        timestamp = reading.recorded_at.timestamp()
+        changes = StateChanges(timestamp, reading.id)
         triggered = []
+        # Incidents whose rollup became due; published once the alerts counted
+        # in them have been created.
+        rollups: list[AlertIncident] = []
         for rule in rules:
-            if self._is_threshold_violated(reading.value, rule):
-                recent = await self.alert_repo.get_recent_alert_for_rule(
-                    rule.id, rule.cooldown_minutes
+            if rule.condition in STATEFUL_CONDITIONS:
+                fired = await changes.update(
+                    rule.id,
+                    sensor.id,
+                    lambda state, rule=rule: advance_state(
+                        rule, float(reading.value), timestamp, state
+                    ),
                 )
-                if recent is None:
-                    alert = await self.alert_repo.create(
-                        {
-                            "alert_rule_id": rule.id,
-                            "sensor_id": sensor.id,
-                            "sensor_reading_id": reading.id,
-                            "severity": rule.severity,
-                            "title": f"{sensor.sensor_type.upper()} alert on {sensor.name}",
-                            "message": f"Value {reading.value} violated threshold (rule: {rule.condition})",
-                            "triggered_value": reading.value,
-                            "status": "active",
-                        }
-                    )
-                    triggered.append(alert)
+            elif rule.condition == AlertCondition.ANOMALY:
+                fired = self._is_anomalous(reading.anomaly_score, rule)
+            else:
+                fired = self._is_threshold_violated(reading.value, rule)
+            if not fired:
+                continue
+            if await self._cooling_down(rule):
+                if rule.condition in STATEFUL_CONDITIONS:
+                    await changes.update(rule.id, sensor.id, rearm)
+                continue
+            alert = await self._raise_alert(
+                rule,
+                sensor,
+                reading,
+                f"{sensor.sensor_type.upper()} alert on {sensor.name}",
+                await self._alert_message(rule, sensor, reading, changes),
+                rollups,
+            )
+            if alert is not None:
+                triggered.append(alert)
+        if sensor.zone_id is not None:
+            triggered.extend(
+                await self._evaluate_compound_rules(sensor, reading, rollups, changes)
+            )
+        for incident in rollups:
+            self.outbox.publish(
+                sensor.farm_id, "incident_rollup", IncidentService.rollup_payload(incident)
+            )
+        # Flushed first, so a write that fails here can't leave the changes
+        # registered for a transaction that is then rolled back to a savepoint.
+        await self.db.flush()
+        after_commit(self.db, changes.apply)
         return triggered
 
-    def _is_threshold_violated(self, value: Decimal, rule: AlertRule) -> bool:
+    async def _evaluate_compound_rules(
+        self,
+        sensor: Sensor,
+        reading: SensorReading,
+        rollups: list[AlertIncident],
+        changes: StateChanges,
+    ) -> list[Alert]:
+        """Re-evaluate the zone's compound rules that read ``sensor``'s type.
+
+        Other inputs come from each zone sensor's ``last_value``; trends come
+        from per-(rule, sensor) accumulators in the alert state store.
+        """
+        rules = [
+            rule
+            for rule in await self.rule_repo.get_active_compound_rules(sensor.farm_id)
+            if rule.zone_id in (None, sensor.zone_id)
+            and sensor.sensor_type in compile_expression(rule.expression).sensor_types()
+        ]
+        if not rules:
+            return []
+
+        zone_sensors = await self.sensor_repo.get_farm_sensors(sensor.farm_id, sensor.zone_id)
+        latest = SensorRepository.latest_by_type(zone_sensors)
+        latest[sensor.sensor_type] = sensor
+        values = {sensor_type: float(s.last_value) for sensor_type, s in latest.items()}
+        values[sensor.sensor_type] = float(reading.value)
+        timestamp = reading.recorded_at.timestamp()
+
+        triggered = []
+        for rule in rules:
+            expression = compile_expression(rule.expression)
+            trend_types = expression.trend_types()
+            if sensor.sensor_type in trend_types:
+                await changes.update(
+                    rule.id,
+                    sensor.id,
+                    lambda state, rule=rule: observe_trend(
+                        rule, float(reading.value), timestamp, state
+                    ),
+                )
+            trends = {}
+            for sensor_type in trend_types:
+                source = latest.get(sensor_type)
+                trends[sensor_type] = (
+                    (await changes.get(rule.id, source.id)).slope() if source else None
+                )
+
+            result = expression.evaluate(values, trends)
+            # An unknown result (missing input) leaves the latch where it was.
+            if result is None:
+                continue
+            if not await changes.update(
+                rule.id, sensor.zone_id, lambda state, result=result: latch(result, state)
+            ):
+                continue
+            if await self._cooling_down(rule):
+                await changes.update(rule.id, sensor.zone_id, rearm)
+                continue
+            inputs = ", ".join(
+                f"{t}={values[t]:g}" for t in sorted(expression.sensor_types()) if t in values
+            )
+            slopes = ", ".join(f"{t} {trends[t]:+.4f}/h" for t in sorted(trends))
+            alert = await self._raise_alert(
+                rule,
+                sensor,
+                reading,
+                f"Compound alert: {rule.expression}"[:255],
+                f"Expression matched with {inputs}" + (f"; trends {slopes}" if slopes else ""),
+                rollups,
+            )
+            if alert is not None:
+                triggered.append(alert)
+        return triggered
+
+    async def _raise_alert(
+        self,
+        rule: AlertRule,
+        sensor: Sensor,
+        reading: SensorReading,
+        title: str,
+        message: str,
+        rollups: list[AlertIncident],
+    ) -> Alert | None:
+        """Apply incident correlation, then create the alert.
+
+        Callers check the rule's cooldown first, since a stateful rule has to
+        be re-armed when it suppresses the alert.
+        """
+        now = datetime.utcnow()
+        incident, materialize = await self.incidents.correlate(
+            sensor, rule.severity, now, rollups
+        )
+        if self.incidents.take_rollup(incident, now) and incident not in rollups:
+            rollups.append(incident)
+        if not materialize:
+            return None
+
+        alert = await self.alert_repo.create(
+            {
+                "alert_rule_id": rule.id,
+                "sensor_id": sensor.id,
+                "sensor_reading_id": reading.id,
+                "incident_id": incident.id,
+                "severity": rule.severity,
+                "title": title,
+                "message": message,
+                "triggered_value": reading.value,
+                "status": "active",
+            }
+        )
+        await self.escalations.start(alert, rule)
+        self.outbox.update_dashboard(sensor.farm_id, DashboardReadModel.alert_changed(None, "active"))
+        ResponseVersions.touch(self.db, sensor.farm_id, VersionedEntity.ALERTS)
+        self.outbox.publish(
+            sensor.farm_id,
+            "alert",
+            {
+                "alert_id": str(alert.id),
+                "sensor_id": str(sensor.id),
+                "sensor_type": sensor.sensor_type,
+                "triggered_value": float(reading.value),
+                "severity": alert.severity,
+                "title": title,
+                "message": message,
+                "incident_id": str(incident.id),
+            },
+        )
+        return alert
+
+    async def _cooling_down(self, rule: AlertRule) -> bool:
+        recent = await self.alert_repo.get_recent_alert_for_rule(rule.id, rule.cooldown_minutes)
+        return recent is not None
+
+    async def _alert_message(
+        self, rule: AlertRule, sensor: Sensor, reading: SensorReading, changes: StateChanges
+    ) -> str:
+        if rule.condition == AlertCondition.RATE_OF_CHANGE:
+            state = await changes.get(rule.id, sensor.id)
+            return f"Trend {state.slope():+.4f}/h violated threshold (rule: {rule.condition})"
+        if rule.condition == AlertCondition.ANOMALY:
+            return f"Value {reading.value} is anomalous (z-score {float(reading.anomaly_score):+.2f})"
+        return f"Value {reading.value} violated threshold (rule: {rule.condition})"
+
+    @staticmethod
+    def _is_anomalous(score: Decimal | None, rule: AlertRule) -> bool:
+        return score is not None and abs(float(score)) > float(rule.threshold_max)
+
+    @staticmethod
+    def _is_threshold_violated(value: Decimal, rule: AlertRule) -> bool:
         val = float(value)
         if rule.condition == "above" and rule.threshold_max is not None:
             return val > float(rule.threshold_max)
@@ -91,21 +329,30 @@ class AlertService:
 
     async def acknowledge_alert(self, alert_id: uuid.UUID, user: User) -> Alert:
         alert = await self.get_alert(alert_id)
+        await self._alert_changed(alert, "acknowledged")
         alert.status = "acknowledged"
         alert.acknowledged_by = user.id
         alert.acknowledged_at = datetime.now(timezone.utc)
+        await escalation_scheduler.cancel(alert_id)
         await self.db.flush()
-        await self.db.refresh(alert)
         return alert
 
     async def resolve_alert(self, alert_id: uuid.UUID) -> Alert:
         alert = await self.get_alert(alert_id)
+        await self._alert_changed(alert, "resolved")
         alert.status = "resolved"
         alert.resolved_at = datetime.now(timezone.utc)
+        await escalation_scheduler.cancel(alert_id)
         await self.db.flush()
-        await self.db.refresh(alert)
         return alert
 
+    async def _alert_changed(self, alert: Alert, new_status: str) -> None:
+        rule = await self.rule_repo.get_by_id(alert.alert_rule_id)
+        self.outbox.update_dashboard(
+            rule.farm_id, DashboardReadModel.alert_changed(alert.status, new_status)
+        )
+        ResponseVersions.touch(self.db, rule.farm_id, VersionedEntity.ALERTS)
+
     async def count_active(self, farm_id: uuid.UUID) -> int:
         return await self.alert_repo.count_active(farm_id)
 
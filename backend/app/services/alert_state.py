@@ -0,0 +1,308 @@
+"""Streaming per-(rule, sensor) state for stateful alert conditions.
+
+Compound rules key their firing latch by zone instead of sensor.
+
+A reading's updates are worked out on copies during evaluation and written
+to the store only after the alerts they raised are committed (``StateChanges``),
+so a failed evaluation or commit leaves the state as the retry needs it. Each
+state remembers the last reading applied to it and ignores any reading that
+isn't newer, which makes the write idempotent and keeps readings delivered
+out of order from moving a state backwards.
+"""
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass, replace
+from typing import Callable, TypeVar
+from uuid import UUID
+
+from redis.exceptions import WatchError
+
+from app.core import redis_client
+from app.core.constants import AlertCondition
+from app.models.alert import AlertRule
+
+logger = logging.getLogger(__name__)
+
+STATEFUL_CONDITIONS = {
+    AlertCondition.SUSTAINED.value,
+    AlertCondition.HYSTERESIS.value,
+    AlertCondition.RATE_OF_CHANGE.value,
+}
+
+MIN_TREND_SAMPLES = 5
+
+T = TypeVar("T")
+
+
+@dataclass
+class RuleState:
+    """Running counters for one rule evaluated against one sensor."""
+
+    violation_started_at: float | None = None
+    triggered: bool = False
+    # The last reading applied, as (recorded_at timestamp, reading id).
+    last_reading_at: float | None = None
+    last_reading_id: int | None = None
+    # Exponentially-decayed least-squares sums for rate_of_change. Time is in
+    # hours relative to ``last_ts`` so the sums stay small and well conditioned.
+    last_ts: float | None = None
+    samples: int = 0
+    s0: float = 0.0
+    st: float = 0.0
+    sv: float = 0.0
+    stt: float = 0.0
+    stv: float = 0.0
+
+    def add_sample(self, value: float, timestamp: float, window_seconds: float) -> None:
+        if self.last_ts is not None:
+            dt = (timestamp - self.last_ts) / 3600
+            # Re-centre the sums on the new sample, then age them.
+            self.stt = self.stt - 2 * dt * self.st + dt * dt * self.s0
+            self.st = self.st - dt * self.s0
+            self.stv = self.stv - dt * self.sv
+            decay = math.exp(-max(dt, 0.0) * 3600 / window_seconds)
+            self.s0 *= decay
+            self.st *= decay
+            self.sv *= decay
+            self.stt *= decay
+            self.stv *= decay
+        self.last_ts = timestamp
+        self.samples += 1
+        self.s0 += 1.0
+        self.sv += value
+
+    def seen(self, at: float, reading_id: int | None) -> bool:
+        """Whether a reading at or after this one was already applied."""
+        if self.last_reading_at is None:
+            return False
+        return (at, reading_id or 0) <= (self.last_reading_at, self.last_reading_id or 0)
+
+    def slope(self) -> float | None:
+        """Weighted least-squares slope in units per hour."""
+        denom = self.s0 * self.stt - self.st * self.st
+        if self.samples < MIN_TREND_SAMPLES or denom <= 1e-12:
+            return None
+        return (self.s0 * self.stv - self.st * self.sv) / denom
+
+
+def _outside_bounds(value: float, rule: AlertRule) -> bool:
+    if rule.threshold_max is not None and value > float(rule.threshold_max):
+        return True
+    if rule.threshold_min is not None and value < float(rule.threshold_min):
+        return True
+    return False
+
+
+def advance_state(rule: AlertRule, value: float, timestamp: float, state: RuleState) -> bool:
+    """Feed one reading into ``state`` and return True when the rule should fire.
+
+    ``sustained`` fires once the value has stayed outside its bounds for
+    ``duration_minutes``; ``hysteresis`` fires on crossing the trigger threshold
+    and re-arms only after the value crosses back past ``clear_threshold``.
+    ``rate_of_change`` fires when the trend slope over a ``duration_minutes``
+    window leaves the ``threshold_min``/``threshold_max`` band (units per hour).
+    All fire at most once per episode.
+    """
+    if rule.condition == AlertCondition.SUSTAINED:
+        if not _outside_bounds(value, rule):
+            state.violation_started_at = None
+            state.triggered = False
+            return False
+        if state.violation_started_at is None:
+            state.violation_started_at = timestamp
+        if state.triggered:
+            return False
+        if timestamp - state.violation_started_at >= (rule.duration_minutes or 0) * 60:
+            state.triggered = True
+            return True
+        return False
+
+    if rule.condition == AlertCondition.HYSTERESIS:
+        high_side = rule.threshold_max is not None
+        if state.triggered:
+            clear = float(rule.clear_threshold)
+            if (value <= clear) if high_side else (value >= clear):
+                state.triggered = False
+            return False
+        if _outside_bounds(value, rule):
+            state.triggered = True
+            return True
+        return False
+
+    if rule.condition == AlertCondition.RATE_OF_CHANGE:
+        state.add_sample(value, timestamp, (rule.duration_minutes or 60) * 60)
+        slope = state.slope()
+        if slope is None or not _outside_bounds(slope, rule):
+            state.triggered = False
+            return False
+        if state.triggered:
+            return False
+        state.triggered = True
+        return True
+
+    return False
+
+
+def observe_trend(
+    rule: AlertRule, value: float, timestamp: float, state: RuleState
+) -> float | None:
+    """Fold a reading into a compound rule's trend and return its slope."""
+    state.add_sample(value, timestamp, (rule.duration_minutes or 60) * 60)
+    return state.slope()
+
+
+def latch(active: bool, state: RuleState) -> bool:
+    """Return True on the first ``active`` observation of an episode.
+
+    The latch re-arms once ``active`` is False, so a condition that stays
+    true fires once rather than on every reading.
+    """
+    fired = active and not state.triggered
+    state.triggered = active
+    return fired
+
+
+def rearm(state: RuleState) -> None:
+    """Undo a firing that raised no alert, so the rule can fire again.
+
+    A rule that fires during its cooldown must not stay latched, or it
+    would stay silent for the rest of the episode.
+    """
+    state.triggered = False
+
+
+class AlertStateStore:
+    """Rule state kept in Redis, the one copy every worker reads and updates.
+
+    Each update is a compare-and-set: the state is read under WATCH and
+    written back in MULTI, and retried if another worker changed it in
+    between, so concurrent readings never advance stale copies. Without
+    Redis the state is kept in process, which is only correct for a single
+    worker.
+    """
+
+    KEY_PREFIX = "greenos:alert_state"
+    TTL_SECONDS = 7 * 86400
+
+    def __init__(self):
+        self._local: dict[tuple[UUID, UUID], RuleState] = {}
+
+    def _key(self, rule_id: UUID, subject_id: UUID) -> str:
+        return f"{self.KEY_PREFIX}:{rule_id}:{subject_id}"
+
+    async def get(self, rule_id: UUID, subject_id: UUID) -> RuleState:
+        client = redis_client.redis_client
+        if not client:
+            return replace(self._local.get((rule_id, subject_id)) or RuleState())
+        raw = await client.get(self._key(rule_id, subject_id))
+        return RuleState(**json.loads(raw)) if raw else RuleState()
+
+    async def _update(
+        self, rule_id: UUID, subject_id: UUID, mutate: Callable[[RuleState], T]
+    ) -> T:
+        """Apply ``mutate`` to the stored state atomically and return its result."""
+        client = redis_client.redis_client
+        if not client:
+            state = self._local.setdefault((rule_id, subject_id), RuleState())
+            return mutate(state)
+        key = self._key(rule_id, subject_id)
+        async with client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    state = RuleState(**json.loads(raw)) if raw else RuleState()
+                    before = replace(state)
+                    result = mutate(state)
+                    if state == before:
+                        await pipe.reset()
+                        return result
+                    pipe.multi()
+                    pipe.set(key, json.dumps(asdict(state)), ex=self.TTL_SECONDS)
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    async def apply(
+        self,
+        rule_id: UUID,
+        subject_id: UUID,
+        at: float,
+        reading_id: int | None,
+        updates: list[Callable[[RuleState], object]],
+    ) -> None:
+        """Replay one reading's ``updates`` on the stored state, unless it has seen it."""
+
+        def run(state: RuleState) -> None:
+            if state.seen(at, reading_id):
+                return
+            for update in updates:
+                update(state)
+            state.last_reading_at, state.last_reading_id = at, reading_id
+
+        await self._update(rule_id, subject_id, run)
+
+    async def discard(self, rule_id: UUID) -> None:
+        """Drop all state for a rule after its definition changes."""
+        for key in [k for k in self._local if k[0] == rule_id]:
+            del self._local[key]
+        client = redis_client.redis_client
+        if not client:
+            return
+        try:
+            keys = [k async for k in client.scan_iter(match=f"{self.KEY_PREFIX}:{rule_id}:*")]
+            if keys:
+                await client.delete(*keys)
+        except Exception as e:
+            logger.error(f"Failed to discard alert state: {e}")
+
+
+alert_state_store = AlertStateStore()
+
+
+class StateChanges:
+    """One reading's rule state updates, staged until its alerts are committed.
+
+    ``update`` applies a change to a working copy of the state so evaluation
+    sees it at once; ``apply`` writes the staged changes to the store. A
+    state that has already seen this reading or a newer one yields ``None``
+    and stays untouched.
+    """
+
+    def __init__(
+        self, at: float, reading_id: int | None, store: AlertStateStore = alert_state_store
+    ):
+        self.at = at
+        self.reading_id = reading_id
+        self.store = store
+        self._states: dict[tuple[UUID, UUID], RuleState | None] = {}
+        self._updates: dict[tuple[UUID, UUID], list[Callable[[RuleState], object]]] = {}
+
+    async def _load(self, rule_id: UUID, subject_id: UUID) -> RuleState | None:
+        key = (rule_id, subject_id)
+        if key not in self._states:
+            state = await self.store.get(rule_id, subject_id)
+            self._states[key] = None if state.seen(self.at, self.reading_id) else state
+        return self._states[key]
+
+    async def get(self, rule_id: UUID, subject_id: UUID) -> RuleState:
+        """The state as of this reading's changes so far."""
+        state = await self._load(rule_id, subject_id)
+        return state if state is not None else await self.store.get(rule_id, subject_id)
+
+    async def update(
+        self, rule_id: UUID, subject_id: UUID, mutate: Callable[[RuleState], T]
+    ) -> T | None:
+        """Apply ``mutate`` to the working copy and stage it for ``apply``."""
+        state = await self._load(rule_id, subject_id)
+        if state is None:
+            return None
+        self._updates.setdefault((rule_id, subject_id), []).append(mutate)
+        return mutate(state)
+
+    async def apply(self) -> None:
+        updates, self._updates = self._updates, {}
+        for (rule_id, subject_id), mutations in updates.items():
+            await self.store.apply(rule_id, subject_id, self.at, self.reading_id, mutations)
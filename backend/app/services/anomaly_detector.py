@@ -0,0 +1,57 @@
+"""Online per-sensor anomaly scoring.
+
+Each sensor keeps an EWMA level, a 24-bucket hour-of-day seasonal offset and
+an EWMA variance of the residual. Scoring a reading is O(1) and the state is
+a few dozen floats stored on the sensor row, so no job ever scans readings.
+"""
+import math
+from dataclasses import asdict, dataclass, field
+
+# Smoothing factors are per reading. The level must adapt over days, not
+# hours, or it absorbs the daily cycle the seasonal buckets should learn.
+LEVEL_ALPHA = 0.002
+SEASONAL_ALPHA = 0.1
+VARIANCE_ALPHA = 0.05
+WARMUP_SAMPLES = 30
+
+
+@dataclass
+class AnomalyState:
+    count: int = 0
+    level: float = 0.0
+    variance: float = 0.0
+    seasonal: list[float] = field(default_factory=lambda: [0.0] * 24)
+    last_score: float | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "AnomalyState":
+        return cls(**data) if data else cls()
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def update(self, value: float, hour: int) -> float | None:
+        """Score ``value`` against the current baseline, then fold it in.
+
+        Returns the z-score of the residual from ``level + seasonal[hour]``,
+        or None while the baseline is still warming up.
+        """
+        if self.count == 0:
+            self.level = value
+            self.count = 1
+            self.last_score = None
+            return None
+
+        residual = value - (self.level + self.seasonal[hour])
+        score = None
+        if self.count >= WARMUP_SAMPLES:
+            # Floor the deviation so a flat-lining sensor doesn't turn noise into huge scores.
+            std = max(math.sqrt(self.variance), 1e-3 * max(abs(self.level), 1.0))
+            score = residual / std
+
+        self.variance += VARIANCE_ALPHA * (residual * residual - self.variance)
+        self.level += LEVEL_ALPHA * (value - self.seasonal[hour] - self.level)
+        self.seasonal[hour] += SEASONAL_ALPHA * (value - self.level - self.seasonal[hour])
+        self.count += 1
+        self.last_score = score
+        return score
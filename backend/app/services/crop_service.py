@@ -3,7 +3,9 @@ from datetime import timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.response_versions import ResponseVersions
 from app.models.crop import CropCycle, CropProfile, GrowthLog
 from app.models.user import User
 from app.repositories.crop_repo import (
@@ -11,6 +13,8 @@ from app.repositories.crop_repo import (
     CropProfileRepository,
     GrowthLogRepository,
 )
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
 
 
 class CropService:
@@ -19,6 +23,7 @@ class CropService:
         self.profile_repo = CropProfileRepository(db)
         self.cycle_repo = CropCycleRepository(db)
         self.log_repo = GrowthLogRepository(db)
+        self.outbox = OutboxService(db)
 
     # Profiles
     async def list_profiles(self, skip: int = 0, limit: int = 100) -> list[CropProfile]:
@@ -59,7 +64,10 @@ class CropService:
         data["expected_harvest_at"] = data["seeded_at"] + timedelta(days=profile.days_to_harvest)
         data["status"] = "seeded"
 
-        return await self.cycle_repo.create(data)
+        cycle = await self.cycle_repo.create(data)
+        self.outbox.update_dashboard(farm_id, DashboardReadModel.crop_changed(None, cycle.status))
+        ResponseVersions.touch(self.db, farm_id, VersionedEntity.CROPS)
+        return cycle
 
     async def get_cycle(self, cycle_id: uuid.UUID) -> CropCycle:
         cycle = await self.cycle_repo.get_with_profile(cycle_id)
@@ -73,9 +81,18 @@ class CropService:
         return await self.cycle_repo.get_active_cycles(farm_id)
 
     async def update_cycle(self, cycle_id: uuid.UUID, data: dict) -> CropCycle:
+        old_status = None
+        if "status" in data:
+            current = await self.cycle_repo.get_by_id(cycle_id)
+            old_status = current.status if current else None
         cycle = await self.cycle_repo.update(cycle_id, data)
         if not cycle:
             raise NotFoundException(detail="Crop cycle not found")
+        if "status" in data:
+            self.outbox.update_dashboard(
+                cycle.farm_id, DashboardReadModel.crop_changed(old_status, cycle.status)
+            )
+        ResponseVersions.touch(self.db, cycle.farm_id, VersionedEntity.CROPS)
         return cycle
 
     async def log_germination(self, cycle_id: uuid.UUID, germination_count: int) -> CropCycle:
@@ -85,9 +102,12 @@ class CropService:
             cycle.germination_rate = round(
                 (germination_count / cycle.quantity_planted) * 100, 2
             )
+        self.outbox.update_dashboard(
+            cycle.farm_id, DashboardReadModel.crop_changed(cycle.status, "germinating")
+        )
         cycle.status = "germinating"
         await self.db.flush()
-        await self.db.refresh(cycle)
+        ResponseVersions.touch(self.db, cycle.farm_id, VersionedEntity.CROPS)
         return cycle
 
     async def add_growth_log(
@@ -0,0 +1,377 @@
+"""Per-farm dashboard read model kept in Redis.
+
+The dashboard endpoint reads one Redis hash per farm instead of querying the
+database. Domain services describe how each change moves the dashboard as a
+list of ops (``incr``/``set``/``del`` on a hash field) and queue them through
+the outbox, so an op is applied only if its transaction commits. Sensor
+readings skip the extra outbox row and are applied when their stream event
+is relayed.
+
+The relay delivers at least once, so each farm also has a set of the outbox
+events already applied, written in the same transaction as their ops; a
+redelivered event is skipped. A rebuild seeds the set with the events still
+waiting to be relayed, since the database it was built from has them; both
+are read in one snapshot.
+
+Time-windowed numbers are kept in buckets and summed when the document is
+read: open tasks per due date (overdue), orders per day, and dosing events
+per hour (so "last 24 hours" is accurate to the hour). Buckets that have
+fallen out of their window are cleared by the nightly reconciliation, which
+rebuilds every hash from the database to correct any drift.
+"""
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from redis.exceptions import WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import redis_client
+from app.core.config import settings
+from app.core.constants import (
+    DashboardQueryMode,
+    OutboxDestination,
+    TaskStatus,
+    VersionedEntity,
+)
+from app.core.database import begin_snapshot, sessionmaker_for
+from app.core.response_versions import ResponseVersions
+from app.repositories.outbox_repo import OutboxRepository
+from app.services.dashboard_service import (
+    ACTIVE_CROP_STATUSES,
+    ENVIRONMENT_TYPES,
+    DashboardService,
+)
+
+logger = logging.getLogger(__name__)
+
+Op = list  # [op, field, value]
+
+OPEN_TASK_STATUSES = {TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value}
+ACTIVE_CROP_VALUES = {s.value for s in ACTIVE_CROP_STATUSES}
+# Destinations whose events carry dashboard ops (readings go to REDIS).
+DASHBOARD_DESTINATIONS = [OutboxDestination.DASHBOARD.value, OutboxDestination.REDIS.value]
+
+
+def _stamp(at: datetime) -> str:
+    return at.isoformat(timespec="microseconds")
+
+
+def _deltas(old: dict[str, int], new: dict[str, int]) -> list[Op]:
+    change = Counter(new)
+    change.subtract(old)
+    return [["incr", field, n] for field, n in change.items() if n]
+
+
+class DashboardReadModel:
+    KEY_PREFIX = "greenos:dashboard"
+
+    @staticmethod
+    def key(farm_id: UUID | str) -> str:
+        return f"{DashboardReadModel.KEY_PREFIX}:{farm_id}"
+
+    @staticmethod
+    def applied_key(farm_id: UUID | str) -> str:
+        return f"{DashboardReadModel.KEY_PREFIX}:{farm_id}:applied"
+
+    # Ops describing domain changes. ``None`` stands for "didn't exist".
+    @staticmethod
+    def alert_changed(old_status: str | None, new_status: str | None) -> list[Op]:
+        return _deltas(
+            {"active_alerts": 1} if old_status == "active" else {},
+            {"active_alerts": 1} if new_status == "active" else {},
+        )
+
+    @staticmethod
+    def crop_changed(old_status: str | None, new_status: str | None) -> list[Op]:
+        return _deltas(
+            {"active_crops": 1} if old_status in ACTIVE_CROP_VALUES else {},
+            {"active_crops": 1} if new_status in ACTIVE_CROP_VALUES else {},
+        )
+
+    @staticmethod
+    def task_changed(
+        old: tuple[str, date | None] | None, new: tuple[str, date | None] | None
+    ) -> list[Op]:
+        """``old``/``new`` are the task's ``(status, due_date)``."""
+
+        def counts(task: tuple[str, date | None] | None) -> dict[str, int]:
+            if task is None:
+                return {}
+            status, due_date = task
+            counts = {}
+            if status == TaskStatus.PENDING.value:
+                counts["pending_tasks"] = 1
+            if status in OPEN_TASK_STATUSES and due_date is not None:
+                counts[f"open_due:{due_date.isoformat()}"] = 1
+            return counts
+
+        return _deltas(counts(old), counts(new))
+
+    @staticmethod
+    def order_created(created_at: datetime) -> list[Op]:
+        return [["incr", f"orders:{created_at.date().isoformat()}", 1]]
+
+    @staticmethod
+    def dosing_recorded(at: datetime) -> list[Op]:
+        return [["incr", f"dosing:{at.strftime('%Y-%m-%dT%H')}", 1]]
+
+    @staticmethod
+    def harvest_recorded(harvest_id: UUID, weight_kg, grade: str, harvest_date: date) -> list[Op]:
+        harvest = {
+            "id": str(harvest_id),
+            "weight_kg": float(weight_kg),
+            "grade": grade,
+            "harvested_at": harvest_date.isoformat(),
+        }
+        return [["set", f"harvest:{harvest_id}", json.dumps(harvest)]]
+
+    @staticmethod
+    def sensor_changed(
+        sensor_id: UUID, sensor_type: str, value, at: datetime | str | None, active: bool = True
+    ) -> list[Op]:
+        if not active:
+            return [["del", f"sensor:{sensor_id}", None]]
+        sensor = {
+            "type": sensor_type,
+            "value": float(value) if value is not None else None,
+            "at": at.isoformat() if isinstance(at, datetime) else at,
+        }
+        return [["set", f"sensor:{sensor_id}", json.dumps(sensor)]]
+
+    # Redis
+    @staticmethod
+    async def apply(farm_id: UUID | str, ops: list[Op], event_id: UUID | str) -> bool:
+        """Apply ops from outbox event ``event_id``; returns whether they were applied.
+
+        Nothing is written if the farm has no document yet (the next read
+        builds it), or if the event was already applied or is included in
+        the rebuilt document. Raises on failure so the outbox relay retries.
+
+        The dashboard's response version is bumped here rather than at commit,
+        so its ETag changes only once the document reflects the change.
+        """
+        client = redis_client.redis_client
+        if not client:
+            raise RuntimeError("Redis not initialized")
+        key = DashboardReadModel.key(farm_id)
+        applied_key = DashboardReadModel.applied_key(farm_id)
+        async with client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key, applied_key)
+                    if not await pipe.hexists(key, "built_at") or await pipe.sismember(
+                        applied_key, str(event_id)
+                    ):
+                        await pipe.reset()
+                        applied = False
+                        break
+                    pipe.multi()
+                    for op, field, value in ops:
+                        if op == "incr":
+                            pipe.hincrby(key, field, value)
+                        elif op == "set":
+                            pipe.hset(key, field, value)
+                        else:
+                            pipe.hdel(key, field)
+                    pipe.sadd(applied_key, str(event_id))
+                    # May outlive the document; the next rebuild replaces it.
+                    pipe.expire(applied_key, settings.DASHBOARD_READ_MODEL_TTL_HOURS * 3600)
+                    await pipe.execute()
+                    applied = True
+                    break
+                except WatchError:
+                    continue
+        # Bumped even when skipped: without a document the next read is
+        # computed from the database, which already has the change.
+        await DashboardReadModel._bump_version(farm_id)
+        return applied
+
+    @staticmethod
+    async def _bump_version(farm_id: UUID | str) -> None:
+        await ResponseVersions.bump([(str(farm_id), VersionedEntity.DASHBOARD.value)])
+
+    @staticmethod
+    async def get(farm_id: UUID, now: datetime | None = None) -> dict | None:
+        """The farm's dashboard from Redis, or ``None`` if it isn't built."""
+        client = redis_client.redis_client
+        if not client:
+            return None
+        try:
+            fields = await client.hgetall(DashboardReadModel.key(farm_id))
+        except Exception as e:
+            logger.error(f"Failed to read dashboard for farm {farm_id}: {e}")
+            return None
+        if not fields:
+            return None
+        return DashboardReadModel.render(fields, now or datetime.utcnow())
+
+    @staticmethod
+    async def get_many(
+        farm_ids: list[UUID], now: datetime | None = None
+    ) -> dict[UUID, dict | None]:
+        """Like ``get`` for several farms, in one round trip."""
+        client = redis_client.redis_client
+        if not client or not farm_ids:
+            return dict.fromkeys(farm_ids)
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for farm_id in farm_ids:
+                    pipe.hgetall(DashboardReadModel.key(farm_id))
+                documents = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to read dashboards: {e}")
+            return dict.fromkeys(farm_ids)
+        now = now or datetime.utcnow()
+        return {
+            farm_id: DashboardReadModel.render(fields, now) if fields else None
+            for farm_id, fields in zip(farm_ids, documents)
+        }
+
+    @staticmethod
+    async def get_portfolio(
+        db: AsyncSession, farm_ids: list[UUID]
+    ) -> dict[UUID, tuple[dict, bool]]:
+        """Each farm's dashboard and whether it came from Redis.
+
+        Farms without a document are computed together with grouped queries
+        rather than rebuilt one by one.
+        """
+        cached = await DashboardReadModel.get_many(farm_ids)
+        missing = [farm_id for farm_id, dashboard in cached.items() if dashboard is None]
+        computed = {}
+        if missing:
+            # In concurrent mode its extra sessions go where ``db`` reads from.
+            service = DashboardService(db, session_factory=sessionmaker_for(db))
+            computed = await service.get_portfolio(missing)
+        return {
+            farm_id: (cached[farm_id], True) if cached[farm_id] is not None
+            else (computed[farm_id], False)
+            for farm_id in farm_ids
+        }
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, farm_id: UUID, now: datetime | None = None) -> dict:
+        """Recompute the farm's document from the database and replace it.
+
+        ``db`` must not have begun its transaction: the pending events and the
+        state are read in one snapshot, so an event committed in between is
+        in neither and is applied on top of the rebuilt document.
+        """
+        now = now or datetime.utcnow()
+        await begin_snapshot(db)
+        pending = await OutboxRepository(db).get_pending_ids(farm_id, DASHBOARD_DESTINATIONS)
+        fields = {"built_at": _stamp(now)}
+        # Sequential: the other modes read on sessions outside the snapshot.
+        state = await DashboardService(
+            db, mode=DashboardQueryMode.SEQUENTIAL
+        ).get_read_model_state(farm_id, now)
+        for name in ("active_alerts", "active_crops", "pending_tasks"):
+            fields[name] = state[name]
+        for due_date, count in state["open_tasks_by_due_date"].items():
+            fields[f"open_due:{due_date.isoformat()}"] = count
+        fields[f"orders:{now.date().isoformat()}"] = state["today_orders"]
+        for at in state["dosing_times"]:
+            [[_, field, _]] = DashboardReadModel.dosing_recorded(at)
+            fields[field] = fields.get(field, 0) + 1
+        for h in state["recent_harvests"]:
+            [[_, field, value]] = DashboardReadModel.harvest_recorded(
+                h["id"], h["weight_kg"], h["grade"], h["harvest_date"]
+            )
+            fields[field] = value
+        for s in state["sensors"]:
+            [[_, field, value]] = DashboardReadModel.sensor_changed(
+                s["id"], s["sensor_type"], s["last_value"], s["last_reading_at"]
+            )
+            fields[field] = value
+
+        client = redis_client.redis_client
+        if client:
+            key = DashboardReadModel.key(farm_id)
+            applied_key = DashboardReadModel.applied_key(farm_id)
+            ttl = settings.DASHBOARD_READ_MODEL_TTL_HOURS * 3600
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(key, applied_key)
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, ttl)
+                if pending:
+                    pipe.sadd(applied_key, *(str(event_id) for event_id in pending))
+                    pipe.expire(applied_key, ttl)
+                await pipe.execute()
+            await DashboardReadModel._bump_version(farm_id)
+        return DashboardReadModel.render({k: str(v) for k, v in fields.items()}, now)
+
+    @staticmethod
+    def render(fields: dict[str, str], now: datetime) -> dict:
+        """Assemble the dashboard response from the hash fields."""
+        today = now.date().isoformat()
+        dosing_since = (now - timedelta(hours=24)).strftime("%Y-%m-%dT%H")
+        harvests_since = (now - timedelta(days=7)).date().isoformat()
+
+        overdue = orders = dosing = 0
+        sensors, harvests = [], []
+        for field, value in fields.items():
+            kind, _, suffix = field.partition(":")
+            if kind == "open_due" and suffix < today:
+                overdue += int(value)
+            elif kind == "orders" and suffix == today:
+                orders += int(value)
+            elif kind == "dosing" and suffix >= dosing_since:
+                dosing += int(value)
+            elif kind == "sensor":
+                sensors.append(json.loads(value))
+            elif kind == "harvest":
+                harvest = json.loads(value)
+                if harvest["harvested_at"] >= harvests_since:
+                    harvests.append(harvest)
+
+        by_type: dict[str, list[dict]] = {}
+        for sensor in sensors:
+            by_type.setdefault(sensor["type"], []).append(sensor)
+        summary = []
+        for sensor_type, group in sorted(by_type.items()):
+            values = [s["value"] for s in group if s["value"] is not None]
+            summary.append(
+                {
+                    "sensor_type": sensor_type,
+                    "count": len(group),
+                    "avg_value": round(sum(values) / len(values), 2) if values else None,
+                    "min_value": round(min(values), 2) if values else None,
+                    "max_value": round(max(values), 2) if values else None,
+                }
+            )
+        environment = {}
+        for sensor_type in ENVIRONMENT_TYPES:
+            group = by_type.get(sensor_type.value, [])
+            # Newest reading wins; sensors that never reported sort last.
+            newest = max(group, key=lambda s: (s["at"] is not None, s["at"] or ""), default=None)
+            value = newest["value"] if newest else None
+            environment[sensor_type.value] = round(value, 2) if value is not None else None
+
+        harvests.sort(key=lambda h: h["harvested_at"], reverse=True)
+        return {
+            "sensor_summary": summary,
+            "alerts": {
+                "active_count": int(fields.get("active_alerts", 0)),
+            },
+            "crops": {
+                "active_count": int(fields.get("active_crops", 0)),
+            },
+            "tasks": {
+                "pending_count": int(fields.get("pending_tasks", 0)),
+                "overdue_count": overdue,
+            },
+            "harvests": {
+                "recent": harvests[:5],
+            },
+            "orders": {
+                "today_count": orders,
+            },
+            "dosing": {
+                "events_24h": dosing,
+            },
+            "environment": environment,
+            "generated_at": now.isoformat(),
+        }
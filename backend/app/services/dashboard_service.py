@@ -1,223 +1,428 @@
-"""Dashboard aggregation service."""
-from datetime import datetime, timedelta
+"""Dashboard aggregation service.
+
+Each metric is a standalone SELECT plus a function that shapes its rows, so
+the same queries can be run three ways (``DASHBOARD_QUERY_MODE``):
+
+* ``sequential`` - one after another on the request's session.
+* ``concurrent`` - each on its own pooled session, awaited together. Costs
+  one round trip of latency but up to nine connections per request.
+* ``single`` - folded into one PostgreSQL statement (CTEs, scalar subqueries
+  and a ``DISTINCT ON`` environment snapshot): one round trip, one
+  connection. Other dialects fall back to ``sequential``.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
 from uuid import UUID
 
-from sqlalchemy import select, func, and_
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import JSON, Select, and_, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
 from app.core.constants import (
-    AlertStatus, CropCycleStatus, TaskStatus, SensorType
+    AlertStatus, CropCycleStatus, DashboardQueryMode, TaskStatus, SensorType
 )
-from app.models.sensor import Sensor, SensorReading
+from app.core.database import AsyncSessionLocal
+from app.models.sensor import Sensor
 from app.models.alert import Alert
-from app.models.crop import CropCycle, CropProfile
+from app.models.crop import CropCycle
 from app.models.harvest import Harvest
 from app.models.task import Task
 from app.models.order import Order
-from app.models.dosing import DosingEvent
+from app.models.dosing import DosingEvent, DosingPump
+
+ENVIRONMENT_TYPES = [
+    SensorType.TEMPERATURE,
+    SensorType.HUMIDITY,
+    SensorType.PH,
+    SensorType.EC,
+    SensorType.CO2,
+    SensorType.VPD,
+]
+
+ACTIVE_CROP_STATUSES = [
+    CropCycleStatus.SEEDED,
+    CropCycleStatus.GERMINATING,
+    CropCycleStatus.GROWING,
+    CropCycleStatus.FLOWERING,
+    CropCycleStatus.READY_TO_HARVEST,
+]
+
+# (statement, shape) - shape turns the statement's rows, as mappings, into
+# the dashboard value.
+Metric = tuple[Select, Callable[[list], Any]]
+
+
+def _round(value) -> float | None:
+    return round(float(value), 2) if value is not None else None
+
+
+def _iso(value) -> str:
+    # Dates arrive as date objects from a plain SELECT and as ISO strings
+    # from the JSON aggregates of the single-statement mode.
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _rows(rows: list) -> list[dict]:
+    return [dict(row) for row in rows]
+
+
+def _count(rows: list) -> int:
+    return rows[0]["count"] if rows else 0
+
+
+def _sensor_summary(rows: list) -> list[dict]:
+    return [
+        {
+            "sensor_type": row["sensor_type"],
+            "count": row["count"],
+            "avg_value": _round(row["avg_value"]),
+            "min_value": _round(row["min_value"]),
+            "max_value": _round(row["max_value"]),
+        }
+        for row in rows
+    ]
+
+
+def _recent_harvests(rows: list) -> list[dict]:
+    return [
+        {
+            "id": str(row["id"]),
+            "weight_kg": float(row["weight_kg"]),
+            "grade": row["grade"],
+            "harvested_at": _iso(row["harvest_date"]),
+        }
+        for row in rows
+    ]
+
+
+def _environment(rows: list) -> dict:
+    # Rows come newest-first within each type; keep the first per type.
+    latest = {}
+    for row in rows:
+        latest.setdefault(row["sensor_type"], row["last_value"])
+    return {t.value: _round(latest.get(t.value)) for t in ENVIRONMENT_TYPES}
 
 
 class DashboardService:
-    def __init__(self, db: AsyncSession):
+    # Metrics returning rows, aggregated to a JSON array (kept in this order)
+    # in the single statement; the rest are per-farm counts.
+    LIST_METRICS = {
+        "sensor_summary": None,
+        "recent_harvests": "harvest_date",
+        "environment": None,
+    }
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        mode: DashboardQueryMode | None = None,
+    ):
         self.db = db
+        self.session_factory = session_factory
+        self.mode = DashboardQueryMode(mode or settings.DASHBOARD_QUERY_MODE)
 
     async def get_dashboard(self, farm_id: UUID) -> dict:
         """Aggregate dashboard data for a farm."""
         now = datetime.utcnow()
+        metrics = self._metrics([farm_id], now)
+
+        if self.mode == DashboardQueryMode.SINGLE and self.db.bind.dialect.name == "postgresql":
+            rows = await self._gather_single(metrics)
+        else:
+            rows = await self._gather(metrics)
+        return self._assemble(self._shape(metrics, rows), now)
+
+    async def get_portfolio(self, farm_ids: list[UUID]) -> dict[UUID, dict]:
+        """Dashboards for many farms, from one query per metric grouped by farm."""
+        now = datetime.utcnow()
+        metrics = self._metrics(farm_ids, now)
+        rows = await self._gather(metrics)
+
+        by_farm: dict[UUID, dict[str, list]] = {farm_id: {} for farm_id in farm_ids}
+        for name, metric_rows in rows.items():
+            for row in metric_rows:
+                by_farm[row["farm_id"]].setdefault(name, []).append(row)
+        return {
+            farm_id: self._assemble(self._shape(metrics, farm_rows), now)
+            for farm_id, farm_rows in by_farm.items()
+        }
+
+    async def get_read_model_state(self, farm_id: UUID, now: datetime) -> dict:
+        """Unaggregated inputs for the Redis read model (``DashboardReadModel``)."""
+        farm_ids = [farm_id]
+        metrics = {
+            "active_alerts": (self._active_alerts_query(farm_ids), _count),
+            "active_crops": (self._active_crops_query(farm_ids), _count),
+            "pending_tasks": (self._tasks_query(farm_ids, TaskStatus.PENDING), _count),
+            "open_tasks_by_due_date": (
+                self._open_tasks_by_due_date_query(farm_ids),
+                lambda rows: {row["due_date"]: row["count"] for row in rows},
+            ),
+            "today_orders": (
+                self._today_orders_query(
+                    farm_ids, now.replace(hour=0, minute=0, second=0, microsecond=0)
+                ),
+                _count,
+            ),
+            "dosing_times": (
+                self._dosing_times_query(farm_ids, now - timedelta(hours=24)),
+                lambda rows: [row["created_at"] for row in rows],
+            ),
+            "recent_harvests": (
+                self._recent_harvests_query(farm_ids, (now - timedelta(days=7)).date()), _rows
+            ),
+            "sensors": (self._active_sensors_query(farm_ids), _rows),
+        }
+        return self._shape(metrics, await self._gather(metrics))
+
+    def _metrics(self, farm_ids: list[UUID], now: datetime) -> dict[str, Metric]:
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
-
-        (
-            sensor_summary,
-            active_alerts,
-            active_crops,
-            pending_tasks,
-            overdue_tasks,
-            recent_harvests,
-            today_orders,
-            dosing_events_24h,
-            environment_snapshot,
-        ) = await self._gather_all(farm_id, now, today_start, week_ago)
+        return {
+            "sensor_summary": (self._sensor_summary_query(farm_ids), _sensor_summary),
+            "active_alerts": (self._active_alerts_query(farm_ids), _count),
+            "active_crops": (self._active_crops_query(farm_ids), _count),
+            "pending_tasks": (self._tasks_query(farm_ids, TaskStatus.PENDING), _count),
+            "overdue_tasks": (self._overdue_tasks_query(farm_ids, now.date()), _count),
+            "recent_harvests": (
+                self._recent_harvests_query(farm_ids, (now - timedelta(days=7)).date()),
+                _recent_harvests,
+            ),
+            "today_orders": (self._today_orders_query(farm_ids, today_start), _count),
+            "dosing_events_24h": (
+                self._dosing_events_query(farm_ids, now - timedelta(hours=24)), _count
+            ),
+            "environment": (self._environment_query(farm_ids), _environment),
+        }
+
+    @staticmethod
+    def _shape(metrics: dict[str, Metric], rows: dict[str, list]) -> dict:
+        return {name: shape(rows.get(name, [])) for name, (_, shape) in metrics.items()}
 
+    @staticmethod
+    def _assemble(values: dict, now: datetime) -> dict:
         return {
-            "sensor_summary": sensor_summary,
+            "sensor_summary": values["sensor_summary"],
             "alerts": {
-                "active_count": active_alerts,
+                "active_count": values["active_alerts"],
             },
             "crops": {
-                "active_count": active_crops,
+                "active_count": values["active_crops"],
             },
             "tasks": {
-                "pending_count": pending_tasks,
-                "overdue_count": overdue_tasks,
+                "pending_count": values["pending_tasks"],
+                "overdue_count": values["overdue_tasks"],
             },
             "harvests": {
-                "recent": recent_harvests,
+                "recent": values["recent_harvests"],
             },
             "orders": {
-                "today_count": today_orders,
+                "today_count": values["today_orders"],
             },
             "dosing": {
-                "events_24h": dosing_events_24h,
+                "events_24h": values["dosing_events_24h"],
             },
-            "environment": environment_snapshot,
+            "environment": values["environment"],
             "generated_at": now.isoformat(),
         }
 
-    async def _gather_all(self, farm_id, now, today_start, week_ago):
-        """Gather all dashboard metrics."""
-        sensor_summary = await self._get_sensor_summary(farm_id)
-        active_alerts = await self._count_active_alerts(farm_id)
-        active_crops = await self._count_active_crops(farm_id)
-        pending_tasks = await self._count_tasks(farm_id, TaskStatus.PENDING)
-        overdue_tasks = await self._count_overdue_tasks(farm_id, now)
-        recent_harvests = await self._get_recent_harvests(farm_id, week_ago)
-        today_orders = await self._count_today_orders(farm_id, today_start)
-        dosing_24h = await self._count_dosing_events(farm_id, now - timedelta(hours=24))
-        env_snapshot = await self._get_environment_snapshot(farm_id)
+    # Execution strategies; each returns every metric's rows as mappings.
+    async def _gather(self, metrics: dict[str, Metric]) -> dict[str, list]:
+        if self.mode == DashboardQueryMode.CONCURRENT:
+            return await self._gather_concurrent(metrics)
+        return await self._gather_sequential(metrics)
 
-        return (
-            sensor_summary,
-            active_alerts,
-            active_crops,
-            pending_tasks,
-            overdue_tasks,
-            recent_harvests,
-            today_orders,
-            dosing_24h,
-            env_snapshot,
+    async def _gather_sequential(self, metrics: dict[str, Metric]) -> dict[str, list]:
+        rows = {}
+        for name, (statement, _) in metrics.items():
+            rows[name] = (await self.db.execute(statement)).mappings().all()
+        return rows
+
+    async def _gather_concurrent(self, metrics: dict[str, Metric]) -> dict[str, list]:
+        async def run(statement: Select) -> list:
+            async with self.session_factory() as session:
+                return (await session.execute(statement)).mappings().all()
+
+        rows = await asyncio.gather(*(run(statement) for statement, _ in metrics.values()))
+        return dict(zip(metrics, rows))
+
+    async def _gather_single(self, metrics: dict[str, Metric]) -> dict[str, list]:
+        result = await self.db.execute(self._single_statement(metrics))
+        row = result.mappings().one()
+        return {
+            name: (row[name] or []) if name in self.LIST_METRICS
+            else [{"count": row[name] or 0}]
+            for name in metrics
+        }
+
+    def _single_statement(self, metrics: dict[str, Metric]) -> Select:
+        """Fold every metric into one SELECT.
+
+        Counts become scalar subqueries; row-returning metrics become CTEs
+        aggregated with ``json_agg`` so the whole dashboard is one row. The
+        environment CTE uses ``DISTINCT ON`` to keep only the newest sensor
+        per type server-side.
+        """
+        statements = {name: statement for name, (statement, _) in metrics.items()}
+        statements["environment"] = statements["environment"].distinct(
+            Sensor.farm_id, Sensor.sensor_type
         )
 
-    async def _get_sensor_summary(self, farm_id: UUID) -> list[dict]:
-        result = await self.db.execute(
+        columns = []
+        for name, statement in statements.items():
+            if name not in self.LIST_METRICS:
+                columns.append(
+                    select(statement.subquery().c["count"]).scalar_subquery().label(name)
+                )
+                continue
+            cte = statement.cte(name)
+            fields = []
+            for column in cte.c:
+                # Literal keys: PostgreSQL can't infer bind types for
+                # json_build_object's variadic "any" arguments.
+                fields.extend([literal_column(f"'{column.key}'"), column])
+            row = func.json_build_object(*fields)
+            order_by = self.LIST_METRICS[name]
+            if order_by:
+                row = aggregate_order_by(row, cte.c[order_by].desc())
+            columns.append(
+                select(func.json_agg(row, type_=JSON))
+                .select_from(cte)
+                .scalar_subquery()
+                .label(name)
+            )
+        return select(*columns)
+
+    # Queries. Each covers every farm in ``farm_ids`` and returns a
+    # ``farm_id`` column so the rows can be split per farm.
+    @staticmethod
+    def _count_by_farm(farm_id_column, *criteria, joins: tuple = ()) -> Select:
+        statement = select(farm_id_column.label("farm_id"), func.count().label("count"))
+        for target, onclause in joins:
+            statement = statement.join(target, onclause)
+        return statement.where(and_(*criteria)).group_by(farm_id_column)
+
+    def _sensor_summary_query(self, farm_ids: list[UUID]) -> Select:
+        return (
             select(
+                Sensor.farm_id,
                 Sensor.sensor_type,
                 func.count().label("count"),
                 func.avg(Sensor.last_value).label("avg_value"),
                 func.min(Sensor.last_value).label("min_value"),
                 func.max(Sensor.last_value).label("max_value"),
             )
-            .where(and_(Sensor.farm_id == farm_id, Sensor.is_active.is_(True)))
-            .group_by(Sensor.sensor_type)
+            .where(and_(Sensor.farm_id.in_(farm_ids), Sensor.is_active.is_(True)))
+            .group_by(Sensor.farm_id, Sensor.sensor_type)
         )
-        return [
-            {
-                "sensor_type": row.sensor_type,
-                "count": row.count,
-                "avg_value": round(float(row.avg_value), 2) if row.avg_value else None,
-                "min_value": round(float(row.min_value), 2) if row.min_value else None,
-                "max_value": round(float(row.max_value), 2) if row.max_value else None,
-            }
-            for row in result.all()
-        ]
-
-    async def _count_active_alerts(self, farm_id: UUID) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(Alert)
-            .where(and_(Alert.farm_id == farm_id, Alert.status == AlertStatus.ACTIVE))
+
+    def _active_alerts_query(self, farm_ids: list[UUID]) -> Select:
+        return self._count_by_farm(
+            Sensor.farm_id,
+            Sensor.farm_id.in_(farm_ids),
+            Alert.status == AlertStatus.ACTIVE,
+            joins=((Alert, Alert.sensor_id == Sensor.id),),
         )
-        return result.scalar()
 
-    async def _count_active_crops(self, farm_id: UUID) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(CropCycle)
-            .where(
-                and_(
-                    CropCycle.farm_id == farm_id,
-                    CropCycle.status.in_([
-                        CropCycleStatus.SEEDED,
-                        CropCycleStatus.GERMINATING,
-                        CropCycleStatus.VEGETATIVE,
-                        CropCycleStatus.FLOWERING,
-                    ]),
-                )
-            )
+    def _active_crops_query(self, farm_ids: list[UUID]) -> Select:
+        return self._count_by_farm(
+            CropCycle.farm_id,
+            CropCycle.farm_id.in_(farm_ids),
+            CropCycle.status.in_(ACTIVE_CROP_STATUSES),
         )
-        return result.scalar()
 
-    async def _count_tasks(self, farm_id: UUID, status: TaskStatus) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(Task)
-            .where(and_(Task.farm_id == farm_id, Task.status == status))
+    def _tasks_query(self, farm_ids: list[UUID], status: TaskStatus) -> Select:
+        return self._count_by_farm(Task.farm_id, Task.farm_id.in_(farm_ids), Task.status == status)
+
+    def _overdue_tasks_query(self, farm_ids: list[UUID], today: date) -> Select:
+        return self._count_by_farm(
+            Task.farm_id,
+            Task.farm_id.in_(farm_ids),
+            Task.due_date < today,
+            Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
         )
-        return result.scalar()
 
-    async def _count_overdue_tasks(self, farm_id: UUID, now: datetime) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(Task)
+    def _open_tasks_by_due_date_query(self, farm_ids: list[UUID]) -> Select:
+        return (
+            select(Task.farm_id, Task.due_date, func.count().label("count"))
             .where(
                 and_(
-                    Task.farm_id == farm_id,
-                    Task.due_date < now,
+                    Task.farm_id.in_(farm_ids),
+                    Task.due_date.is_not(None),
                     Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
                 )
             )
+            .group_by(Task.farm_id, Task.due_date)
         )
-        return result.scalar()
 
-    async def _get_recent_harvests(self, farm_id: UUID, since: datetime) -> list[dict]:
-        result = await self.db.execute(
-            select(Harvest)
+    def _recent_harvests_query(self, farm_ids: list[UUID], since: date) -> Select:
+        """The five latest harvests of each farm."""
+        ranked = (
+            select(
+                CropCycle.farm_id,
+                Harvest.id,
+                Harvest.weight_kg,
+                Harvest.grade,
+                Harvest.harvest_date,
+                func.row_number()
+                .over(partition_by=CropCycle.farm_id, order_by=Harvest.harvest_date.desc())
+                .label("rank"),
+            )
             .join(CropCycle, Harvest.crop_cycle_id == CropCycle.id)
-            .where(and_(CropCycle.farm_id == farm_id, Harvest.harvested_at >= since))
-            .order_by(Harvest.harvested_at.desc())
-            .limit(5)
+            .where(and_(CropCycle.farm_id.in_(farm_ids), Harvest.harvest_date >= since))
+            .subquery()
         )
-        harvests = result.scalars().all()
-        return [
-            {
-                "id": str(h.id),
-                "weight_kg": float(h.weight_kg),
-                "grade": h.grade,
-                "harvested_at": h.harvested_at.isoformat(),
-            }
-            for h in harvests
-        ]
-
-    async def _count_today_orders(self, farm_id: UUID, today_start: datetime) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(Order)
-            .where(and_(Order.farm_id == farm_id, Order.created_at >= today_start))
+        return (
+            select(
+                ranked.c.farm_id,
+                ranked.c.id,
+                ranked.c.weight_kg,
+                ranked.c.grade,
+                ranked.c.harvest_date,
+            )
+            .where(ranked.c.rank <= 5)
+            .order_by(ranked.c.farm_id, ranked.c.harvest_date.desc())
+        )
+
+    def _today_orders_query(self, farm_ids: list[UUID], today_start: datetime) -> Select:
+        return self._count_by_farm(
+            Order.farm_id, Order.farm_id.in_(farm_ids), Order.created_at >= today_start
+        )
+
+    def _dosing_events_query(self, farm_ids: list[UUID], since: datetime) -> Select:
+        return self._count_by_farm(
+            DosingPump.farm_id,
+            DosingPump.farm_id.in_(farm_ids),
+            DosingEvent.created_at >= since,
+            joins=((DosingEvent, DosingEvent.pump_id == DosingPump.id),),
         )
-        return result.scalar()
 
-    async def _count_dosing_events(self, farm_id: UUID, since: datetime) -> int:
-        result = await self.db.execute(
-            select(func.count())
-            .select_from(DosingEvent)
-            .where(and_(DosingEvent.farm_id == farm_id, DosingEvent.created_at >= since))
+    def _dosing_times_query(self, farm_ids: list[UUID], since: datetime) -> Select:
+        return (
+            select(DosingPump.farm_id, DosingEvent.created_at)
+            .join(DosingPump, DosingEvent.pump_id == DosingPump.id)
+            .where(and_(DosingPump.farm_id.in_(farm_ids), DosingEvent.created_at >= since))
         )
-        return result.scalar()
-
-    async def _get_environment_snapshot(self, farm_id: UUID) -> dict:
-        """Latest reading for key sensor types."""
-        key_types = [
-            SensorType.TEMPERATURE,
-            SensorType.HUMIDITY,
-            SensorType.PH,
-            SensorType.EC,
-            SensorType.CO2,
-        ]
-        snapshot = {}
-        for sensor_type in key_types:
-            result = await self.db.execute(
-                select(Sensor.last_value)
-                .where(
-                    and_(
-                        Sensor.farm_id == farm_id,
-                        Sensor.sensor_type == sensor_type,
-                        Sensor.is_active.is_(True),
-                    )
+
+    def _active_sensors_query(self, farm_ids: list[UUID]) -> Select:
+        return select(
+            Sensor.farm_id, Sensor.id, Sensor.sensor_type, Sensor.last_value, Sensor.last_reading_at
+        ).where(and_(Sensor.farm_id.in_(farm_ids), Sensor.is_active.is_(True)))
+
+    def _environment_query(self, farm_ids: list[UUID]) -> Select:
+        """Latest reading for key sensor types, newest sensor first per type."""
+        return (
+            select(Sensor.farm_id, Sensor.sensor_type, Sensor.last_value)
+            .where(
+                and_(
+                    Sensor.farm_id.in_(farm_ids),
+                    Sensor.sensor_type.in_(ENVIRONMENT_TYPES),
+                    Sensor.is_active.is_(True),
                 )
-                .order_by(Sensor.last_reading_at.desc().nullslast())
-                .limit(1)
             )
-            value = result.scalar_one_or_none()
-            snapshot[sensor_type.value] = round(float(value), 2) if value else None
-
-        return snapshot
+            .order_by(
+                Sensor.farm_id, Sensor.sensor_type, Sensor.last_reading_at.desc().nullslast()
+            )
+        )
@@ -3,17 +3,23 @@ from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.exceptions import NotFoundException
 from app.models.dosing import DosingEvent, DosingPump, DosingRecipe
 from app.repositories.base import BaseRepository
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
 
 
 class DosingService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.pump_repo = BaseRepository(DosingPump, db)
-        self.recipe_repo = BaseRepository(DosingRecipe, db)
+        self.recipe_repo = BaseRepository(
+            DosingRecipe, db, versioned_as=VersionedEntity.DOSING_RECIPES
+        )
         self.event_repo = BaseRepository(DosingEvent, db)
+        self.outbox = OutboxService(db)
 
     # Pumps
     async def create_pump(self, farm_id: uuid.UUID, data: dict) -> DosingPump:
@@ -49,6 +55,21 @@ class DosingService:
             }
         )
         pump.last_dose_at = datetime.now(timezone.utc)
+        self.outbox.update_dashboard(
+            pump.farm_id, DashboardReadModel.dosing_recorded(datetime.utcnow())
+        )
+        if pump.mqtt_topic_command:
+            # Sent only if the dosing event commits.
+            self.outbox.send_device_command(
+                pump.farm_id,
+                pump.mqtt_topic_command,
+                {
+                    "action": "dose",
+                    "event_id": str(event.id),
+                    "volume_ml": volume_ml,
+                    "duration_seconds": round(duration, 2),
+                },
+            )
         await self.db.flush()
         return event
 
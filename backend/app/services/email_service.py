@@ -0,0 +1,332 @@
+"""Outgoing email: pooled SMTP delivery and per-recipient digests.
+
+API processes and Celery tasks only push messages onto a Redis list (or into
+a recipient's digest); the email worker process (``app.email_worker``) owns
+the SMTP connections. It feeds a bounded in-process queue drained by a fixed
+number of senders, each borrowing a connection from the pool, so an alert
+storm costs a handful of SMTP sessions rather than one per message.
+
+A message stays in Redis until it is settled: taking it moves it to a
+processing list, and it leaves that list only once it is sent, given up on,
+or scheduled for a retry in a sorted set scored by when it is next due. What
+a stopped or crashed worker had in flight is re-queued when it starts again.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from typing import AsyncIterator
+
+import aiosmtplib
+from redis.exceptions import WatchError
+
+from app.core import redis_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingEmail:
+    to: str
+    subject: str
+    body: str
+    attempts: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # The queued JSON this was taken from, which settles it.
+    raw: str | None = field(default=None, compare=False, repr=False)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": self.id,
+            "to": self.to,
+            "subject": self.subject,
+            "body": self.body,
+            "attempts": self.attempts,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "OutgoingEmail":
+        data = json.loads(raw)
+        return cls(
+            to=data["to"],
+            subject=data["subject"],
+            body=data["body"],
+            attempts=data.get("attempts", 0),
+            id=data.get("id") or uuid.uuid4().hex,
+            raw=raw,
+        )
+
+    def as_message(self) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = settings.EMAIL_FROM
+        message["To"] = self.to
+        message["Subject"] = self.subject
+        message.set_content(self.body)
+        return message
+
+
+class SMTPPool:
+    """At most ``size`` SMTP connections, kept open and reused between sends.
+
+    A connection that fails mid-send is dropped and a fresh one is opened the
+    next time a slot is borrowed.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.EMAIL_POOL_SIZE,
+        hostname: str = settings.SMTP_HOST,
+        port: int = settings.SMTP_PORT,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[aiosmtplib.SMTP] = []
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=settings.SMTP_START_TLS,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+        )
+        await client.connect()
+        return client
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        async with self._slots:
+            client = None
+            while self._idle and client is None:
+                candidate = self._idle.pop()
+                if candidate.is_connected:
+                    client = candidate
+            if client is None:
+                client = await self._connect()
+            try:
+                yield client
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # The server rejected this message and the envelope was reset;
+                # the session is still usable.
+                self._idle.append(client)
+                raise
+            except BaseException:
+                client.close()
+                raise
+            else:
+                self._idle.append(client)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for client in idle:
+            with contextlib.suppress(Exception):
+                await client.quit()
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies won't succeed on retry; 4xx and connection errors might."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(r.code >= 500 for r in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+
+class EmailWorker:
+    """Sends queued emails with bounded concurrency and retries with backoff.
+
+    ``submit`` waits while the queue is full, so a burst slows the intake
+    instead of growing memory. Each message is settled in ``EmailQueue`` once
+    handled; a failed one is scheduled there for another attempt after an
+    exponential delay until it runs out of attempts.
+    """
+
+    BASE_BACKOFF_SECONDS = 5.0
+    MAX_BACKOFF_SECONDS = 300.0
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        concurrency: int = settings.EMAIL_POOL_SIZE,
+        queue_size: int = settings.EMAIL_QUEUE_SIZE,
+        max_attempts: int = settings.EMAIL_MAX_ATTEMPTS,
+    ):
+        self.pool = pool
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue[OutgoingEmail] = asyncio.Queue(maxsize=queue_size)
+        self._senders: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if not self._senders:
+            self._senders = [asyncio.create_task(self._send_loop()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Finish what's queued, then close. Retries stay scheduled in Redis."""
+        await self._queue.join()
+        for task in self._senders:
+            task.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        self._senders = []
+        await self.pool.close()
+
+    async def submit(self, email: OutgoingEmail) -> None:
+        await self._queue.put(email)
+
+    async def _send_loop(self) -> None:
+        while True:
+            email = await self._queue.get()
+            try:
+                await self._send(email)
+            except Exception as e:
+                # Unsettled, so it is sent again when the worker restarts.
+                logger.error(f"Failed to settle email to {email.to}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, email: OutgoingEmail) -> None:
+        email.attempts += 1
+        try:
+            async with self.pool.connection() as client:
+                await client.send_message(email.as_message())
+        except (aiosmtplib.SMTPException, OSError) as e:
+            if _is_permanent(e) or email.attempts >= self.max_attempts:
+                logger.error(f"Giving up on email to {email.to} after {email.attempts} attempts: {e}")
+                await EmailQueue.ack(email)
+                return
+            delay = min(self.BASE_BACKOFF_SECONDS * 2 ** (email.attempts - 1), self.MAX_BACKOFF_SECONDS)
+            logger.warning(f"Email to {email.to} failed (attempt {email.attempts}), retrying in {delay}s: {e}")
+            await EmailQueue.retry(email, time.time() + delay)
+        else:
+            await EmailQueue.ack(email)
+
+
+class EmailQueue:
+    """Redis hand-off between producers and the email worker.
+
+    Immediate emails go on one list. ``pop`` moves a message to the processing
+    list, where it stays until ``ack`` removes it or ``retry`` moves it to the
+    retry set; ``recover`` returns what a stopped worker left there. There is
+    one email worker process, so everything in processing is its own.
+
+    Digest items go on a per-recipient list, and the recipient is scored in a
+    sorted set by when their digest is due: the first item opens a window of
+    ``EMAIL_DIGEST_MINUTES`` and everything that arrives before it closes is
+    sent as one email.
+    """
+
+    OUTGOING_KEY = "greenos:email:outgoing"
+    PROCESSING_KEY = "greenos:email:processing"
+    RETRY_KEY = "greenos:email:retry"
+    DIGEST_DUE_KEY = "greenos:email:digest_due"
+    DIGEST_PREFIX = "greenos:email:digest"
+
+    @classmethod
+    def digest_key(cls, to: str) -> str:
+        return f"{cls.DIGEST_PREFIX}:{to}"
+
+    @staticmethod
+    async def push(email: OutgoingEmail) -> None:
+        await redis_client.redis_client.rpush(EmailQueue.OUTGOING_KEY, email.to_json())
+
+    @staticmethod
+    async def pop(timeout: float) -> OutgoingEmail | None:
+        """Take the next email, keeping it in the processing list until settled."""
+        raw = await redis_client.redis_client.blmove(
+            EmailQueue.OUTGOING_KEY, EmailQueue.PROCESSING_KEY, timeout, "LEFT", "RIGHT"
+        )
+        return OutgoingEmail.from_json(raw) if raw else None
+
+    @staticmethod
+    async def ack(email: OutgoingEmail) -> None:
+        """Settle an email that was sent or given up on."""
+        await redis_client.redis_client.lrem(EmailQueue.PROCESSING_KEY, 1, email.raw)
+
+    @staticmethod
+    async def retry(email: OutgoingEmail, due_at: float) -> None:
+        """Settle a failed email by scheduling its next attempt for ``due_at``."""
+        async with redis_client.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(EmailQueue.PROCESSING_KEY, 1, email.raw)
+            pipe.zadd(EmailQueue.RETRY_KEY, {email.to_json(): due_at})
+            await pipe.execute()
+
+    @staticmethod
+    async def requeue_due_retries(now: float | None = None) -> int:
+        """Move retries whose time has come back onto the outgoing list."""
+        now = time.time() if now is None else now
+        client = redis_client.redis_client
+        moved = 0
+        for raw in await client.zrangebyscore(EmailQueue.RETRY_KEY, "-inf", now):
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.zrem(EmailQueue.RETRY_KEY, raw)
+                pipe.rpush(EmailQueue.OUTGOING_KEY, raw)
+                await pipe.execute()
+            moved += 1
+        return moved
+
+    @staticmethod
+    async def recover() -> int:
+        """Re-queue, ahead of the rest, what a stopped worker was processing."""
+        client = redis_client.redis_client
+        moved = 0
+        while await client.lmove(
+            EmailQueue.PROCESSING_KEY, EmailQueue.OUTGOING_KEY, "RIGHT", "LEFT"
+        ):
+            moved += 1
+        return moved
+
+    @staticmethod
+    async def add_to_digest(to: str, subject: str, body: str, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        due = now + settings.EMAIL_DIGEST_MINUTES * 60
+        item = json.dumps({"subject": subject, "body": body, "at": now})
+        async with redis_client.redis_client.pipeline(transaction=True) as pipe:
+            pipe.rpush(EmailQueue.digest_key(to), item)
+            # NX keeps the due time set by the first item of the window.
+            pipe.zadd(EmailQueue.DIGEST_DUE_KEY, {to: due}, nx=True)
+            await pipe.execute()
+
+    @staticmethod
+    async def queue_due_digests(now: float | None = None) -> list[OutgoingEmail]:
+        """Replace every digest whose window has closed with its email, each exactly once."""
+        now = time.time() if now is None else now
+        client = redis_client.redis_client
+        digests = []
+        for to in await client.zrangebyscore(EmailQueue.DIGEST_DUE_KEY, "-inf", now):
+            key = EmailQueue.digest_key(to)
+            async with client.pipeline(transaction=True) as pipe:
+                while True:
+                    try:
+                        await pipe.watch(key)
+                        items = await pipe.lrange(key, 0, -1)
+                        digest = build_digest(to, [json.loads(i) for i in items]) if items else None
+                        pipe.multi()
+                        pipe.delete(key)
+                        pipe.zrem(EmailQueue.DIGEST_DUE_KEY, to)
+                        if digest:
+                            pipe.rpush(EmailQueue.OUTGOING_KEY, digest.to_json())
+                        await pipe.execute()
+                        break
+                    except WatchError:
+                        continue
+            if digest:
+                digests.append(digest)
+        return digests
+
+
+def build_digest(to: str, items: list[dict]) -> OutgoingEmail:
+    lines = []
+    for item in items:
+        at = datetime.fromtimestamp(item["at"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+        lines.append(f"[{at}] {item['subject']}\n{item['body']}\n")
+    noun = "notification" if len(items) == 1 else "notifications"
+    return OutgoingEmail(
+        to=to,
+        subject=f"{settings.APP_NAME} digest: {len(items)} {noun}",
+        body="\n".join(lines),
+    )
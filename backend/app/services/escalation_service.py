@@ -0,0 +1,256 @@
+"""Escalation runner for EscalationPolicy steps.
+
+Pending steps for all open alerts live in one Redis sorted set scored by due
+time, so a single poller claims whatever is due instead of querying every open
+alert, and acknowledging an alert cancels its pending step with one ZREM.
+
+Steps are written to the set through the outbox, so a step is scheduled only
+once the transaction that created it commits. A claimed step stays in the
+set, rescored to the end of a lease, until the outbox replaces it with the
+alert's next step or removes it; both are queued in the transaction that
+records the step's notifications, so if that doesn't commit the step is due
+again when the lease runs out.
+"""
+import logging
+import time
+import uuid
+
+from redis.exceptions import WatchError
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core import redis_client
+from app.core.constants import AlertSeverity, AlertStatus
+from app.models.alert import Alert, AlertRule, EscalationPolicy
+from app.models.user import Role, User, user_farms
+from app.repositories.alert_repo import EscalationPolicyRepository
+from app.services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class EscalationScheduler:
+    """Redis sorted set of pending escalation steps keyed by alert id."""
+
+    DUE_KEY = "greenos:escalations:due"
+    STEP_KEY = "greenos:escalations:steps"
+    LEASE_SECONDS = 300
+
+    async def schedule(
+        self, alert_id: uuid.UUID, policy_id: uuid.UUID, step_index: int, due_at: float
+    ) -> None:
+        """Set the alert's pending step. Raises on failure so the outbox relay retries."""
+        client = redis_client.redis_client
+        if not client:
+            raise RuntimeError("Redis not initialized")
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.DUE_KEY, {str(alert_id): due_at})
+            pipe.hset(self.STEP_KEY, str(alert_id), f"{policy_id}:{step_index}")
+            await pipe.execute()
+
+    async def remove(self, alert_id: uuid.UUID) -> None:
+        """Drop the alert's pending step. Raises on failure so the outbox relay retries."""
+        client = redis_client.redis_client
+        if not client:
+            raise RuntimeError("Redis not initialized")
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.DUE_KEY, str(alert_id))
+            pipe.hdel(self.STEP_KEY, str(alert_id))
+            await pipe.execute()
+
+    async def cancel(self, alert_id: uuid.UUID) -> None:
+        """Best-effort ``remove`` for an acknowledged or resolved alert.
+
+        A step left behind is dropped when it comes due, since the poller
+        only runs steps of active alerts.
+        """
+        if not redis_client.redis_client:
+            return
+        try:
+            await self.remove(alert_id)
+        except Exception as e:
+            logger.error(f"Failed to cancel escalation: {e}")
+
+    async def claim_due(
+        self, now: float, limit: int = 500
+    ) -> list[tuple[uuid.UUID, uuid.UUID, int]]:
+        """Lease up to ``limit`` due steps as (alert_id, policy_id, step_index).
+
+        The caller settles each step with ``schedule`` (its next step) or
+        ``remove`` once it has run.
+        """
+        client = redis_client.redis_client
+        if not client:
+            return []
+        async with client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self.DUE_KEY)
+                    members = await pipe.zrangebyscore(
+                        self.DUE_KEY, "-inf", now, start=0, num=limit
+                    )
+                    if not members:
+                        await pipe.reset()
+                        return []
+                    pointers = await pipe.hmget(self.STEP_KEY, members)
+                    pipe.multi()
+                    # Rescoring under WATCH is the claim: a poller that raced
+                    # us retries and no longer sees these as due.
+                    leased = {m: now + self.LEASE_SECONDS for m, p in zip(members, pointers) if p}
+                    if leased:
+                        pipe.zadd(self.DUE_KEY, leased)
+                    for member, pointer in zip(members, pointers):
+                        if not pointer:
+                            pipe.zrem(self.DUE_KEY, member)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        due = []
+        for member, pointer in zip(members, pointers):
+            if not pointer:
+                continue
+            policy_id, step_index = pointer.rsplit(":", 1)
+            due.append((uuid.UUID(member), uuid.UUID(policy_id), int(step_index)))
+        return due
+
+
+escalation_scheduler = EscalationScheduler()
+
+
+def _step_delay_seconds(step: dict) -> float:
+    return float(step.get("delay_minutes", 0)) * 60
+
+
+class EscalationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.policy_repo = EscalationPolicyRepository(db)
+        self.outbox = OutboxService(db)
+
+    async def start(self, alert: Alert, rule: AlertRule) -> None:
+        """Queue the first step of the rule's escalation policy, if any.
+
+        It reaches the schedule once the alert's transaction commits, so the
+        poller never sees a step for an alert it can't load yet.
+        """
+        if rule.escalation_policy_id is None:
+            return
+        policy = await self.policy_repo.get_by_id(rule.escalation_policy_id)
+        if policy is None or not policy.steps:
+            return
+        self.outbox.schedule_escalation(
+            rule.farm_id,
+            alert.id,
+            policy.id,
+            0,
+            time.time() + _step_delay_seconds(policy.steps[0]),
+        )
+
+    async def run_due(self, now: float | None = None) -> int:
+        """Execute all due steps and queue each alert's next step, or its end."""
+        now = time.time() if now is None else now
+        due = await escalation_scheduler.claim_due(now)
+        if not due:
+            return 0
+
+        alert_result = await self.db.execute(
+            select(Alert)
+            .options(selectinload(Alert.alert_rule))
+            .where(
+                Alert.id.in_([alert_id for alert_id, _, _ in due]),
+                Alert.status == AlertStatus.ACTIVE.value,
+            )
+        )
+        alerts = {a.id: a for a in alert_result.scalars().all()}
+        policy_result = await self.db.execute(
+            select(EscalationPolicy).where(
+                EscalationPolicy.id.in_({policy_id for _, policy_id, _ in due})
+            )
+        )
+        policies = {p.id: p for p in policy_result.scalars().all()}
+
+        executed = 0
+        for alert_id, policy_id, step_index in due:
+            alert = alerts.get(alert_id)
+            policy = policies.get(policy_id)
+            farm_id = alert.alert_rule.farm_id if alert is not None else None
+            if alert is None or policy is None or step_index >= len(policy.steps):
+                self.outbox.end_escalation(farm_id, alert_id)
+                continue
+            await self._execute_step(alert, policy.steps[step_index], step_index)
+            executed += 1
+            next_index = step_index + 1
+            if next_index < len(policy.steps):
+                self.outbox.schedule_escalation(
+                    farm_id,
+                    alert.id,
+                    policy.id,
+                    next_index,
+                    now + _step_delay_seconds(policy.steps[next_index]),
+                )
+            else:
+                self.outbox.end_escalation(farm_id, alert.id)
+        return executed
+
+    async def _execute_step(self, alert: Alert, step: dict, step_index: int) -> None:
+        farm_id = alert.alert_rule.farm_id
+        channels = step.get("channels") or []
+        self.outbox.publish(
+            farm_id,
+            "escalation",
+            {
+                "alert_id": str(alert.id),
+                "step": step_index,
+                "severity": alert.severity,
+                "title": alert.title,
+                "channels": channels,
+                "notify_roles": step.get("notify_roles") or [],
+                "notify_user_ids": step.get("notify_user_ids") or [],
+            },
+        )
+        recipients = await self._recipients(farm_id, step)
+        for user in recipients:
+            self.outbox.notify_user(
+                farm_id,
+                user.id,
+                {
+                    "type": "escalation",
+                    "farm_id": str(farm_id),
+                    "alert_id": str(alert.id),
+                    "severity": alert.severity,
+                    "title": alert.title,
+                    "step": step_index,
+                },
+            )
+        if "email" in channels:
+            for user in recipients:
+                self.outbox.send_email(
+                    farm_id,
+                    user.email,
+                    f"[Escalation {step_index + 1}] {alert.title}",
+                    alert.message or alert.title,
+                    # Only critical alerts interrupt; the rest arrive batched.
+                    digest=alert.severity != AlertSeverity.CRITICAL.value,
+                )
+
+    async def _recipients(self, farm_id: uuid.UUID, step: dict) -> list[User]:
+        conditions = []
+        if step.get("notify_user_ids"):
+            conditions.append(User.id.in_([uuid.UUID(str(u)) for u in step["notify_user_ids"]]))
+        if step.get("notify_roles"):
+            conditions.append(User.role.has(Role.name.in_(step["notify_roles"])))
+        if not conditions:
+            return []
+        result = await self.db.execute(
+            select(User)
+            .join(user_farms, user_farms.c.user_id == User.id)
+            .where(
+                user_farms.c.farm_id == farm_id,
+                User.is_active.is_(True),
+                or_(*conditions),
+            )
+        )
+        return list(result.scalars().all())
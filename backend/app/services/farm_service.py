@@ -31,6 +31,16 @@ class FarmService:
             return await self.farm_repo.get_multi(limit=1000)
         return await self.farm_repo.get_user_farms(user.id)
 
+    async def page_user_farms(
+        self, user: User, skip: int = 0, limit: int = 20
+    ) -> tuple[list[Farm], int]:
+        return await self.farm_repo.get_farm_page(
+            None if user.is_superuser else user.id, skip, limit
+        )
+
+    async def can_access(self, farm_id: uuid.UUID, user: User) -> bool:
+        return user.is_superuser or await self.farm_repo.is_member(farm_id, user.id)
+
     async def get_farm(self, farm_id: uuid.UUID) -> Farm:
         farm = await self.farm_repo.get_farm_with_zones(farm_id)
         if not farm:
@@ -95,6 +105,11 @@ class FarmService:
         data["rack_id"] = rack_id
         return await self.tray_repo.create(data)
 
+    async def create_trays(self, rack_id: uuid.UUID, items: list[dict]) -> list[Tray]:
+        for data in items:
+            data["rack_id"] = rack_id
+        return await self.tray_repo.bulk_create(items)
+
     async def get_trays(self, rack_id: uuid.UUID) -> list[Tray]:
         return await self.tray_repo.get_multi(limit=1000, rack_id=rack_id)
 
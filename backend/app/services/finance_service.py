@@ -6,25 +6,26 @@ from uuid import UUID
 from sqlalchemy import select, func, and_, extract
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.constants import CostCategory, InvoiceStatus
+from app.core.constants import CostCategory, CountMode, InvoiceStatus
 from app.core.exceptions import NotFoundException
 from app.models.finance import Cost
 from app.models.order import Order, OrderItem, Invoice
 from app.models.harvest import Harvest
 from app.models.crop import CropCycle, CropProfile
+from app.repositories.base import BaseRepository, Page
 from app.schemas.finance import CostCreate
 
 
 class FinanceService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.cost_repo = BaseRepository(Cost, db)
 
     # --- Cost tracking ---
     async def create_cost(self, data: CostCreate) -> Cost:
         cost = Cost(**data.model_dump())
         self.db.add(cost)
         await self.db.flush()
-        await self.db.refresh(cost)
         return cost
 
     async def get_cost(self, cost_id: UUID) -> Cost:
@@ -42,25 +43,22 @@ class FinanceService:
         category: CostCategory | None = None,
         start_date: date | None = None,
         end_date: date | None = None,
-    ) -> tuple[list[Cost], int]:
+        cursor: str | None = None,
+        count: CountMode = CountMode.EXACT,
+    ) -> Page[Cost]:
         query = select(Cost).where(Cost.farm_id == farm_id)
-        count_q = select(func.count()).select_from(Cost).where(Cost.farm_id == farm_id)
 
         if category:
             query = query.where(Cost.category == category)
-            count_q = count_q.where(Cost.category == category)
         if start_date:
             query = query.where(Cost.date >= start_date)
-            count_q = count_q.where(Cost.date >= start_date)
         if end_date:
             query = query.where(Cost.date <= end_date)
-            count_q = count_q.where(Cost.date <= end_date)
 
-        total = (await self.db.execute(count_q)).scalar()
-        result = await self.db.execute(
-            query.order_by(Cost.date.desc()).offset(skip).limit(limit)
+        return await self.cost_repo.get_page(
+            query, limit=limit, skip=skip, cursor=cursor, count=count,
+            order_by=[(Cost.date, True), (Cost.created_at, True)],
         )
-        return list(result.scalars().all()), total
 
     async def delete_cost(self, cost_id: UUID) -> None:
         cost = await self.get_cost(cost_id)
@@ -4,18 +4,23 @@ from datetime import date, timedelta
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import VersionedEntity
 from app.core.exceptions import NotFoundException
+from app.core.response_versions import ResponseVersions
 from app.models.crop import CropCycle, CropProfile
 from app.models.harvest import Harvest
 from app.models.user import User
 from app.repositories.base import BaseRepository
 from app.schemas.harvest import HarvestCalendarEntry, YieldReportResponse
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
 
 
 class HarvestService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.harvest_repo = BaseRepository(Harvest, db)
+        self.outbox = OutboxService(db)
 
     async def create_harvest(
         self, cycle_id: uuid.UUID, data: dict, user: User
@@ -31,9 +36,32 @@ class HarvestService:
         data["harvested_by"] = user.id
         harvest = await self.harvest_repo.create(data)
 
+        self.outbox.update_dashboard(
+            cycle.farm_id,
+            DashboardReadModel.crop_changed(cycle.status, "harvested")
+            + DashboardReadModel.harvest_recorded(
+                harvest.id, harvest.weight_kg, harvest.grade, harvest.harvest_date
+            ),
+        )
         cycle.status = "harvested"
         cycle.actual_harvest_at = data["harvest_date"]
         await self.db.flush()
+        ResponseVersions.touch(
+            self.db, cycle.farm_id, VersionedEntity.HARVESTS, VersionedEntity.CROPS
+        )
+        self.outbox.notify_webhooks(
+            cycle.farm_id,
+            "harvest",
+            {
+                "harvest_id": str(harvest.id),
+                "crop_cycle_id": str(cycle.id),
+                "batch_code": cycle.batch_code,
+                "harvest_date": harvest.harvest_date.isoformat(),
+                "weight_kg": float(harvest.weight_kg),
+                "waste_kg": float(harvest.waste_kg),
+                "grade": harvest.grade,
+            },
+        )
         return harvest
 
     async def list_harvests(self, farm_id: uuid.UUID) -> list[Harvest]:
@@ -0,0 +1,138 @@
+"""Alert storm suppression: correlates alerts in a zone into incidents."""
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.constants import IncidentStatus
+from app.models.alert import AlertIncident
+from app.models.sensor import Sensor
+from app.repositories.alert_repo import AlertIncidentRepository
+
+SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
+
+class IncidentService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.incident_repo = AlertIncidentRepository(db)
+
+    async def correlate(
+        self, sensor: Sensor, severity: str, at: datetime, rollups: list[AlertIncident]
+    ) -> tuple[AlertIncident, bool]:
+        """Attach a fired alert to its zone's open incident.
+
+        Returns the incident and whether the alert should be materialized,
+        i.e. stored and published on its own. Only the alert that opens an
+        incident, or one that raises its severity, is materialized; the rest
+        are counted on the incident and reported through rollups.
+
+        Alerts are grouped by zone and window only: the first alert's sensor
+        type is kept as the incident's root cause and later types are added
+        to ``sensor_types``, so a zone-wide failure stays one incident
+        instead of one per sensor type.
+
+        The open incident is locked while it is updated, and the partial
+        unique index on open incidents makes a concurrent opener fall back to
+        the incident that won. An open incident past its window that the
+        sweeper has not closed yet is closed here; if it owes a final rollup
+        it is added to ``rollups``.
+        """
+        window = timedelta(minutes=settings.ALERT_INCIDENT_WINDOW_MINUTES)
+        incident = await self.incident_repo.get_open_incident(sensor.farm_id, sensor.zone_id)
+        if incident is not None and incident.last_alert_at < at - window:
+            if self._close(incident, at):
+                rollups.append(incident)
+            await self.db.flush()
+            incident = None
+        if incident is None:
+            incident = await self.incident_repo.create_open_incident(
+                {
+                    "farm_id": sensor.farm_id,
+                    "zone_id": sensor.zone_id,
+                    "root_sensor_type": sensor.sensor_type,
+                    "sensor_types": [sensor.sensor_type],
+                    "severity": severity,
+                    "status": IncidentStatus.OPEN.value,
+                    "alert_count": 1,
+                    "suppressed_count": 0,
+                    "unreported_count": 0,
+                    "opened_at": at,
+                    "last_alert_at": at,
+                    "last_notified_at": at,
+                }
+            )
+            if incident is not None:
+                return incident, True
+            incident = await self.incident_repo.get_open_incident(sensor.farm_id, sensor.zone_id)
+
+        escalated = SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(incident.severity, 0)
+        incident.alert_count += 1
+        incident.last_alert_at = at
+        if sensor.sensor_type not in incident.sensor_types:
+            incident.sensor_types = [*incident.sensor_types, sensor.sensor_type]
+        if escalated:
+            incident.severity = severity
+        else:
+            incident.suppressed_count += 1
+            incident.unreported_count += 1
+        await self.db.flush()
+        return incident, escalated
+
+    def take_rollup(self, incident: AlertIncident, at: datetime) -> bool:
+        """Return True (and mark the incident notified) when a rollup is due."""
+        if incident.unreported_count == 0:
+            return False
+        interval = timedelta(minutes=settings.ALERT_ROLLUP_INTERVAL_MINUTES)
+        if incident.last_notified_at is not None and at - incident.last_notified_at < interval:
+            return False
+        incident.last_notified_at = at
+        incident.unreported_count = 0
+        return True
+
+    async def close_stale_incidents(self, at: datetime) -> list[AlertIncident]:
+        """Close incidents with no alerts inside the correlation window.
+
+        Returns the closed incidents that still have unreported alerts, so a
+        final rollup can be published for them.
+        """
+        window = timedelta(minutes=settings.ALERT_INCIDENT_WINDOW_MINUTES)
+        needs_rollup = [
+            incident
+            for incident in await self.incident_repo.get_stale_open_incidents(at - window)
+            if self._close(incident, at)
+        ]
+        await self.db.flush()
+        return needs_rollup
+
+    @staticmethod
+    def _close(incident: AlertIncident, at: datetime) -> bool:
+        """Close ``incident``; returns whether it still owes a final rollup."""
+        incident.status = IncidentStatus.CLOSED.value
+        incident.closed_at = at
+        if not incident.unreported_count:
+            return False
+        incident.last_notified_at = at
+        incident.unreported_count = 0
+        return True
+
+    async def list_incidents(
+        self, farm_id: uuid.UUID, status: str | None = None
+    ) -> list[AlertIncident]:
+        return await self.incident_repo.get_incidents(farm_id, status)
+
+    @staticmethod
+    def rollup_payload(incident: AlertIncident) -> dict:
+        return {
+            "incident_id": str(incident.id),
+            "zone_id": str(incident.zone_id) if incident.zone_id else None,
+            "root_sensor_type": incident.root_sensor_type,
+            "sensor_types": incident.sensor_types,
+            "severity": incident.severity,
+            "status": incident.status,
+            "alert_count": incident.alert_count,
+            "suppressed_count": incident.suppressed_count,
+            "opened_at": incident.opened_at.isoformat(),
+            "last_alert_at": incident.last_alert_at.isoformat(),
+        }
@@ -47,6 +47,33 @@ class InventoryService:
         await self.db.flush()
         return txn
 
+    async def create_transactions(
+        self, farm_id: uuid.UUID, entries: list[dict], user_id: uuid.UUID
+    ) -> list[StockTransaction]:
+        """Record stock movements for several of the farm's items at once.
+
+        One INSERT for the transactions and one UPDATE for the stock levels,
+        however many entries there are.
+        """
+        item_ids = {entry["inventory_item_id"] for entry in entries}
+        result = await self.db.execute(
+            select(InventoryItem).where(
+                InventoryItem.id.in_(item_ids), InventoryItem.farm_id == farm_id
+            )
+        )
+        stock = {item.id: item.current_stock for item in result.scalars().all()}
+        if len(stock) != len(item_ids):
+            raise NotFoundException(detail="Inventory item not found")
+
+        for entry in entries:
+            entry["performed_by"] = user_id
+            stock[entry["inventory_item_id"]] += Decimal(str(entry["quantity"]))
+        txns = await self.txn_repo.bulk_create(entries)
+        await self.item_repo.bulk_update(
+            [{"id": item_id, "current_stock": level} for item_id, level in stock.items()]
+        )
+        return txns
+
     async def get_transactions(self, item_id: uuid.UUID) -> list[StockTransaction]:
         return await self.txn_repo.get_multi(limit=100, inventory_item_id=item_id)
 
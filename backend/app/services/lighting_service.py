@@ -32,7 +32,6 @@ class LightingService:
             raise NotFoundException(detail="Light zone not found")
         lz.current_state = command
         await self.db.flush()
-        await self.db.refresh(lz)
         return lz
 
     async def create_schedule(self, lz_id: uuid.UUID, data: dict) -> LightSchedule:
@@ -3,121 +3,234 @@ import json
 import logging
 from uuid import UUID
 
-from app.core.redis_client import redis_client
+from redis.exceptions import WatchError
+
+from app.core import redis_client
+from app.core.config import settings
+from app.services.email_service import EmailQueue, OutgoingEmail
 
 logger = logging.getLogger(__name__)
 
 
+def event_seq(event_id: str) -> tuple[int, int]:
+    """Sortable form of a Redis stream entry ID ("<ms>-<seq>")."""
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
 class NotificationService:
-    """Handles publishing notifications via Redis pub/sub and other channels."""
+    """Handles publishing notifications via Redis pub/sub and other channels.
+
+    Farm events are also kept in a capped per-farm Redis stream so WebSocket
+    clients can resume from the last event ID they saw.
+    """
+
+    CHANNEL_PREFIX = "greenos:notifications"
+    CHANNEL_ALERTS = "alerts"
+    CHANNEL_SENSORS = "sensors"
+    CHANNEL_DOSING = "dosing"
+    CHANNEL_TASKS = "tasks"
+    STREAM_PREFIX = "greenos:events"
+    EVENT_CHANNELS = {
+        "alert": CHANNEL_ALERTS,
+        "incident_rollup": CHANNEL_ALERTS,
+        "escalation": CHANNEL_ALERTS,
+        "sensor_reading": CHANNEL_SENSORS,
+        "dosing_event": CHANNEL_DOSING,
+        "task_update": CHANNEL_TASKS,
+    }
 
-    CHANNEL_ALERTS = "greenos:notifications:alerts"
-    CHANNEL_SENSORS = "greenos:notifications:sensors"
-    CHANNEL_DOSING = "greenos:notifications:dosing"
-    CHANNEL_TASKS = "greenos:notifications:tasks"
+    @staticmethod
+    def channel(farm_id: UUID | str, kind: str) -> str:
+        """Per-farm channel, so subscribers only receive the farms they watch."""
+        return f"{NotificationService.CHANNEL_PREFIX}:{farm_id}:{kind}"
 
     @staticmethod
-    async def publish_alert(farm_id: UUID, alert_data: dict) -> None:
-        """Publish alert notification to Redis for WebSocket fanout."""
-        if not redis_client:
-            logger.warning("Redis not available, skipping alert notification")
-            return
-
-        message = json.dumps({
-            "type": "alert",
-            "farm_id": str(farm_id),
-            "data": alert_data,
-        })
-        try:
-            await redis_client.publish(NotificationService.CHANNEL_ALERTS, message)
-        except Exception as e:
-            logger.error(f"Failed to publish alert notification: {e}")
+    def farm_pattern(farm_id: UUID | str | None = None) -> str:
+        """Pattern matching every channel of one farm, or of all farms."""
+        return f"{NotificationService.CHANNEL_PREFIX}:{farm_id or '*'}:*"
 
     @staticmethod
-    async def publish_sensor_reading(farm_id: UUID, sensor_data: dict) -> None:
-        """Publish real-time sensor reading."""
-        if not redis_client:
-            return
-
-        message = json.dumps({
-            "type": "sensor_reading",
-            "farm_id": str(farm_id),
-            "data": sensor_data,
-        })
-        try:
-            await redis_client.publish(NotificationService.CHANNEL_SENSORS, message)
-        except Exception as e:
-            logger.error(f"Failed to publish sensor reading: {e}")
+    def stream_key(farm_id: UUID | str) -> str:
+        return f"{NotificationService.STREAM_PREFIX}:{farm_id}"
 
     @staticmethod
-    async def publish_dosing_event(farm_id: UUID, dosing_data: dict) -> None:
-        """Publish dosing event notification."""
-        if not redis_client:
-            return
-
-        message = json.dumps({
-            "type": "dosing_event",
-            "farm_id": str(farm_id),
-            "data": dosing_data,
-        })
+    async def publish_event(farm_id: UUID | str, event_type: str, data: dict) -> str:
+        """Append the event to the farm's stream, then publish it for live fan-out.
+
+        The stream entry ID is the event's sequence number: it is included in
+        the published message so clients can resume from it after reconnecting.
+        Raises on failure so the outbox relay can retry.
+        """
+        client = redis_client.redis_client
+        if not client:
+            raise RuntimeError("Redis not initialized")
+        event = {"type": event_type, "farm_id": str(farm_id), "data": data}
+        event_id = await client.xadd(
+            NotificationService.stream_key(farm_id),
+            {"event": json.dumps(event)},
+            maxlen=settings.EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+        kind = NotificationService.EVENT_CHANNELS.get(event_type, NotificationService.CHANNEL_ALERTS)
+        await client.publish(
+            NotificationService.channel(farm_id, kind), json.dumps({"id": event_id, **event})
+        )
+        return event_id
+
+    @staticmethod
+    async def latest_event_id(farm_id: UUID | str) -> str:
+        """ID of the farm's newest event, or "0-0" if there is none."""
+        client = redis_client.redis_client
+        if not client:
+            return "0-0"
         try:
-            await redis_client.publish(NotificationService.CHANNEL_DOSING, message)
+            entries = await client.xrevrange(NotificationService.stream_key(farm_id), count=1)
         except Exception as e:
-            logger.error(f"Failed to publish dosing event: {e}")
+            logger.error(f"Failed to read event stream: {e}")
+            return "0-0"
+        return entries[0][0] if entries else "0-0"
 
     @staticmethod
-    async def publish_task_update(farm_id: UUID, task_data: dict) -> None:
-        """Publish task update notification."""
-        if not redis_client:
-            return
-
-        message = json.dumps({
-            "type": "task_update",
-            "farm_id": str(farm_id),
-            "data": task_data,
-        })
+    async def read_events_since(
+        farm_id: UUID | str, last_event_id: str, limit: int
+    ) -> list[dict] | None:
+        """Events published after ``last_event_id``, oldest first.
+
+        Returns None when they can't all be replayed: the stream has been
+        trimmed past ``last_event_id``, or more than ``limit`` events are due.
+        """
+        client = redis_client.redis_client
+        if not client:
+            return None
+        key = NotificationService.stream_key(farm_id)
         try:
-            await redis_client.publish(NotificationService.CHANNEL_TASKS, message)
+            oldest = await client.xrange(key, count=1)
+            if oldest and event_seq(oldest[0][0]) > event_seq(last_event_id):
+                return None
+            entries = await client.xrange(key, min=f"({last_event_id}", count=limit + 1)
         except Exception as e:
-            logger.error(f"Failed to publish task update: {e}")
+            logger.error(f"Failed to read event stream: {e}")
+            return None
+        if len(entries) > limit:
+            return None
+        return [{"id": entry_id, **json.loads(fields["event"])} for entry_id, fields in entries]
 
     @staticmethod
     async def send_email_notification(
         to_email: str,
         subject: str,
         body: str,
+        digest: bool = False,
     ) -> None:
-        """Send email notification (placeholder for SMTP integration)."""
-        logger.info(f"Email notification: to={to_email}, subject={subject}")
-        # In production, integrate with SMTP or email service (SendGrid, SES, etc.)
-        # For now, just log the notification
+        """Queue an email for the email worker.
+
+        With ``digest`` the message is held and sent together with the
+        recipient's other digest items once their digest window closes.
+        Raises on failure so the outbox relay can retry.
+        """
+        if not redis_client.redis_client:
+            raise RuntimeError("Redis not initialized")
+        if digest:
+            await EmailQueue.add_to_digest(to_email, subject, body)
+        else:
+            await EmailQueue.push(OutgoingEmail(to=to_email, subject=subject, body=body))
+
+    # Per-user inbox: a capped stream of notifications, a read cursor (the ID
+    # of the newest entry the user has seen) and an unread counter, so the
+    # notification bell costs one GET.
+    @staticmethod
+    def inbox_key(user_id: UUID | str) -> str:
+        return f"greenos:user:{user_id}:inbox"
 
     @staticmethod
-    async def cache_notification(
-        user_id: UUID, notification: dict, ttl: int = 86400
-    ) -> None:
-        """Cache notification in Redis for later retrieval."""
-        if not redis_client:
-            return
+    async def add_to_inbox(user_id: UUID, notification: dict) -> None:
+        """Raises on failure so the outbox relay can retry."""
+        client = redis_client.redis_client
+        if not client:
+            raise RuntimeError("Redis not initialized")
+        key = NotificationService.inbox_key(user_id)
+        ttl = settings.NOTIFICATION_INBOX_TTL_DAYS * 86400
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                key,
+                {"notification": json.dumps(notification)},
+                maxlen=settings.NOTIFICATION_INBOX_SIZE,
+                approximate=False,
+            )
+            pipe.incr(f"{key}:unread")
+            pipe.expire(key, ttl)
+            pipe.expire(f"{key}:unread", ttl)
+            pipe.expire(f"{key}:read", ttl)
+            await pipe.execute()
 
-        key = f"greenos:user:{user_id}:notifications"
+    @staticmethod
+    async def unread_count(user_id: UUID) -> int:
+        client = redis_client.redis_client
+        if not client:
+            return 0
         try:
-            await redis_client.lpush(key, json.dumps(notification))
-            await redis_client.ltrim(key, 0, 99)  # Keep last 100 notifications
-            await redis_client.expire(key, ttl)
+            count = await client.get(f"{NotificationService.inbox_key(user_id)}:unread")
         except Exception as e:
-            logger.error(f"Failed to cache notification: {e}")
+            logger.error(f"Failed to read unread count: {e}")
+            return 0
+        # Entries trimmed off the inbox unread still count until the next mark-read.
+        return min(int(count or 0), settings.NOTIFICATION_INBOX_SIZE)
 
     @staticmethod
-    async def get_user_notifications(user_id: UUID, limit: int = 20) -> list[dict]:
-        """Retrieve cached notifications for a user."""
-        if not redis_client:
-            return []
-
-        key = f"greenos:user:{user_id}:notifications"
+    async def get_inbox(
+        user_id: UUID, after: str | None = None, limit: int = 20
+    ) -> tuple[list[dict], int]:
+        """Newest-first notifications (only those after ``after`` if given) and the unread count."""
+        client = redis_client.redis_client
+        if not client:
+            return [], 0
+        key = NotificationService.inbox_key(user_id)
         try:
-            raw = await redis_client.lrange(key, 0, limit - 1)
-            return [json.loads(item) for item in raw]
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.xrevrange(key, "+", f"({after}" if after else "-", count=limit)
+                pipe.get(f"{key}:read")
+                pipe.get(f"{key}:unread")
+                entries, read_cursor, unread = await pipe.execute()
         except Exception as e:
             logger.error(f"Failed to get notifications: {e}")
-            return []
+            return [], 0
+        read_seq = event_seq(read_cursor) if read_cursor else (0, 0)
+        items = [
+            {
+                **json.loads(fields["notification"]),
+                "id": entry_id,
+                "read": event_seq(entry_id) <= read_seq,
+            }
+            for entry_id, fields in entries
+        ]
+        return items, min(int(unread or 0), settings.NOTIFICATION_INBOX_SIZE)
+
+    @staticmethod
+    async def mark_read(user_id: UUID, up_to: str) -> int:
+        """Mark everything up to entry ``up_to`` as read; returns the new unread count.
+
+        The cursor never moves backwards, so a stale tab can't mark read
+        notifications unread again. The recount is watched against the
+        stream, so a notification arriving meanwhile is never lost from it.
+        """
+        client = redis_client.redis_client
+        if not client:
+            return 0
+        key = NotificationService.inbox_key(user_id)
+        ttl = settings.NOTIFICATION_INBOX_TTL_DAYS * 86400
+        async with client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    current = await pipe.get(f"{key}:read")
+                    if current and event_seq(current) >= event_seq(up_to):
+                        up_to = current
+                    unread = len(await pipe.xrange(key, f"({up_to}", "+"))
+                    pipe.multi()
+                    pipe.set(f"{key}:read", up_to, ex=ttl)
+                    pipe.set(f"{key}:unread", unread, ex=ttl)
+                    await pipe.execute()
+                    return unread
+                except WatchError:
+                    continue
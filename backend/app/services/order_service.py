@@ -5,11 +5,15 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.constants import VersionedEntity
 from app.core.exceptions import NotFoundException
+from app.core.response_versions import ResponseVersions
 from app.models.crop import CropCycle
 from app.models.harvest import Harvest
 from app.models.order import Customer, Invoice, Order, OrderItem, Subscription
 from app.repositories.base import BaseRepository
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
 
 
 class OrderService:
@@ -20,6 +24,7 @@ class OrderService:
         self.item_repo = BaseRepository(OrderItem, db)
         self.sub_repo = BaseRepository(Subscription, db)
         self.invoice_repo = BaseRepository(Invoice, db)
+        self.outbox = OutboxService(db)
 
     # Customers
     async def create_customer(self, farm_id: uuid.UUID, data: dict) -> Customer:
@@ -63,9 +68,10 @@ class OrderService:
             item_data["total_price"] = round(
                 item_data["quantity_kg"] * item_data["unit_price"], 2
             )
-            await self.item_repo.create(item_data)
+        await self.item_repo.bulk_create(items_data)
 
-        await self.db.refresh(order)
+        self._notify_order(order)
+        self.outbox.update_dashboard(farm_id, DashboardReadModel.order_created(order.created_at))
         return order
 
     async def get_order(self, order_id: uuid.UUID) -> Order:
@@ -83,8 +89,27 @@ class OrderService:
         order = await self.order_repo.update(order_id, data)
         if not order:
             raise NotFoundException(detail="Order not found")
+        if data.get("status") is not None:
+            self._notify_order(order)
+        else:
+            ResponseVersions.touch(self.db, order.farm_id, VersionedEntity.ORDERS)
         return order
 
+    def _notify_order(self, order: Order) -> None:
+        ResponseVersions.touch(self.db, order.farm_id, VersionedEntity.ORDERS)
+        self.outbox.notify_webhooks(
+            order.farm_id,
+            "order",
+            {
+                "order_id": str(order.id),
+                "order_number": order.order_number,
+                "customer_id": str(order.customer_id),
+                "status": order.status,
+                "total_amount": float(order.total_amount),
+                "delivery_date": order.delivery_date.isoformat() if order.delivery_date else None,
+            },
+        )
+
     async def list_orders(self, farm_id: uuid.UUID) -> list[Order]:
         result = await self.db.execute(
             select(Order)
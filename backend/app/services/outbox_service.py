@@ -0,0 +1,262 @@
+"""Transactional outbox: events are stored with the change they report and relayed later."""
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import mqtt_client
+from app.core.config import settings
+from app.core.constants import OutboxDestination, WebhookEventType
+from app.models.outbox import OutboxEvent
+from app.repositories.outbox_repo import OutboxRepository
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.notification_service import NotificationService
+from app.services.webhook_service import WebhookService
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, OutboxEvent], Awaitable[None]]
+WEBHOOK_EVENT_TYPES = {t.value for t in WebhookEventType}
+
+
+async def _deliver_redis(db: AsyncSession, event: OutboxEvent) -> None:
+    await NotificationService.publish_event(event.farm_id, event.event_type, event.payload)
+    if event.event_type == "sensor_reading":
+        # Readings are the busiest event; the dashboard takes them from here
+        # rather than from a second outbox row each.
+        payload = event.payload
+        await DashboardReadModel.apply(
+            event.farm_id,
+            DashboardReadModel.sensor_changed(
+                payload["sensor_id"], payload["sensor_type"], payload["value"], payload["recorded_at"]
+            ),
+            event.id,
+        )
+
+
+async def _deliver_dashboard(db: AsyncSession, event: OutboxEvent) -> None:
+    await DashboardReadModel.apply(event.farm_id, event.payload["ops"], event.id)
+
+
+async def _deliver_webhooks(db: AsyncSession, event: OutboxEvent) -> None:
+    # Only queues per-endpoint deliveries in this transaction; the webhook
+    # worker does the HTTP calls.
+    await WebhookService(db).fan_out(event)
+
+
+async def _deliver_alerts(db: AsyncSession, event: OutboxEvent) -> None:
+    from app.services.alert_service import AlertService
+
+    # A savepoint, so a failed evaluation leaves nothing behind in the relay's
+    # transaction and is retried as a whole. Rule state is written only once
+    # the relay commits, and skips readings it has already seen.
+    async with db.begin_nested():
+        await AlertService(db).evaluate_stored_reading(
+            uuid.UUID(event.payload["sensor_id"]), event.payload["reading_id"]
+        )
+
+
+async def _deliver_notification(db: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    if event.event_type == "inbox":
+        await NotificationService.add_to_inbox(
+            uuid.UUID(payload["user_id"]), payload["notification"]
+        )
+    else:
+        await NotificationService.send_email_notification(
+            payload["to"], payload["subject"], payload["body"], digest=payload["digest"]
+        )
+
+
+async def _deliver_escalation(db: AsyncSession, event: OutboxEvent) -> None:
+    from app.services.escalation_service import escalation_scheduler
+
+    payload = event.payload
+    alert_id = uuid.UUID(payload["alert_id"])
+    if event.event_type == "escalation_end":
+        await escalation_scheduler.remove(alert_id)
+    else:
+        await escalation_scheduler.schedule(
+            alert_id, uuid.UUID(payload["policy_id"]), payload["step"], payload["due_at"]
+        )
+
+
+async def _deliver_mqtt(db: AsyncSession, event: OutboxEvent) -> None:
+    # Only counts as published once the broker has acknowledged it.
+    await mqtt_client.publish_acked(event.payload["topic"], json.dumps(event.payload["command"]))
+
+
+class OutboxService:
+    """Writes outgoing messages into the caller's transaction and relays them.
+
+    Nothing is sent until the transaction that enqueued it commits, and a
+    crash after commit only delays delivery: the relay keeps retrying an event
+    with exponential backoff until a handler accepts it or it runs out of
+    attempts. Delivery is at-least-once, so consumers must tolerate repeats.
+    """
+
+    MAX_ATTEMPTS = 10
+    BASE_BACKOFF_SECONDS = 2
+    MAX_BACKOFF_SECONDS = 600
+
+    handlers: dict[str, Handler] = {
+        OutboxDestination.REDIS.value: _deliver_redis,
+        OutboxDestination.MQTT.value: _deliver_mqtt,
+        OutboxDestination.WEBHOOK.value: _deliver_webhooks,
+        OutboxDestination.DASHBOARD.value: _deliver_dashboard,
+        OutboxDestination.ALERTS.value: _deliver_alerts,
+        OutboxDestination.NOTIFICATIONS.value: _deliver_notification,
+        OutboxDestination.ESCALATION.value: _deliver_escalation,
+    }
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.outbox_repo = OutboxRepository(db)
+
+    def enqueue(
+        self,
+        destination: OutboxDestination,
+        event_type: str,
+        payload: dict,
+        farm_id: uuid.UUID | None = None,
+    ) -> OutboxEvent:
+        event = OutboxEvent(
+            farm_id=farm_id,
+            destination=destination.value,
+            event_type=event_type,
+            payload=payload,
+            attempts=0,
+            available_at=datetime.utcnow(),
+        )
+        self.db.add(event)
+        return event
+
+    def publish(self, farm_id: uuid.UUID, event_type: str, data: dict) -> OutboxEvent:
+        """Queue a farm event for the Redis stream and live channels.
+
+        Event types that integrators can subscribe to are also queued for
+        the farm's webhooks.
+        """
+        if event_type in WEBHOOK_EVENT_TYPES:
+            self.notify_webhooks(farm_id, event_type, data)
+        return self.enqueue(OutboxDestination.REDIS, event_type, data, farm_id)
+
+    def notify_webhooks(self, farm_id: uuid.UUID, event_type: str, data: dict) -> OutboxEvent:
+        return self.enqueue(OutboxDestination.WEBHOOK, event_type, data, farm_id)
+
+    def update_dashboard(self, farm_id: uuid.UUID, ops: list) -> OutboxEvent | None:
+        """Queue ops from ``DashboardReadModel`` for the farm's dashboard document."""
+        if not ops:
+            return None
+        return self.enqueue(OutboxDestination.DASHBOARD, "dashboard", {"ops": ops}, farm_id)
+
+    def evaluate_alerts(
+        self, farm_id: uuid.UUID, sensor_id: uuid.UUID, reading_id: int
+    ) -> OutboxEvent:
+        """Queue a stored reading for evaluation against the farm's alert rules."""
+        return self.enqueue(
+            OutboxDestination.ALERTS,
+            "sensor_reading",
+            {"sensor_id": str(sensor_id), "reading_id": reading_id},
+            farm_id,
+        )
+
+    def notify_user(
+        self, farm_id: uuid.UUID, user_id: uuid.UUID, notification: dict
+    ) -> OutboxEvent:
+        """Queue a notification for the user's inbox."""
+        return self.enqueue(
+            OutboxDestination.NOTIFICATIONS,
+            "inbox",
+            {"user_id": str(user_id), "notification": notification},
+            farm_id,
+        )
+
+    def send_email(
+        self, farm_id: uuid.UUID, to: str, subject: str, body: str, digest: bool = False
+    ) -> OutboxEvent:
+        """Queue an email, optionally for the recipient's digest."""
+        return self.enqueue(
+            OutboxDestination.NOTIFICATIONS,
+            "email",
+            {"to": to, "subject": subject, "body": body, "digest": digest},
+            farm_id,
+        )
+
+    def schedule_escalation(
+        self,
+        farm_id: uuid.UUID | None,
+        alert_id: uuid.UUID,
+        policy_id: uuid.UUID,
+        step_index: int,
+        due_at: float,
+    ) -> OutboxEvent:
+        """Queue an escalation step for the scheduler, replacing the alert's pending one."""
+        return self.enqueue(
+            OutboxDestination.ESCALATION,
+            "escalation_step",
+            {
+                "alert_id": str(alert_id),
+                "policy_id": str(policy_id),
+                "step": step_index,
+                "due_at": due_at,
+            },
+            farm_id,
+        )
+
+    def end_escalation(self, farm_id: uuid.UUID | None, alert_id: uuid.UUID) -> OutboxEvent:
+        """Queue the removal of the alert's pending escalation step."""
+        return self.enqueue(
+            OutboxDestination.ESCALATION, "escalation_end", {"alert_id": str(alert_id)}, farm_id
+        )
+
+    def send_device_command(
+        self, farm_id: uuid.UUID, topic: str, command: dict
+    ) -> OutboxEvent:
+        return self.enqueue(
+            OutboxDestination.MQTT,
+            "device_command",
+            {"topic": topic, "command": command},
+            farm_id,
+        )
+
+    async def has_due(self, now: datetime | None = None) -> bool:
+        """Whether any event is waiting for delivery, so idle relays skip connecting."""
+        return await self.outbox_repo.has_due(now or datetime.utcnow(), self.MAX_ATTEMPTS)
+
+    async def relay_batch(
+        self, limit: int = settings.OUTBOX_BATCH_SIZE, now: datetime | None = None
+    ) -> int:
+        """Deliver up to ``limit`` due events; returns how many were claimed.
+
+        Claimed rows stay locked until the caller commits, so concurrent
+        relays never pick up the same event.
+        """
+        now = now or datetime.utcnow()
+        events = await self.outbox_repo.claim_batch(now, limit, self.MAX_ATTEMPTS)
+        for event in events:
+            handler = self.handlers.get(event.destination)
+            try:
+                if handler is None:
+                    raise RuntimeError(f"No handler for destination {event.destination}")
+                await handler(self.db, event)
+            except Exception as e:
+                event.attempts += 1
+                event.last_error = str(e)[:1000]
+                event.available_at = now + timedelta(seconds=self._backoff(event.attempts))
+                level = logging.ERROR if event.attempts >= self.MAX_ATTEMPTS else logging.WARNING
+                logger.log(level, f"Outbox event {event.id} failed (attempt {event.attempts}): {e}")
+            else:
+                event.published_at = now
+        await self.db.flush()
+        return len(events)
+
+    async def purge_published(self, older_than: timedelta, now: datetime | None = None) -> int:
+        return await self.outbox_repo.purge_published((now or datetime.utcnow()) - older_than)
+
+    @classmethod
+    def _backoff(cls, attempts: int) -> int:
+        return min(cls.BASE_BACKOFF_SECONDS * 2 ** (attempts - 1), cls.MAX_BACKOFF_SECONDS)
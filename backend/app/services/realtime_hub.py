@@ -0,0 +1,184 @@
+"""Per-process fan-out of Redis notifications to WebSocket clients."""
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+
+from app.core import redis_client
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeHub:
+    """Routes pub/sub messages to local client queues by farm.
+
+    Each process holds one Redis subscription however many sockets are open,
+    pattern-subscribed only to the farms that currently have a local socket
+    (or to every farm while an admin view is open). Messages are routed by
+    the pattern that matched and the raw text is handed to every queue for
+    that farm. Sensor readings are the exception: they are decoded once here
+    and queued as dicts for each connection's ``SensorStream`` to coalesce.
+    """
+
+    ALL_FARMS = "*"
+    QUEUE_SIZE = 256
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self):
+        self._queues: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._pubsub = None
+        self._wanted = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def _pattern(cls, farm_id: str) -> str:
+        return NotificationService.farm_pattern(None if farm_id == cls.ALL_FARMS else farm_id)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def subscribe(self, farm_id: str) -> asyncio.Queue:
+        """Register a client queue for ``farm_id`` (or ``ALL_FARMS``)."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        first = farm_id not in self._queues
+        self._queues[farm_id].add(queue)
+        self._wanted.set()
+        if first and self._pubsub is not None:
+            try:
+                await self._pubsub.psubscribe(self._pattern(farm_id))
+            except Exception as e:
+                # The reader resubscribes every wanted farm when it reconnects.
+                logger.error(f"Failed to subscribe to farm {farm_id}: {e}")
+        return queue
+
+    async def unsubscribe(self, farm_id: str, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(farm_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if queues:
+            return
+        del self._queues[farm_id]
+        if not self._queues:
+            self._wanted.clear()
+        if self._pubsub is not None:
+            with contextlib.suppress(Exception):
+                await self._pubsub.punsubscribe(self._pattern(farm_id))
+
+    def dispatch(self, pattern: str, channel: str, raw: str) -> None:
+        queues = self._queues.get(pattern.split(":")[-2])
+        if not queues:
+            return
+        item: str | dict = raw
+        if channel.endswith(f":{NotificationService.CHANNEL_SENSORS}"):
+            try:
+                item = json.loads(raw)
+                item["data"]["sensor_id"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Dropping malformed sensor message on {channel}")
+                return
+        for queue in queues:
+            if queue.full():
+                # A slow client loses its oldest message rather than stalling the reader.
+                queue.get_nowait()
+            queue.put_nowait(item)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wanted.wait()
+            client = redis_client.redis_client
+            if client is None:
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+                continue
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub = pubsub
+            failed = False
+            try:
+                patterns = [self._pattern(farm_id) for farm_id in list(self._queues)]
+                if patterns:
+                    await pubsub.psubscribe(*patterns)
+                    # Ends once the last farm unsubscribes.
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self.dispatch(message["pattern"], message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Realtime subscription failed, reconnecting: {e}")
+                failed = True
+            finally:
+                self._pubsub = None
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+            if failed:
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+
+class SensorStream:
+    """Per-connection coalescer for live sensor readings.
+
+    Keeps only the latest reading per sensor and emits them as one frame at
+    most every ``interval`` seconds, leaving out sensors whose value hasn't
+    changed since they were last sent. The frame carries the ID of the newest
+    event it covers, so clients can resume from it.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        zone_ids: set[str] | None = None,
+        sensor_types: set[str] | None = None,
+    ):
+        self.interval = interval
+        self.zone_ids = zone_ids
+        self.sensor_types = sensor_types
+        self._pending: dict[str, dict] = {}
+        self._pending_id: str | None = None
+        self._sent: dict[str, float] = {}
+        self._last_flush = float("-inf")
+
+    def add(self, event: dict) -> None:
+        """Buffer a ``sensor_reading`` event."""
+        reading = event["data"]
+        self._pending_id = event.get("id")
+        if self.zone_ids is not None and reading.get("zone_id") not in self.zone_ids:
+            return
+        if self.sensor_types is not None and reading.get("sensor_type") not in self.sensor_types:
+            return
+        self._pending[reading["sensor_id"]] = reading
+
+    def seconds_until_flush(self, now: float) -> float | None:
+        """Time until the next frame is due, or None if nothing is pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self._last_flush + self.interval - now)
+
+    def flush(self, now: float) -> str | None:
+        if not self._pending or now < self._last_flush + self.interval:
+            return None
+        changed = [
+            reading
+            for sensor_id, reading in self._pending.items()
+            if self._sent.get(sensor_id) != reading["value"]
+        ]
+        event_id = self._pending_id
+        self._pending.clear()
+        self._last_flush = now
+        if not changed:
+            return None
+        for reading in changed:
+            self._sent[reading["sensor_id"]] = reading["value"]
+        return json.dumps({"type": "sensor_readings", "id": event_id, "data": changed})
+
+
+realtime_hub = RealtimeHub()
@@ -3,10 +3,17 @@ from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import NotFoundException
+from app.core.config import settings
+from app.core.constants import VersionedEntity
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.response_versions import ResponseVersions
 from app.models.sensor import Sensor, SensorReading
 from app.repositories.sensor_repo import SensorRepository, SensorReadingRepository
 from app.schemas.sensor import SensorSummaryResponse
+from app.services.anomaly_detector import AnomalyState
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
+from app.services.virtual_sensors import VIRTUAL_FORMULAS
 
 
 class SensorService:
@@ -14,10 +21,13 @@ class SensorService:
         self.db = db
         self.sensor_repo = SensorRepository(db)
         self.reading_repo = SensorReadingRepository(db)
+        self.outbox = OutboxService(db)
 
     async def create_sensor(self, farm_id: uuid.UUID, data: dict) -> Sensor:
         data["farm_id"] = farm_id
-        return await self.sensor_repo.create(data)
+        sensor = await self.sensor_repo.create(data)
+        self._sensor_changed(sensor)
+        return sensor
 
     async def get_sensor(self, sensor_id: uuid.UUID) -> Sensor:
         sensor = await self.sensor_repo.get_by_id(sensor_id)
@@ -29,12 +39,27 @@ class SensorService:
         sensor = await self.sensor_repo.update(sensor_id, data)
         if not sensor:
             raise NotFoundException(detail="Sensor not found")
+        self._sensor_changed(sensor)
         return sensor
 
     async def delete_sensor(self, sensor_id: uuid.UUID) -> None:
         sensor = await self.sensor_repo.update(sensor_id, {"is_active": False})
         if not sensor:
             raise NotFoundException(detail="Sensor not found")
+        self._sensor_changed(sensor)
+
+    def _sensor_changed(self, sensor: Sensor) -> None:
+        ResponseVersions.touch(self.db, sensor.farm_id, VersionedEntity.SENSORS)
+        self.outbox.update_dashboard(
+            sensor.farm_id,
+            DashboardReadModel.sensor_changed(
+                sensor.id,
+                sensor.sensor_type,
+                sensor.last_value,
+                sensor.last_reading_at,
+                active=sensor.is_active,
+            ),
+        )
 
     async def list_sensors(
         self,
@@ -47,17 +72,94 @@ class SensorService:
     async def record_reading(
         self, sensor_id: uuid.UUID, data: dict
     ) -> SensorReading:
-        sensor = await self.get_sensor(sensor_id)
-        data["sensor_id"] = sensor_id
+        # The anomaly baseline is read, updated and written back on the sensor
+        # row; the lock keeps concurrent readings from losing each other's update.
+        locked = await self.sensor_repo.lock([sensor_id])
+        if not locked:
+            raise NotFoundException(detail="Sensor not found")
+        sensor = locked[0]
+        if sensor.virtual_formula:
+            raise BadRequestException(detail="Virtual sensor values are derived from their inputs")
+        reading = await self._store_reading(sensor, data)
+        updated = [(sensor, reading)]
+        if sensor.zone_id is not None:
+            updated.extend(await self._update_virtual_sensors(sensor, reading))
+        for s, r in updated:
+            self.outbox.publish(sensor.farm_id, "sensor_reading", self._reading_event(s, r))
+            self.outbox.evaluate_alerts(sensor.farm_id, s.id, r.id)
+        # The dashboard's version moves when the reading reaches its read model.
+        ResponseVersions.touch(self.db, sensor.farm_id, VersionedEntity.SENSORS)
+        return reading
+
+    @staticmethod
+    def _reading_event(sensor: Sensor, reading: SensorReading) -> dict:
+        return {
+            "sensor_id": str(sensor.id),
+            "zone_id": str(sensor.zone_id) if sensor.zone_id else None,
+            "sensor_type": sensor.sensor_type,
+            "value": float(reading.value),
+            "anomaly_score": (
+                float(reading.anomaly_score) if reading.anomaly_score is not None else None
+            ),
+            "recorded_at": reading.recorded_at.isoformat(),
+        }
+
+    async def _store_reading(self, sensor: Sensor, data: dict) -> SensorReading:
+        data["sensor_id"] = sensor.id
+
+        # Score against the sensor's running baseline; the state rides along
+        # on the sensor row update this method already does.
+        anomaly = AnomalyState.from_dict(sensor.anomaly_state)
+        data["anomaly_score"] = anomaly.update(
+            float(data["value"]), data["recorded_at"].hour
+        )
 
         reading = await self.reading_repo.create_reading(data)
 
         sensor.last_value = reading.value
         sensor.last_reading_at = reading.recorded_at
+        sensor.anomaly_state = anomaly.to_dict()
         await self.db.flush()
 
         return reading
 
+    async def _update_virtual_sensors(
+        self, source: Sensor, reading: SensorReading
+    ) -> list[tuple[Sensor, SensorReading]]:
+        """Recompute the zone's virtual sensors that take ``source`` as an input.
+
+        Other inputs come from each sensor's ``last_value``, so this costs one
+        zone lookup instead of a join over ``sensor_readings``.
+        """
+        zone_sensors = await self.sensor_repo.get_farm_sensors(source.farm_id, source.zone_id)
+        virtual_sensors = [s for s in zone_sensors if s.virtual_formula]
+        if not virtual_sensors:
+            return []
+        # Their formula state is read-modify-write too.
+        virtual_sensors = await self.sensor_repo.lock([s.id for s in virtual_sensors])
+
+        latest = SensorRepository.latest_by_type(
+            [s for s in zone_sensors if not s.virtual_formula]
+        )
+        inputs = {sensor_type: float(s.last_value) for sensor_type, s in latest.items()}
+        inputs[source.sensor_type] = float(reading.value)
+
+        derived = []
+        for virtual in virtual_sensors:
+            formula = VIRTUAL_FORMULAS.get(virtual.virtual_formula)
+            if formula is None or source.sensor_type not in formula.input_types(virtual):
+                continue
+            state = dict(virtual.virtual_state or {})
+            value = formula.compute(virtual, inputs, state, reading.recorded_at)
+            virtual.virtual_state = state
+            if value is None:
+                continue
+            derived_reading = await self._store_reading(
+                virtual, {"value": value, "recorded_at": reading.recorded_at}
+            )
+            derived.append((virtual, derived_reading))
+        return derived
+
     async def get_readings(
         self,
         sensor_id: uuid.UUID,
@@ -72,8 +174,11 @@ class SensorService:
         summaries = []
         for sensor in sensors:
             status = "normal"
+            anomaly_score = (sensor.anomaly_state or {}).get("last_score")
             if sensor.last_value is None:
                 status = "no_data"
+            elif anomaly_score is not None and abs(anomaly_score) >= settings.ANOMALY_SCORE_THRESHOLD:
+                status = "anomaly"
             summaries.append(
                 SensorSummaryResponse(
                     sensor_id=sensor.id,
@@ -81,6 +186,7 @@ class SensorService:
                     name=sensor.name,
                     latest_value=float(sensor.last_value) if sensor.last_value else None,
                     latest_reading_at=sensor.last_reading_at,
+                    anomaly_score=anomaly_score,
                     status=status,
                     zone_name=sensor.zone.name if sensor.zone else None,
                 )
@@ -1,20 +1,26 @@
 """Task management service."""
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 
 from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.constants import TaskStatus, TaskPriority
+from app.core.constants import CountMode, TaskStatus, TaskPriority, VersionedEntity
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.response_versions import ResponseVersions
 from app.models.task import Task, TaskPhoto
+from app.repositories.base import BaseRepository, Page
 from app.schemas.task import TaskCreate, TaskUpdate, TaskStatusUpdate
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.outbox_service import OutboxService
 
 
 class TaskService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.task_repo = BaseRepository(Task, db)
+        self.outbox = OutboxService(db)
 
     async def create_task(self, data: TaskCreate, created_by: UUID) -> Task:
         task = Task(
@@ -25,7 +31,7 @@ class TaskService:
         )
         self.db.add(task)
         await self.db.flush()
-        await self.db.refresh(task)
+        self._task_changed(task, None)
         return task
 
     async def get_task(self, task_id: UUID) -> Task:
@@ -47,36 +53,33 @@ class TaskService:
         status: TaskStatus | None = None,
         priority: TaskPriority | None = None,
         assigned_to: UUID | None = None,
-    ) -> tuple[list[Task], int]:
+        cursor: str | None = None,
+        count: CountMode = CountMode.EXACT,
+    ) -> Page[Task]:
         query = select(Task).where(Task.farm_id == farm_id)
-        count_query = select(func.count()).select_from(Task).where(Task.farm_id == farm_id)
 
         if status:
             query = query.where(Task.status == status)
-            count_query = count_query.where(Task.status == status)
         if priority:
             query = query.where(Task.priority == priority)
-            count_query = count_query.where(Task.priority == priority)
         if assigned_to:
             query = query.where(Task.assigned_to_id == assigned_to)
-            count_query = count_query.where(Task.assigned_to_id == assigned_to)
 
-        total = (await self.db.execute(count_query)).scalar()
-        result = await self.db.execute(
-            query.options(selectinload(Task.photos))
-            .order_by(Task.due_date.asc().nullslast(), Task.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+        return await self.task_repo.get_page(
+            query.options(selectinload(Task.photos)),
+            limit=limit, skip=skip, cursor=cursor, count=count,
+            # Soonest due first, undated tasks last.
+            order_by=[(func.coalesce(Task.due_date, date.max), False), (Task.created_at, True)],
         )
-        return list(result.scalars().all()), total
 
     async def update_task(self, task_id: UUID, data: TaskUpdate) -> Task:
         task = await self.get_task(task_id)
+        before = (task.status, task.due_date)
         update_data = data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(task, key, value)
         await self.db.flush()
-        await self.db.refresh(task)
+        self._task_changed(task, before)
         return task
 
     async def update_status(self, task_id: UUID, data: TaskStatusUpdate, user_id: UUID) -> Task:
@@ -102,6 +105,7 @@ class TaskService:
             if photo_count.scalar() == 0:
                 raise BadRequestException("Photo proof is required to complete this task")
 
+        before = (task.status, task.due_date)
         task.status = data.status
         if data.status == TaskStatus.COMPLETED:
             task.completed_at = datetime.utcnow()
@@ -110,11 +114,11 @@ class TaskService:
             task.notes = data.notes
 
         await self.db.flush()
-        await self.db.refresh(task)
+        self._task_changed(task, before)
         return task
 
     async def add_photo(self, task_id: UUID, photo_url: str, uploaded_by: UUID) -> TaskPhoto:
-        await self.get_task(task_id)
+        task = await self.get_task(task_id)
         photo = TaskPhoto(
             task_id=task_id,
             photo_url=photo_url,
@@ -122,16 +126,26 @@ class TaskService:
         )
         self.db.add(photo)
         await self.db.flush()
-        await self.db.refresh(photo)
+        ResponseVersions.touch(self.db, task.farm_id, VersionedEntity.TASKS)
         return photo
 
     async def delete_task(self, task_id: UUID) -> None:
         task = await self.get_task(task_id)
         if task.status == TaskStatus.IN_PROGRESS:
             raise BadRequestException("Cannot delete an in-progress task")
+        self.outbox.update_dashboard(
+            task.farm_id, DashboardReadModel.task_changed((task.status, task.due_date), None)
+        )
+        ResponseVersions.touch(self.db, task.farm_id, VersionedEntity.TASKS)
         await self.db.delete(task)
         await self.db.flush()
 
+    def _task_changed(self, task: Task, before: tuple | None) -> None:
+        self.outbox.update_dashboard(
+            task.farm_id, DashboardReadModel.task_changed(before, (task.status, task.due_date))
+        )
+        ResponseVersions.touch(self.db, task.farm_id, VersionedEntity.TASKS)
+
     async def count_pending_tasks(self, farm_id: UUID) -> int:
         result = await self.db.execute(
             select(func.count())
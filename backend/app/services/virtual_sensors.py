@@ -0,0 +1,91 @@
+"""Formulas for virtual sensors derived from other sensors in the same zone."""
+import math
+from datetime import datetime
+
+from app.core.constants import SensorType
+from app.models.sensor import Sensor
+
+
+def vapor_pressure_deficit(temperature_c: float, humidity_pct: float) -> float:
+    """Air VPD in kPa (Tetens equation)."""
+    saturation = 0.6108 * math.exp(17.27 * temperature_c / (temperature_c + 237.3))
+    return saturation * (1 - humidity_pct / 100)
+
+
+class VirtualFormula:
+    name: str = ""
+
+    def input_types(self, sensor: Sensor) -> set[str]:
+        raise NotImplementedError
+
+    def compute(
+        self, sensor: Sensor, inputs: dict[str, float], state: dict, recorded_at: datetime
+    ) -> float | None:
+        """Return the derived value, or None if inputs are missing.
+
+        ``inputs`` maps sensor type to the zone's latest value; ``state`` is
+        the virtual sensor's persisted scratch space and may be mutated.
+        """
+        raise NotImplementedError
+
+
+class VpdFormula(VirtualFormula):
+    name = "vpd"
+
+    def input_types(self, sensor: Sensor) -> set[str]:
+        return {SensorType.TEMPERATURE.value, SensorType.HUMIDITY.value}
+
+    def compute(self, sensor, inputs, state, recorded_at):
+        temperature = inputs.get(SensorType.TEMPERATURE.value)
+        humidity = inputs.get(SensorType.HUMIDITY.value)
+        if temperature is None or humidity is None:
+            return None
+        return round(vapor_pressure_deficit(temperature, humidity), 4)
+
+
+class DliFormula(VirtualFormula):
+    """Daily light integral (mol/m²/day) integrated from PPFD readings."""
+
+    name = "dli"
+
+    def input_types(self, sensor: Sensor) -> set[str]:
+        return {SensorType.LIGHT.value}
+
+    def compute(self, sensor, inputs, state, recorded_at):
+        ppfd = inputs.get(SensorType.LIGHT.value)
+        if ppfd is None:
+            return None
+        day = recorded_at.date().isoformat()
+        timestamp = recorded_at.timestamp()
+        if state.get("day") != day:
+            state.update(day=day, total=0.0, last_ts=None, last_ppfd=None)
+        if state["last_ts"] is not None and timestamp > state["last_ts"]:
+            # Trapezoidal rule; µmol -> mol.
+            seconds = timestamp - state["last_ts"]
+            state["total"] += (state["last_ppfd"] + ppfd) / 2 * seconds / 1_000_000
+        state["last_ts"] = timestamp
+        state["last_ppfd"] = ppfd
+        return round(state["total"], 4)
+
+
+class RatioFormula(VirtualFormula):
+    """Ratio of two sensor types named in the sensor's metadata."""
+
+    name = "ratio"
+
+    def input_types(self, sensor: Sensor) -> set[str]:
+        metadata = sensor.sensor_metadata or {}
+        return {metadata.get("numerator"), metadata.get("denominator")} - {None}
+
+    def compute(self, sensor, inputs, state, recorded_at):
+        metadata = sensor.sensor_metadata or {}
+        numerator = inputs.get(metadata.get("numerator"))
+        denominator = inputs.get(metadata.get("denominator"))
+        if numerator is None or not denominator:
+            return None
+        return round(numerator / denominator, 4)
+
+
+VIRTUAL_FORMULAS: dict[str, VirtualFormula] = {
+    formula.name: formula for formula in (VpdFormula(), DliFormula(), RatioFormula())
+}
@@ -5,15 +5,17 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.constants import AnalysisStatus, AnomalyType
+from app.core.constants import AnalysisStatus, AnomalyType, CountMode
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.models.vision import PlantScan, AnomalyDetection
+from app.repositories.base import BaseRepository, Page
 from app.schemas.vision import PlantScanCreate
 
 
 class VisionService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.scan_repo = BaseRepository(PlantScan, db)
 
     async def create_scan(self, data: PlantScanCreate, scanned_by: UUID) -> PlantScan:
         scan = PlantScan(
@@ -23,7 +25,6 @@ class VisionService:
         )
         self.db.add(scan)
         await self.db.flush()
-        await self.db.refresh(scan)
         return scan
 
     async def get_scan(self, scan_id: UUID) -> PlantScan:
@@ -43,22 +44,18 @@ class VisionService:
         skip: int = 0,
         limit: int = 20,
         crop_cycle_id: UUID | None = None,
-    ) -> tuple[list[PlantScan], int]:
+        cursor: str | None = None,
+        count: CountMode = CountMode.EXACT,
+    ) -> Page[PlantScan]:
         query = select(PlantScan).where(PlantScan.farm_id == farm_id)
-        count_q = select(func.count()).select_from(PlantScan).where(PlantScan.farm_id == farm_id)
 
         if crop_cycle_id:
             query = query.where(PlantScan.crop_cycle_id == crop_cycle_id)
-            count_q = count_q.where(PlantScan.crop_cycle_id == crop_cycle_id)
 
-        total = (await self.db.execute(count_q)).scalar()
-        result = await self.db.execute(
-            query.options(selectinload(PlantScan.anomalies))
-            .order_by(PlantScan.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+        return await self.scan_repo.get_page(
+            query.options(selectinload(PlantScan.anomalies)),
+            limit=limit, skip=skip, cursor=cursor, count=count,
         )
-        return list(result.scalars().all()), total
 
     async def update_analysis_result(
         self,
@@ -74,7 +71,6 @@ class VisionService:
         if health_score is not None:
             scan.health_score = health_score
         await self.db.flush()
-        await self.db.refresh(scan)
         return scan
 
     async def add_anomaly(
@@ -95,7 +91,6 @@ class VisionService:
         )
         self.db.add(anomaly)
         await self.db.flush()
-        await self.db.refresh(anomaly)
         return anomaly
 
     async def get_anomaly_stats(self, farm_id: UUID) -> list[dict]:
@@ -0,0 +1,323 @@
+"""Outbound webhooks for farm events.
+
+The outbox relay fans each webhook-eligible event out into one
+``WebhookDelivery`` row per subscribed endpoint. The webhook worker
+(``app.webhook_worker``) leases due rows in batches and posts them, outside
+any transaction, through a single shared HTTP client, capping in-flight
+requests per endpoint so one slow integrator can't take every connection. Failures retry with jittered
+exponential backoff; a delivery that runs out of attempts moves to the
+dead-letter table, from which it can be redelivered.
+
+Endpoints may only be on public addresses (``webhook_targets``): URLs are
+checked when saved and each connection is checked when opened. Redirects are
+not followed, and a failure is recorded by status code or error type only, so
+nothing an endpoint returns is stored.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import secrets
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import NotFoundException, ValidationException
+from app.models.outbox import OutboxEvent
+from app.models.webhook import WebhookDeadLetter, WebhookDelivery, WebhookEndpoint
+from app.repositories.webhook_repo import (
+    WebhookDeadLetterRepository,
+    WebhookDeliveryRepository,
+    WebhookEndpointRepository,
+)
+from app.services.webhook_targets import (
+    PublicAddressBackend,
+    UnsafeWebhookTarget,
+    resolve_public,
+)
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-GreenOS-Signature"
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """``t=<unix time>,v1=<hex HMAC-SHA256 of "<t>.<body>">``.
+
+    Receivers recompute the HMAC with their secret and reject stale
+    timestamps to stop replays.
+    """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256)
+    return f"t={timestamp},v1={digest.hexdigest()}"
+
+
+def create_webhook_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        ),
+    )
+    # httpx doesn't take httpcore's network_backend; every connection the
+    # pool opens goes through it.
+    transport._pool._network_backend = PublicAddressBackend()
+    return httpx.AsyncClient(
+        transport=transport,
+        # No proxies from the environment: they would connect for us, unchecked.
+        trust_env=False,
+        follow_redirects=False,
+        timeout=httpx.Timeout(settings.WEBHOOK_TIMEOUT_SECONDS),
+        headers={"User-Agent": f"{settings.APP_NAME}-Webhooks/1.0"},
+    )
+
+
+@dataclass
+class DeliveryResult:
+    ok: bool
+    status: int | None = None
+    error: str | None = None
+
+
+class WebhookDispatcher:
+    """Posts deliveries over a shared client with a per-endpoint concurrency cap."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self._limits: dict[uuid.UUID, tuple[int, asyncio.Semaphore]] = {}
+
+    def _limit(self, endpoint: WebhookEndpoint) -> asyncio.Semaphore:
+        size, semaphore = self._limits.get(endpoint.id, (None, None))
+        if size != endpoint.max_concurrency:
+            semaphore = asyncio.Semaphore(endpoint.max_concurrency)
+            self._limits[endpoint.id] = (endpoint.max_concurrency, semaphore)
+        return semaphore
+
+    async def deliver(self, delivery: WebhookDelivery) -> DeliveryResult:
+        endpoint = delivery.endpoint
+        body = json.dumps(
+            {
+                "id": str(delivery.event_id),
+                "type": delivery.event_type,
+                "farm_id": str(endpoint.farm_id),
+                "data": delivery.payload,
+            }
+        ).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "X-GreenOS-Event": delivery.event_type,
+            "X-GreenOS-Delivery": str(delivery.event_id),
+            SIGNATURE_HEADER: sign(endpoint.secret, int(time.time()), body),
+        }
+        async with self._limit(endpoint):
+            try:
+                response = await self.client.post(
+                    endpoint.url, content=body, headers=headers, follow_redirects=False
+                )
+            except UnsafeWebhookTarget as e:
+                return DeliveryResult(ok=False, error=str(e))
+            except httpx.HTTPError as e:
+                return DeliveryResult(ok=False, error=type(e).__name__)
+        if response.is_success:
+            return DeliveryResult(ok=True, status=response.status_code)
+        return DeliveryResult(
+            ok=False, status=response.status_code, error=f"HTTP {response.status_code}"
+        )
+
+
+class WebhookService:
+    BASE_BACKOFF_SECONDS = 10
+    MAX_BACKOFF_SECONDS = 3600
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.endpoint_repo = WebhookEndpointRepository(db)
+        self.delivery_repo = WebhookDeliveryRepository(db)
+        self.dead_letter_repo = WebhookDeadLetterRepository(db)
+
+    # Endpoints
+    async def create_endpoint(self, farm_id: uuid.UUID, data: dict) -> WebhookEndpoint:
+        await self._check_url(data["url"])
+        data["farm_id"] = farm_id
+        data["secret"] = secrets.token_hex(32)
+        return await self.endpoint_repo.create(data)
+
+    async def get_endpoint(self, farm_id: uuid.UUID, endpoint_id: uuid.UUID) -> WebhookEndpoint:
+        endpoint = await self.endpoint_repo.get_by_id(endpoint_id)
+        if not endpoint or endpoint.farm_id != farm_id:
+            raise NotFoundException(detail="Webhook endpoint not found")
+        return endpoint
+
+    async def update_endpoint(
+        self, farm_id: uuid.UUID, endpoint_id: uuid.UUID, data: dict
+    ) -> WebhookEndpoint:
+        await self.get_endpoint(farm_id, endpoint_id)
+        if data.get("url") is not None:
+            await self._check_url(data["url"])
+        return await self.endpoint_repo.update(endpoint_id, data)
+
+    async def delete_endpoint(self, farm_id: uuid.UUID, endpoint_id: uuid.UUID) -> None:
+        await self.get_endpoint(farm_id, endpoint_id)
+        await self.endpoint_repo.delete(endpoint_id)
+
+    async def list_endpoints(self, farm_id: uuid.UUID) -> list[WebhookEndpoint]:
+        return await self.endpoint_repo.get_multi(limit=100, farm_id=farm_id)
+
+    @staticmethod
+    async def _check_url(url: str) -> None:
+        parts = urlsplit(url)
+        try:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            await resolve_public(parts.hostname or "", port)
+        except UnsafeWebhookTarget as e:
+            raise ValidationException(detail=f"Webhook URL not allowed: {e}") from None
+
+    # Dead letters
+    async def list_dead_letters(
+        self, farm_id: uuid.UUID, endpoint_id: uuid.UUID
+    ) -> list[WebhookDeadLetter]:
+        await self.get_endpoint(farm_id, endpoint_id)
+        return await self.dead_letter_repo.get_multi(limit=100, endpoint_id=endpoint_id)
+
+    async def redeliver(
+        self, farm_id: uuid.UUID, endpoint_id: uuid.UUID, dead_letter_id: uuid.UUID
+    ) -> WebhookDelivery:
+        await self.get_endpoint(farm_id, endpoint_id)
+        dead = await self.dead_letter_repo.get_by_id(dead_letter_id)
+        if not dead or dead.endpoint_id != endpoint_id:
+            raise NotFoundException(detail="Dead letter not found")
+        delivery = WebhookDelivery(
+            endpoint_id=endpoint_id,
+            event_id=dead.event_id,
+            event_type=dead.event_type,
+            payload=dead.payload,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        self.db.add(delivery)
+        await self.db.delete(dead)
+        await self.db.flush()
+        return delivery
+
+    # Delivery
+    async def fan_out(self, event: OutboxEvent) -> int:
+        """Queue a delivery of ``event`` to every endpoint subscribed to it."""
+        endpoints = await self.endpoint_repo.get_subscribed(event.farm_id, event.event_type)
+        for endpoint in endpoints:
+            self.db.add(
+                WebhookDelivery(
+                    endpoint_id=endpoint.id,
+                    event_id=event.id,
+                    event_type=event.event_type,
+                    payload=event.payload,
+                    attempts=0,
+                    next_attempt_at=datetime.utcnow(),
+                )
+            )
+        return len(endpoints)
+
+    async def claim_due(
+        self, limit: int = settings.WEBHOOK_BATCH_SIZE, now: datetime | None = None
+    ) -> list[WebhookDelivery]:
+        """Lease up to ``limit`` due deliveries to the caller.
+
+        A leased delivery isn't due again for ``WEBHOOK_LEASE_SECONDS``, so
+        once the caller commits, other workers leave it alone without a lock
+        being held; if the caller dies, it is retried when the lease expires.
+        """
+        now = now or datetime.utcnow()
+        deliveries = await self.delivery_repo.claim_due(now, limit)
+        lease_until = now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+        for delivery in deliveries:
+            delivery.next_attempt_at = lease_until
+        await self.db.flush()
+        return deliveries
+
+    async def record_results(
+        self,
+        results: list[tuple[uuid.UUID, DeliveryResult]],
+        now: datetime | None = None,
+    ) -> None:
+        """Delete delivered rows and schedule or dead-letter failed ones, by delivery id."""
+        now = now or datetime.utcnow()
+        locked = await self.delivery_repo.lock_by_ids([i for i, _ in results])
+        deliveries = {d.id: d for d in locked}
+        for delivery_id, result in results:
+            delivery = deliveries.get(delivery_id)
+            if delivery is None:
+                # Its endpoint was deleted meanwhile.
+                continue
+            if result.ok:
+                await self.db.delete(delivery)
+            else:
+                await self._record_failure(delivery, result, now)
+        await self.db.flush()
+
+    async def _record_failure(
+        self, delivery: WebhookDelivery, result: DeliveryResult, now: datetime
+    ) -> None:
+        delivery.attempts += 1
+        delivery.last_status = result.status
+        delivery.last_error = result.error
+        if delivery.attempts < settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.next_attempt_at = now + timedelta(seconds=self._backoff(delivery.attempts))
+            return
+        logger.warning(
+            f"Webhook delivery {delivery.event_id} to endpoint {delivery.endpoint_id} "
+            f"dead-lettered after {delivery.attempts} attempts"
+        )
+        self.db.add(
+            WebhookDeadLetter(
+                endpoint_id=delivery.endpoint_id,
+                event_id=delivery.event_id,
+                event_type=delivery.event_type,
+                payload=delivery.payload,
+                attempts=delivery.attempts,
+                last_status=result.status,
+                last_error=result.error,
+            )
+        )
+        await self.db.delete(delivery)
+
+    @classmethod
+    def _backoff(cls, attempts: int) -> float:
+        # Half fixed, half random, so endpoints recovering from an outage
+        # aren't hit by every retry at once.
+        delay = min(cls.BASE_BACKOFF_SECONDS * 2 ** (attempts - 1), cls.MAX_BACKOFF_SECONDS)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+async def deliver_due(
+    dispatcher: WebhookDispatcher,
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+    limit: int = settings.WEBHOOK_BATCH_SIZE,
+    now: datetime | None = None,
+) -> int:
+    """Send one batch of due deliveries concurrently; returns how many were claimed.
+
+    The batch is leased and committed first and the results are recorded in a
+    second short transaction, so no rows stay locked and no transaction stays
+    open while the HTTP requests are in flight.
+    """
+    now = now or datetime.utcnow()
+    async with session_factory() as session:
+        deliveries = await WebhookService(session).claim_due(limit, now)
+        await session.commit()
+    if not deliveries:
+        return 0
+    results = await asyncio.gather(*(dispatcher.deliver(d) for d in deliveries))
+    async with session_factory() as session:
+        await WebhookService(session).record_results(
+            [(d.id, result) for d, result in zip(deliveries, results)], now
+        )
+        await session.commit()
+    return len(deliveries)
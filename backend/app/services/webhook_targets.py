@@ -0,0 +1,90 @@
+"""Where webhooks may be sent: only hosts on public addresses.
+
+Webhook URLs are chosen by users but requested from inside our network, so a
+URL naming a private, loopback or link-local address (the cloud metadata
+service among them) would let anyone with a farm probe internal services.
+URLs are checked when an endpoint is registered, and every connection the
+webhook client opens resolves the host again and refuses non-public
+addresses, so a name re-pointed after registration (DNS rebinding) is caught
+at send time too.
+"""
+import asyncio
+import ipaddress
+import socket
+import typing
+
+import httpcore
+
+
+class UnsafeWebhookTarget(ValueError):
+    """The host is, or resolves to, an address webhooks may not reach."""
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_host(host: str) -> None:
+    """Reject hosts that are unsafe without a DNS lookup: local names and IP literals."""
+    host = host.strip("[]").rstrip(".").lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        raise UnsafeWebhookTarget(f"{host} is not a public host")
+    try:
+        public = is_public_address(host)
+    except ValueError:
+        return
+    if not public:
+        raise UnsafeWebhookTarget(f"{host} is not a public address")
+
+
+async def resolve_public(host: str, port: int) -> list[str]:
+    """The host's addresses, if every one of them is public."""
+    check_host(host)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host.strip("[]"), port, type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise UnsafeWebhookTarget(f"{host} does not resolve") from e
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses or not all(is_public_address(a) for a in addresses):
+        raise UnsafeWebhookTarget(f"{host} resolves to a non-public address")
+    return addresses
+
+
+class PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """Connects only to public addresses, checked when the connection is opened.
+
+    TLS still verifies the certificate against the URL's host name, since
+    httpcore takes the server name from the request rather than from the
+    address connected to.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend | None = None):
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options: typing.Iterable | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        [address, *_] = await resolve_public(host, port)
+        return await self.backend.connect_tcp(
+            address,
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+    async def connect_unix_socket(self, path: str, **kwargs) -> httpcore.AsyncNetworkStream:
+        raise UnsafeWebhookTarget("Webhooks are only sent over TCP")
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
@@ -1,55 +1,32 @@
 """Celery tasks for alert processing."""
-import asyncio
 import logging
 from uuid import UUID
 
-from app.core.celery_app import celery_app
+from app.core.celery_app import celery_app, run_async
 from app.core.database import async_session_factory
 from app.services.alert_service import AlertService
-from app.services.notification_service import NotificationService
-from app.schemas.sensor import SensorReadingCreate
+from app.services.incident_service import IncidentService
+from app.services.outbox_service import OutboxService
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Helper to run async code in synchronous Celery tasks."""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(name="tasks.evaluate_sensor_reading", queue="alerts")
-def evaluate_sensor_reading(sensor_id: str, value: float, sensor_type: str, farm_id: str):
-    """Evaluate a sensor reading against alert rules."""
+def evaluate_sensor_reading(sensor_id: str, reading_id: int):
+    """Evaluate a stored sensor reading against alert rules.
+
+    Ingestion queues every reading for evaluation through the outbox; this
+    task re-runs that evaluation for one reading on demand.
+    """
 
     async def _evaluate():
         async with async_session_factory() as session:
             try:
-                service = AlertService(session)
-                alerts = await service.evaluate_reading(
-                    sensor_id=UUID(sensor_id),
-                    value=value,
-                    sensor_type=sensor_type,
-                    farm_id=UUID(farm_id),
+                alerts = await AlertService(session).evaluate_stored_reading(
+                    UUID(sensor_id), reading_id
                 )
                 await session.commit()
 
-                # Publish notifications for triggered alerts
-                for alert in alerts:
-                    await NotificationService.publish_alert(
-                        UUID(farm_id),
-                        {
-                            "alert_id": str(alert.id),
-                            "sensor_type": sensor_type,
-                            "triggered_value": value,
-                            "severity": alert.severity if hasattr(alert, "severity") else "warning",
-                            "message": alert.message if hasattr(alert, "message") else f"Alert triggered for {sensor_type}",
-                        },
-                    )
-
                 logger.info(f"Evaluated sensor {sensor_id}: {len(alerts)} alerts triggered")
                 return len(alerts)
             except Exception as e:
@@ -80,13 +57,15 @@ def check_stale_sensors():
                 )
             )
             stale_sensors = result.scalars().all()
+            outbox = OutboxService(session)
             for sensor in stale_sensors:
                 logger.warning(
                     f"Stale sensor detected: {sensor.id} ({sensor.sensor_type}), "
                     f"last reading: {sensor.last_reading_at}"
                 )
-                await NotificationService.publish_alert(
+                outbox.publish(
                     sensor.farm_id,
+                    "alert",
                     {
                         "type": "stale_sensor",
                         "sensor_id": str(sensor.id),
@@ -94,11 +73,50 @@ def check_stale_sensors():
                         "last_reading_at": sensor.last_reading_at.isoformat() if sensor.last_reading_at else None,
                     },
                 )
+            await session.commit()
             return len(stale_sensors)
 
     return run_async(_check())
 
 
+@celery_app.task(name="tasks.close_stale_incidents", queue="alerts")
+def close_stale_incidents():
+    """Close alert incidents that have gone quiet and send their final rollups."""
+
+    async def _close():
+        from datetime import datetime
+
+        async with async_session_factory() as session:
+            service = IncidentService(session)
+            needs_rollup = await service.close_stale_incidents(datetime.utcnow())
+            outbox = OutboxService(session)
+            for incident in needs_rollup:
+                outbox.publish(
+                    incident.farm_id, "incident_rollup", IncidentService.rollup_payload(incident)
+                )
+            await session.commit()
+            logger.info(f"Closed stale incidents, {len(needs_rollup)} final rollups sent")
+            return len(needs_rollup)
+
+    return run_async(_close())
+
+
+@celery_app.task(name="tasks.run_escalations", queue="alerts")
+def run_escalations():
+    """Execute due escalation steps for unacknowledged alerts."""
+
+    async def _run():
+        from app.services.escalation_service import EscalationService
+
+        async with async_session_factory() as session:
+            executed = await EscalationService(session).run_due()
+            await session.commit()
+            logger.info(f"Executed {executed} escalation steps")
+            return executed
+
+    return run_async(_run())
+
+
 @celery_app.task(name="tasks.cleanup_old_alerts", queue="alerts")
 def cleanup_old_alerts(days: int = 90):
     """Archive/delete alerts older than specified days."""
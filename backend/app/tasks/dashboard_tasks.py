@@ -0,0 +1,40 @@
+"""Celery tasks maintaining the Redis dashboard read model."""
+import logging
+
+from sqlalchemy import select
+
+from app.core.celery_app import celery_app, run_async
+from app.core.database import async_session_factory
+from app.models.farm import Farm
+from app.services.dashboard_read_model import DashboardReadModel
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="tasks.reconcile_dashboards", queue="default")
+def reconcile_dashboards():
+    """Rebuild every active farm's dashboard from the database, fixing drift."""
+
+    async def _reconcile():
+        async with async_session_factory() as session:
+            farm_ids = (
+                await session.execute(select(Farm.id).where(Farm.is_active.is_(True)))
+            ).scalars().all()
+        drifted = 0
+        for farm_id in farm_ids:
+            try:
+                async with async_session_factory() as session:
+                    before = await DashboardReadModel.get(farm_id)
+                    after = await DashboardReadModel.rebuild(session, farm_id)
+            except Exception as e:
+                logger.error(f"Failed to reconcile dashboard for farm {farm_id}: {e}")
+                continue
+            if before is not None and {**before, "generated_at": None} != {
+                **after, "generated_at": None
+            }:
+                drifted += 1
+                logger.warning(f"Dashboard for farm {farm_id} had drifted and was rebuilt")
+        logger.info(f"Reconciled {len(farm_ids)} dashboards, {drifted} had drifted")
+        return drifted
+
+    return run_async(_reconcile())
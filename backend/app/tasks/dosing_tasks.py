@@ -1,23 +1,14 @@
 """Celery tasks for automated dosing."""
-import asyncio
 import logging
 from uuid import UUID
 
-from app.core.celery_app import celery_app
+from app.core.celery_app import celery_app, run_async
 from app.core.database import async_session_factory
-from app.services.notification_service import NotificationService
+from app.services.outbox_service import OutboxService
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(name="tasks.auto_dose_check", queue="dosing")
 def auto_dose_check(farm_id: str):
     """Check if auto-dosing is needed based on current sensor readings and recipes."""
@@ -92,10 +83,10 @@ def auto_dose_check(farm_id: str):
                                 "target": float(recipe.target_ec_min),
                             })
 
+                outbox = OutboxService(session)
                 for action in dosing_actions:
-                    await NotificationService.publish_dosing_event(
-                        UUID(farm_id), action
-                    )
+                    outbox.publish(UUID(farm_id), "dosing_event", action)
+                await session.commit()
 
                 logger.info(f"Auto-dose check for farm {farm_id}: {len(dosing_actions)} actions needed")
                 return dosing_actions
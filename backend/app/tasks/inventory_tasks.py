@@ -1,22 +1,13 @@
 """Celery tasks for inventory management."""
-import asyncio
 import logging
 
-from app.core.celery_app import celery_app
+from app.core.celery_app import celery_app, run_async
 from app.core.database import async_session_factory
-from app.services.notification_service import NotificationService
+from app.services.outbox_service import OutboxService
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(name="tasks.check_low_stock", queue="default")
 def check_low_stock():
     """Check all farms for low stock items and send notifications."""
@@ -38,9 +29,11 @@ def check_low_stock():
             )
             low_stock_items = result.scalars().all()
 
+            outbox = OutboxService(session)
             for item in low_stock_items:
-                await NotificationService.publish_alert(
+                outbox.publish(
                     item.farm_id,
+                    "alert",
                     {
                         "type": "low_stock",
                         "item_id": str(item.id),
@@ -50,6 +43,7 @@ def check_low_stock():
                         "reorder_quantity": float(item.reorder_quantity) if item.reorder_quantity else None,
                     },
                 )
+            await session.commit()
 
             logger.info(f"Low stock check: {len(low_stock_items)} items below threshold")
             return len(low_stock_items)
@@ -0,0 +1,56 @@
+"""Celery tasks relaying the transactional outbox."""
+import logging
+from datetime import timedelta
+
+from app.core.celery_app import celery_app, run_async
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="tasks.relay_outbox", queue="default")
+def relay_outbox():
+    """Deliver pending outbox events, one committed batch at a time."""
+
+    async def _relay():
+        from app.core.mqtt_client import close_mqtt
+
+        async with async_session_factory() as session:
+            if not await OutboxService(session).has_due():
+                return 0
+
+        # MQTT connects on the first device command claimed, if any.
+        try:
+            relayed = 0
+            while True:
+                async with async_session_factory() as session:
+                    claimed = await OutboxService(session).relay_batch(settings.OUTBOX_BATCH_SIZE)
+                    await session.commit()
+                relayed += claimed
+                if claimed < settings.OUTBOX_BATCH_SIZE:
+                    break
+            if relayed:
+                logger.info(f"Relayed {relayed} outbox events")
+            return relayed
+        finally:
+            await close_mqtt()
+
+    return run_async(_relay())
+
+
+@celery_app.task(name="tasks.purge_outbox", queue="default")
+def purge_outbox():
+    """Delete delivered outbox events past the retention window."""
+
+    async def _purge():
+        async with async_session_factory() as session:
+            purged = await OutboxService(session).purge_published(
+                timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+            )
+            await session.commit()
+            logger.info(f"Purged {purged} delivered outbox events")
+            return purged
+
+    return run_async(_purge())
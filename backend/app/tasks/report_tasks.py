@@ -1,22 +1,13 @@
 """Celery tasks for report generation."""
-import asyncio
 import logging
 from datetime import date
 
-from app.core.celery_app import celery_app
-from app.core.database import async_session_factory
+from app.core.celery_app import celery_app, run_async
+from app.core.database import async_session_factory, read_session, sessionmaker_for
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(name="tasks.generate_daily_report", queue="default")
 def generate_daily_report(farm_id: str):
     """Generate daily farm summary report."""
@@ -25,8 +16,9 @@ def generate_daily_report(farm_id: str):
         from uuid import UUID
         from app.services.dashboard_service import DashboardService
 
-        async with async_session_factory() as session:
-            service = DashboardService(session)
+        async with read_session() as session:
+            # Concurrent mode opens its own sessions; keep them on the replica too.
+            service = DashboardService(session, session_factory=sessionmaker_for(session))
             dashboard = await service.get_dashboard(UUID(farm_id))
             logger.info(f"Daily report generated for farm {farm_id}")
             return dashboard
@@ -42,7 +34,7 @@ def generate_weekly_harvest_report(farm_id: str):
         from uuid import UUID
         from app.services.harvest_service import HarvestService
 
-        async with async_session_factory() as session:
+        async with read_session() as session:
             service = HarvestService(session)
             report = await service.get_yield_report(UUID(farm_id))
             monthly = await service.get_monthly_yield(UUID(farm_id), date.today().year)
@@ -71,7 +63,7 @@ def generate_financial_report(farm_id: str, year: int = None):
         else:
             report_year = year
 
-        async with async_session_factory() as session:
+        async with read_session() as session:
             service = FinanceService(session)
             revenue = await service.get_revenue_summary(UUID(farm_id))
             by_category = await service.get_costs_by_category(UUID(farm_id))
@@ -1,23 +1,14 @@
 """Celery tasks for AI vision analysis."""
-import asyncio
 import logging
 from uuid import UUID
 
-from app.core.celery_app import celery_app
+from app.core.celery_app import celery_app, run_async
 from app.core.database import async_session_factory
 from app.core.constants import AnalysisStatus, AnomalyType
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 @celery_app.task(name="tasks.analyze_plant_scan", queue="vision")
 def analyze_plant_scan(scan_id: str):
     """Analyze a plant scan image using AI vision model."""
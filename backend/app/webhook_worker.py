@@ -0,0 +1,47 @@
+"""Webhook worker process: ``python -m app.webhook_worker``.
+
+Delivers due webhook deliveries in batches over one shared HTTP client.
+"""
+import asyncio
+import contextlib
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
+from app.core.logging_config import setup_logging
+from app.services.webhook_service import WebhookDispatcher, create_webhook_client, deliver_due
+
+logger = logging.getLogger(__name__)
+
+IDLE_POLL_SECONDS = 1.0
+
+
+async def run() -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    logger.info("Webhook worker started")
+    async with create_webhook_client() as client:
+        dispatcher = WebhookDispatcher(client)
+        while not stopping.is_set():
+            claimed = 0
+            try:
+                claimed = await deliver_due(
+                    dispatcher, AsyncSessionLocal, settings.WEBHOOK_BATCH_SIZE
+                )
+            except Exception as e:
+                logger.error(f"Webhook delivery batch failed: {e}")
+            if claimed < settings.WEBHOOK_BATCH_SIZE:
+                # Caught up; wait for new deliveries or a stop signal.
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stopping.wait(), IDLE_POLL_SECONDS)
+    await close_db()
+    logger.info("Webhook worker stopped")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+"""Dashboard latency per query mode under a simulated database round trip.
+
+    python -m benchmarks.dashboard_latency [--farm-id UUID] [--rtt-ms 50] [--runs 20]
+
+Every statement is delayed by ``--rtt-ms`` before it is sent, approximating a
+database in another region (use ``--rtt-ms 0`` against a genuinely remote
+database). Runs against ``DATABASE_URL`` unless ``--database-url`` is given;
+without ``--farm-id`` the first farm is used (``make seed`` provides one).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.constants import DashboardQueryMode
+from app.models import *  # noqa: F401,F403 - register every mapper
+from app.models.farm import Farm
+from app.services.dashboard_service import DashboardService
+
+
+class DelayedSession(AsyncSession):
+    rtt_seconds = 0.0
+    statements = 0
+
+    async def execute(self, *args, **kwargs):
+        DelayedSession.statements += 1
+        await asyncio.sleep(self.rtt_seconds)
+        return await super().execute(*args, **kwargs)
+
+
+async def measure(
+    session_factory: async_sessionmaker, farm_id: UUID, mode: DashboardQueryMode, runs: int
+) -> tuple[list[float], int]:
+    timings = []
+    for run in range(runs + 1):
+        async with session_factory() as db:
+            service = DashboardService(db, session_factory=session_factory, mode=mode)
+            DelayedSession.statements = 0
+            started = time.perf_counter()
+            await service.get_dashboard(farm_id)
+            if run:  # the first run warms the pool
+                timings.append((time.perf_counter() - started) * 1000)
+    return timings, DelayedSession.statements
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.database_url)
+    DelayedSession.rtt_seconds = args.rtt_ms / 1000
+    session_factory = async_sessionmaker(engine, class_=DelayedSession, expire_on_commit=False)
+    try:
+        farm_id = args.farm_id
+        if farm_id is None:
+            async with session_factory() as db:
+                farm_id = (await db.execute(select(Farm.id).limit(1))).scalar_one()
+
+        print(f"{engine.dialect.name}, {args.rtt_ms:g} ms simulated RTT, {args.runs} runs")
+        print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'statements':>12}")
+        for mode in DashboardQueryMode:
+            timings, statements = await measure(session_factory, farm_id, mode, args.runs)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            print(f"{mode.value:<12}{statistics.median(timings):>10.1f}{p95:>10.1f}{statements:>12}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--farm-id", type=UUID)
+    parser.add_argument("--rtt-ms", type=float, default=50.0)
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""Tests for compound alert rule expressions."""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.models.alert import AlertRule
+from app.models.sensor import Sensor, SensorReading
+from app.services.alert_expression import (
+    And,
+    Comparison,
+    ExpressionError,
+    Or,
+    Trend,
+    compile_expression,
+)
+from app.services.alert_service import AlertService
+from app.services.alert_state import StateChanges
+
+FARM_ID = uuid4()
+
+
+class TestCompileExpression:
+    def test_and_binds_tighter_than_or(self):
+        tree = compile_expression("ph < 5.5 OR temperature > 28 and humidity > 85")
+        assert tree == Or(
+            (
+                Comparison("ph", "<", 5.5),
+                And((Comparison("temperature", ">", 28.0), Comparison("humidity", ">", 85.0))),
+            )
+        )
+
+    def test_trend_predicate(self):
+        tree = compile_expression("ec < 1.0 AND water_level falling 0.5")
+        assert tree == And((Comparison("ec", "<", 1.0), Trend("water_level", "falling", 0.5)))
+        assert tree.sensor_types() == {"ec", "water_level"}
+        assert tree.trend_types() == {"water_level"}
+
+    @pytest.mark.parametrize(
+        "source",
+        ["", "temp > 3", "temperature >", "temperature > 28 AND", "(ph < 5", "ph ~ 5", "ph wobbling"],
+    )
+    def test_rejects_invalid(self, source):
+        with pytest.raises(ExpressionError):
+            compile_expression(source)
+
+    def test_missing_input_is_unknown(self):
+        tree = compile_expression("temperature > 28 AND humidity > 85")
+        assert tree.evaluate({"temperature": 30.0}, {}) is None
+        # A definite False short-circuits the unknown.
+        assert tree.evaluate({"temperature": 20.0}, {}) is False
+        assert compile_expression("NOT humidity > 85").evaluate({}, {}) is None
+
+    def test_trend_evaluation(self):
+        tree = compile_expression("water_level falling")
+        assert tree.evaluate({}, {"water_level": -0.2}) is True
+        assert tree.evaluate({}, {"water_level": 0.1}) is False
+        assert tree.evaluate({}, {"water_level": None}) is None
+
+
+def make_sensor(zone_id, sensor_type, last_value=None):
+    return Sensor(
+        id=uuid4(),
+        farm_id=FARM_ID,
+        zone_id=zone_id,
+        name=sensor_type,
+        sensor_type=sensor_type,
+        last_value=last_value,
+        last_reading_at=datetime(2025, 1, 1),
+    )
+
+
+async def evaluate(service, sensor, reading) -> list:
+    """Evaluate the compound rules for one reading and commit its state changes."""
+    changes = StateChanges(reading.recorded_at.timestamp(), reading.id)
+    alerts = await service._evaluate_compound_rules(sensor, reading, [], changes)
+    await changes.apply()
+    return alerts
+
+
+class TestCompoundRuleEvaluation:
+    def make_service(self, rule, zone_sensors):
+        service = AlertService(MagicMock())
+        service.rule_repo.get_active_compound_rules = AsyncMock(return_value=[rule])
+        service.sensor_repo.get_farm_sensors = AsyncMock(return_value=zone_sensors)
+        service._cooling_down = AsyncMock(return_value=False)
+        service._raise_alert = AsyncMock(side_effect=lambda *args: MagicMock())
+        return service
+
+    @pytest.mark.asyncio
+    async def test_fires_once_while_expression_holds(self):
+        zone_id = uuid4()
+        humidity = make_sensor(zone_id, "humidity", 90)
+        temperature = make_sensor(zone_id, "temperature", 25)
+        rule = AlertRule(
+            id=uuid4(), zone_id=zone_id, condition="compound",
+            expression="temperature > 28 AND humidity > 85",
+        )
+        service = self.make_service(rule, [humidity, temperature])
+
+        with patch("app.core.redis_client.redis_client", None):
+            fired = []
+            for i, value in enumerate([26, 29, 30, 27, 29]):
+                reading = SensorReading(
+                    value=value, recorded_at=datetime(2025, 1, 1) + timedelta(minutes=i)
+                )
+                fired.append(len(await evaluate(service, temperature, reading)))
+
+        assert fired == [0, 1, 0, 0, 1]
+        _, _, _, title, message, _ = service._raise_alert.call_args.args
+        assert title == "Compound alert: temperature > 28 AND humidity > 85"
+        assert "humidity=90" in message and "temperature=29" in message
+
+    @pytest.mark.asyncio
+    async def test_ignores_rules_not_reading_sensor_type(self):
+        zone_id = uuid4()
+        ph = make_sensor(zone_id, "ph", 6.0)
+        rule = AlertRule(
+            id=uuid4(), zone_id=None, condition="compound", expression="temperature > 28"
+        )
+        service = self.make_service(rule, [ph])
+        reading = SensorReading(value=6.0, recorded_at=datetime(2025, 1, 1))
+        assert await evaluate(service, ph, reading) == []
+        service.sensor_repo.get_farm_sensors.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_trend_predicate_uses_rule_accumulator(self):
+        zone_id = uuid4()
+        ec = make_sensor(zone_id, "ec", 0.8)
+        water = make_sensor(zone_id, "water_level", 50)
+        rule = AlertRule(
+            id=uuid4(), zone_id=zone_id, condition="compound", duration_minutes=60,
+            expression="ec < 1.0 AND water_level falling",
+        )
+        service = self.make_service(rule, [ec, water])
+
+        with patch("app.core.redis_client.redis_client", None):
+            fired = 0
+            for i in range(10):
+                reading = SensorReading(
+                    value=50 - i, recorded_at=datetime(2025, 1, 1) + timedelta(minutes=5 * i)
+                )
+                fired += len(await evaluate(service, water, reading))
+
+        assert fired == 1
+        assert "water_level -12.0000/h" in service._raise_alert.call_args.args[4]
@@ -2,12 +2,18 @@
 import pytest
 from uuid import uuid4
 from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
 
 from app.core.constants import AlertStatus, AlertCondition, AlertSeverity, SensorType
+from app.core.database import run_after_commit
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.services.alert_service import AlertService
 from app.schemas.alert import AlertRuleCreate
 from app.models.alert import AlertRule, Alert
+from app.models.farm import Farm
+from app.models.sensor import Sensor, SensorReading
+from app.models.user import User
 
 
 class TestAlertRuleService:
@@ -164,3 +170,105 @@ class TestAlertWorkflow:
 
         with pytest.raises(BadRequestException):
             await service.resolve_alert(alert.id, sample_user.id)
+
+
+@pytest.fixture
+async def sensor(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Alert Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    sensor = Sensor(farm_id=farm.id, name="Air", sensor_type="temperature")
+    db_session.add(sensor)
+    await db_session.flush()
+    return sensor
+
+
+async def add_rule(db_session, sensor, **kwargs):
+    rule = AlertRule(
+        farm_id=sensor.farm_id, sensor_type="temperature", severity="warning", **kwargs
+    )
+    db_session.add(rule)
+    await db_session.flush()
+    return rule
+
+
+async def add_reading(db_session, sensor, value):
+    reading = SensorReading(
+        sensor_id=sensor.id, value=Decimal(str(value)), recorded_at=datetime.utcnow()
+    )
+    db_session.add(reading)
+    await db_session.flush()
+    return reading
+
+
+class TestStatefulRules:
+    @pytest.mark.asyncio
+    async def test_cooldown_does_not_latch_the_rule(self, db_session, sensor):
+        await add_rule(
+            db_session,
+            sensor,
+            condition="hysteresis",
+            threshold_max=Decimal("30"),
+            clear_threshold=Decimal("28"),
+        )
+        service = AlertService(db_session)
+
+        with patch("app.core.redis_client.redis_client", None):
+            with patch.object(service, "_cooling_down", AsyncMock(return_value=True)):
+                suppressed = await service.evaluate_reading(
+                    sensor, await add_reading(db_session, sensor, 31)
+                )
+            await run_after_commit(db_session)
+            # Still above the trigger and never cleared: fires once cooldown ends.
+            raised = await service.evaluate_reading(
+                sensor, await add_reading(db_session, sensor, 31.2)
+            )
+
+        assert suppressed == []
+        assert len(raised) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_evaluation_leaves_the_state_for_the_retry(self, db_session, sensor):
+        await add_rule(
+            db_session,
+            sensor,
+            condition="hysteresis",
+            threshold_max=Decimal("30"),
+            clear_threshold=Decimal("28"),
+        )
+        reading = await add_reading(db_session, sensor, 31)
+        service = AlertService(db_session)
+
+        with patch("app.core.redis_client.redis_client", None):
+            with patch.object(
+                service, "_raise_alert", AsyncMock(side_effect=RuntimeError("db down"))
+            ), pytest.raises(RuntimeError):
+                await service.evaluate_reading(sensor, reading)
+            # Rolled back, so nothing runs after commit; the relay retries.
+            retried = await service.evaluate_reading(sensor, reading)
+            await run_after_commit(db_session)
+            # Delivered once more after the commit: already applied.
+            again = await service.evaluate_reading(sensor, reading)
+
+        assert len(retried) == 1
+        assert again == []
+
+    @pytest.mark.asyncio
+    async def test_update_validates_the_merged_rule(self, db_session, sensor):
+        rule = await add_rule(
+            db_session, sensor, condition="above", threshold_max=Decimal("30")
+        )
+        service = AlertService(db_session)
+
+        with patch("app.core.redis_client.redis_client", None):
+            with pytest.raises(BadRequestException, match="clear_threshold"):
+                await service.update_rule(rule.id, {"condition": "hysteresis"})
+            updated = await service.update_rule(
+                rule.id, {"condition": "hysteresis", "clear_threshold": 28.0}
+            )
+
+        assert updated.condition == "hysteresis"
+        assert updated.clear_threshold == Decimal("28")
@@ -0,0 +1,270 @@
+"""Tests for stateful alert conditions."""
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+from redis.exceptions import WatchError
+
+from app.core.constants import AlertCondition
+from app.services.alert_state import (
+    AlertStateStore,
+    RuleState,
+    StateChanges,
+    advance_state,
+    latch,
+    rearm,
+)
+
+
+def make_rule(**kwargs):
+    defaults = dict(
+        id=uuid4(),
+        condition=AlertCondition.SUSTAINED.value,
+        threshold_min=None,
+        threshold_max=None,
+        clear_threshold=None,
+        duration_minutes=None,
+    )
+    defaults.update(kwargs)
+    return SimpleNamespace(**defaults)
+
+
+class TestSustainedCondition:
+    def test_fires_after_duration(self):
+        rule = make_rule(threshold_max=28.0, duration_minutes=10)
+        state = RuleState()
+        assert advance_state(rule, 29.0, 0, state) is False
+        assert advance_state(rule, 29.5, 300, state) is False
+        assert advance_state(rule, 29.1, 600, state) is True
+
+    def test_fires_once_per_episode(self):
+        rule = make_rule(threshold_max=28.0, duration_minutes=1)
+        state = RuleState()
+        advance_state(rule, 29.0, 0, state)
+        assert advance_state(rule, 29.0, 60, state) is True
+        assert advance_state(rule, 29.0, 120, state) is False
+
+    def test_recovery_resets_window(self):
+        rule = make_rule(threshold_min=5.5, duration_minutes=5)
+        state = RuleState()
+        advance_state(rule, 5.0, 0, state)
+        advance_state(rule, 6.0, 200, state)
+        assert state.violation_started_at is None
+        assert advance_state(rule, 5.0, 300, state) is False
+        assert advance_state(rule, 5.0, 600, state) is True
+
+
+class TestHysteresisCondition:
+    def test_oscillation_fires_once(self):
+        rule = make_rule(
+            condition=AlertCondition.HYSTERESIS.value, threshold_max=7.0, clear_threshold=6.5
+        )
+        state = RuleState()
+        fired = [advance_state(rule, v, i, state) for i, v in enumerate([7.1, 6.9, 7.2, 6.8, 7.1])]
+        assert fired == [True, False, False, False, False]
+
+    def test_rearms_after_clear(self):
+        rule = make_rule(
+            condition=AlertCondition.HYSTERESIS.value, threshold_min=5.5, clear_threshold=5.8
+        )
+        state = RuleState()
+        assert advance_state(rule, 5.4, 0, state) is True
+        assert advance_state(rule, 5.9, 1, state) is False
+        assert state.triggered is False
+        assert advance_state(rule, 5.4, 2, state) is True
+
+
+class FakePipeline:
+    """Immediate between WATCH and MULTI, queued otherwise, like redis-py."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.watched = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, key):
+        self.watched = (key, self.redis.versions.get(key, 0))
+
+    def multi(self):
+        pass
+
+    async def reset(self):
+        self.calls, self.watched = [], None
+
+    async def get(self, key):
+        return await self.redis.get(key)
+
+    def set(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        if self.redis.interleave:
+            await self.redis.interleave.pop(0)()
+        key, version = self.watched
+        if self.redis.versions.get(key, 0) != version:
+            raise WatchError()
+        for args, kwargs in calls:
+            await self.redis.set(*args, **kwargs)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.versions = {}
+        self.sets = 0
+        # Writes by "another worker", run just before the next EXEC.
+        self.interleave = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.sets += 1
+
+
+async def feed(store, rule, sensor_id, value, at, reading_id=None) -> bool | None:
+    """Evaluate one reading against ``rule`` and write its changes, as a commit would."""
+    changes = StateChanges(at, reading_id if reading_id is not None else int(at), store)
+    fired = await changes.update(
+        rule.id, sensor_id, lambda state: advance_state(rule, value, at, state)
+    )
+    await changes.apply()
+    return fired
+
+
+class TestAlertStateStore:
+    @pytest.mark.asyncio
+    async def test_nothing_is_written_until_applied(self):
+        redis = FakeRedis()
+        with patch("app.core.redis_client.redis_client", redis):
+            store = AlertStateStore()
+            rule = make_rule(threshold_max=28.0, duration_minutes=10)
+            sensor_id = uuid4()
+            changes = StateChanges(0, 1, store)
+            await changes.update(rule.id, sensor_id, lambda s: advance_state(rule, 29.0, 0, s))
+            # Evaluation failed or its commit did: the state is as it was.
+            assert redis.sets == 0
+            await changes.apply()
+            assert redis.sets == 1
+
+    @pytest.mark.asyncio
+    async def test_redelivered_and_older_readings_are_ignored(self):
+        redis = FakeRedis()
+        with patch("app.core.redis_client.redis_client", redis):
+            store = AlertStateStore()
+            rule = make_rule(threshold_max=28.0, duration_minutes=10)
+            sensor_id = uuid4()
+            await feed(store, rule, sensor_id, 29.0, 0)
+            assert await feed(store, rule, sensor_id, 29.0, 600) is True
+            sets = redis.sets
+            # The same reading again, then one that arrives late.
+            assert not await feed(store, rule, sensor_id, 29.0, 600)
+            assert not await feed(store, rule, sensor_id, 20.0, 300)
+            assert redis.sets == sets
+            state = await store.get(rule.id, sensor_id)
+            assert state.triggered and state.violation_started_at == 0
+
+    @pytest.mark.asyncio
+    async def test_replay_after_a_concurrent_write_is_skipped(self):
+        redis = FakeRedis()
+        rule = make_rule(threshold_max=28.0, duration_minutes=10)
+        sensor_id = uuid4()
+        store = AlertStateStore()
+        key = store._key(rule.id, sensor_id)
+        changes = StateChanges(600, 2, store)
+
+        async def other_worker():
+            # A newer reading committed and applied first.
+            await redis.set(key, json.dumps(
+                {"violation_started_at": 0.0, "last_reading_at": 900.0, "last_reading_id": 3}
+            ))
+
+        with patch("app.core.redis_client.redis_client", redis):
+            await changes.update(rule.id, sensor_id, lambda s: advance_state(rule, 29.0, 600, s))
+            redis.interleave.append(other_worker)
+            await changes.apply()
+            # Retried on top of the other worker's write, which already has a
+            # newer reading, so this one leaves it alone.
+            assert json.loads(redis.values[key])["last_reading_id"] == 3
+
+    @pytest.mark.asyncio
+    async def test_workers_share_state(self):
+        redis = FakeRedis()
+        with patch("app.core.redis_client.redis_client", redis):
+            first, second = AlertStateStore(), AlertStateStore()
+            rule = make_rule(threshold_max=28.0, duration_minutes=10)
+            sensor_id = uuid4()
+            assert await feed(first, rule, sensor_id, 29.0, 0) is False
+            assert await feed(second, rule, sensor_id, 29.0, 600) is True
+            assert await feed(first, rule, sensor_id, 29.0, 660) is False
+
+    @pytest.mark.asyncio
+    async def test_rearm_lets_a_latch_fire_again(self):
+        with patch("app.core.redis_client.redis_client", FakeRedis()):
+            store = AlertStateStore()
+            rule_id, zone_id = uuid4(), uuid4()
+            for reading_id, expected in [(1, True), (2, False)]:
+                changes = StateChanges(reading_id, reading_id, store)
+                assert await changes.update(rule_id, zone_id, lambda s: latch(True, s)) is expected
+                await changes.apply()
+            changes = StateChanges(3, 3, store)
+            await changes.update(rule_id, zone_id, rearm)
+            await changes.apply()
+            changes = StateChanges(4, 4, store)
+            assert await changes.update(rule_id, zone_id, lambda s: latch(True, s)) is True
+
+    @pytest.mark.asyncio
+    async def test_works_without_redis(self):
+        with patch("app.core.redis_client.redis_client", None):
+            store = AlertStateStore()
+            rule = make_rule(threshold_max=28.0, duration_minutes=1)
+            sensor_id = uuid4()
+            await feed(store, rule, sensor_id, 29.0, 0)
+            assert await feed(store, rule, sensor_id, 29.0, 60) is True
+
+
+class TestRateOfChangeCondition:
+    def test_falling_ph_fires(self):
+        rule = make_rule(
+            condition=AlertCondition.RATE_OF_CHANGE.value, threshold_min=-0.3, duration_minutes=60
+        )
+        state = RuleState()
+        # pH falling 0.5/h, one reading every 5 minutes
+        fired = [
+            advance_state(rule, 6.0 - 0.5 * (i * 300) / 3600, i * 300, state) for i in range(12)
+        ]
+        assert fired.count(True) == 1
+        assert state.slope() == pytest.approx(-0.5)
+
+    def test_stable_trend_does_not_fire(self):
+        rule = make_rule(
+            condition=AlertCondition.RATE_OF_CHANGE.value, threshold_min=-0.3, duration_minutes=60
+        )
+        state = RuleState()
+        fired = [
+            advance_state(rule, 6.0 - 0.1 * (i * 300) / 3600, i * 300, state) for i in range(12)
+        ]
+        assert not any(fired)
+
+    def test_needs_minimum_samples(self):
+        rule = make_rule(
+            condition=AlertCondition.RATE_OF_CHANGE.value, threshold_max=1.0, duration_minutes=60
+        )
+        state = RuleState()
+        assert advance_state(rule, 1.0, 0, state) is False
+        assert advance_state(rule, 50.0, 60, state) is False
+        assert state.slope() is None
@@ -0,0 +1,48 @@
+"""Tests for online anomaly scoring."""
+import math
+
+from app.services.anomaly_detector import WARMUP_SAMPLES, AnomalyState
+
+
+def daily_temperature(hour: int) -> float:
+    return 22.0 + 3.0 * math.sin(2 * math.pi * hour / 24)
+
+
+def train(state: AnomalyState, days: int = 5) -> None:
+    # One reading every five minutes.
+    for i in range(days * 24 * 12):
+        hour = (i // 12) % 24
+        noise = 0.1 if i % 2 else -0.1
+        state.update(daily_temperature(hour) + noise, hour)
+
+
+class TestAnomalyState:
+    def test_warmup_returns_no_score(self):
+        state = AnomalyState()
+        scores = [state.update(6.0, 0) for _ in range(WARMUP_SAMPLES)]
+        assert all(s is None for s in scores)
+
+    def test_daily_cycle_is_not_anomalous(self):
+        state = AnomalyState()
+        train(state)
+        for hour in (3, 9, 15, 21):
+            assert abs(state.update(daily_temperature(hour), hour)) < 3
+
+    def test_spike_is_anomalous(self):
+        state = AnomalyState()
+        train(state)
+        assert state.update(daily_temperature(12) + 5.0, 12) > 10
+        assert state.last_score > 10
+
+    def test_value_normal_for_other_hour_is_anomalous(self):
+        state = AnomalyState()
+        train(state)
+        # The afternoon peak at 6am is out of season even though it's in range.
+        assert state.update(daily_temperature(6), 18) > 10
+
+    def test_round_trips_through_dict(self):
+        state = AnomalyState()
+        train(state, days=2)
+        restored = AnomalyState.from_dict(state.to_dict())
+        assert restored == state
+        assert AnomalyState.from_dict(None) == AnomalyState()
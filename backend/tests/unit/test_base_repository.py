@@ -0,0 +1,264 @@
+"""Tests for BaseRepository's bulk writes."""
+import contextlib
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
+
+from app.core.constants import CountMode
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.models.farm import Farm, Rack, Tray, Zone
+from app.models.inventory import InventoryItem
+from app.models.user import Permission, User
+from app.repositories.base import BaseRepository
+from app.services.inventory_service import InventoryService
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Bulk Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    return farm
+
+
+@contextlib.contextmanager
+def statements(session):
+    """Collect the SQL statements ``session`` sends while the block runs."""
+    sent = []
+    engine = session.bind.sync_engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield sent
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+class TestBulkWrites:
+    @pytest.mark.asyncio
+    async def test_bulk_create_is_one_insert_in_input_order(self, db_session, farm):
+        zone = Zone(farm_id=farm.id, name="Z1")
+        db_session.add(zone)
+        await db_session.flush()
+        rack = Rack(zone_id=zone.id, name="R1")
+        db_session.add(rack)
+        await db_session.flush()
+        repo = BaseRepository(Tray, db_session)
+
+        with statements(db_session) as sent:
+            trays = await repo.bulk_create(
+                [{"rack_id": rack.id, "name": f"T{i}", "level": i, "capacity": 24} for i in range(5)]
+            )
+
+        assert len(sent) == 1 and sent[0].startswith("INSERT")
+        assert [t.level for t in trays] == list(range(5))
+        assert all(t.id is not None and t.created_at is not None for t in trays)
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_refreshes_loaded_objects(self, db_session, farm):
+        repo = BaseRepository(InventoryItem, db_session)
+        items = await repo.bulk_create([
+            {"farm_id": farm.id, "name": name, "category": "supply", "unit": "pcs"}
+            for name in ("Cubes", "Plugs", "Net pots")
+        ])
+
+        with statements(db_session) as sent:
+            count = await repo.bulk_update([
+                {"id": items[0].id, "current_stock": Decimal("5")},
+                {"id": items[2].id, "current_stock": Decimal("7")},
+            ])
+
+        assert count == 2 and len(sent) == 1
+        assert [i.current_stock for i in items] == [Decimal("5"), 0, Decimal("7")]
+        assert await repo.bulk_update([]) == 0
+
+    @pytest.mark.asyncio
+    async def test_upsert_inserts_new_rows_and_updates_existing(self, db_session):
+        repo = BaseRepository(Permission, db_session)
+        codename = f"farms.{uuid4().hex[:8]}"
+        [existing] = await repo.bulk_create([{"codename": codename, "description": "old"}])
+        new_codename = f"farms.{uuid4().hex[:8]}"
+
+        with statements(db_session) as sent:
+            rows = await repo.upsert(
+                [
+                    {"codename": codename, "description": "new"},
+                    {"codename": new_codename, "description": "added"},
+                ],
+                index_elements=["codename"],
+            )
+
+        assert len(sent) == 1
+        by_codename = {p.codename: p for p in rows}
+        assert by_codename[codename].id == existing.id
+        assert existing.description == "new"
+        assert by_codename[new_codename].description == "added"
+
+
+class TestBatchStockTransactions:
+    @pytest.mark.asyncio
+    async def test_records_entries_and_adjusts_stock(self, db_session, farm):
+        service = InventoryService(db_session)
+        cubes = await service.item_repo.create(
+            {"farm_id": farm.id, "name": "Cubes", "category": "supply", "unit": "pcs",
+             "current_stock": Decimal("100")}
+        )
+        nutrient = await service.item_repo.create(
+            {"farm_id": farm.id, "name": "Part A", "category": "nutrient", "unit": "l",
+             "current_stock": Decimal("10")}
+        )
+
+        txns = await service.create_transactions(
+            farm.id,
+            [
+                {"inventory_item_id": cubes.id, "transaction_type": "usage", "quantity": -30},
+                {"inventory_item_id": cubes.id, "transaction_type": "purchase", "quantity": 50},
+                {"inventory_item_id": nutrient.id, "transaction_type": "usage", "quantity": -2.5},
+            ],
+            farm.owner_id,
+        )
+
+        assert len(txns) == 3
+        assert all(t.performed_by == farm.owner_id for t in txns)
+        assert cubes.current_stock == Decimal("120")
+        assert nutrient.current_stock == Decimal("7.5")
+
+    @pytest.mark.asyncio
+    async def test_unknown_item_raises(self, db_session, farm):
+        service = InventoryService(db_session)
+        with pytest.raises(NotFoundException):
+            await service.create_transactions(
+                farm.id,
+                [{"inventory_item_id": uuid4(), "transaction_type": "usage", "quantity": -1}],
+                farm.owner_id,
+            )
+
+
+class TestRoundTrips:
+    @pytest.mark.asyncio
+    async def test_single_row_writes_are_one_statement_each(self, db_session, farm):
+        repo = BaseRepository(Zone, db_session)
+
+        with statements(db_session) as sent:
+            zone = await repo.create({"farm_id": farm.id, "name": "Z1"})
+        assert len(sent) == 1 and sent[0].startswith("INSERT")
+        assert zone.created_at is not None and zone.updated_at is not None
+
+        with statements(db_session) as sent:
+            updated = await repo.update(zone.id, {"name": "Z2", "description": None})
+        assert len(sent) == 1 and sent[0].startswith("UPDATE")
+        assert updated is zone and zone.name == "Z2"
+
+        with statements(db_session) as sent:
+            assert await repo.get_by_id(zone.id) is zone
+            assert await repo.update(uuid4(), {"name": "nope"}) is None
+            assert await repo.delete(zone.id) is True
+            assert await repo.delete(zone.id) is False
+        assert len(sent) == 4
+        assert await repo.get_by_id(zone.id) is None
+
+    @pytest.mark.asyncio
+    async def test_delete_cascades_in_the_database(self, db_session, farm):
+        zone = await BaseRepository(Zone, db_session).create({"farm_id": farm.id, "name": "Z1"})
+        rack_repo = BaseRepository(Rack, db_session)
+        rack = await rack_repo.create({"zone_id": zone.id, "name": "R1"})
+        rack_id = rack.id
+        db_session.expunge(rack)
+
+        assert await BaseRepository(Zone, db_session).delete(zone.id)
+        assert await rack_repo.get_by_id(rack_id) is None
+
+
+@pytest.fixture
+async def zones(db_session, farm):
+    # Several share a timestamp, so ids have to break the ties.
+    start = datetime(2026, 1, 1)
+    repo = BaseRepository(Zone, db_session)
+    return await repo.bulk_create([
+        {"farm_id": farm.id, "name": f"Z{i}", "created_at": start + timedelta(hours=i // 3)}
+        for i in range(7)
+    ])
+
+
+class TestKeysetPages:
+    @pytest.mark.asyncio
+    async def test_cursor_pages_match_offset_order(self, db_session, farm, zones):
+        repo = BaseRepository(Zone, db_session)
+        query = select(Zone).where(Zone.farm_id == farm.id)
+        everything = await repo.get_page(query, limit=100)
+
+        pages, cursor = [], None
+        while True:
+            page = await repo.get_page(query, limit=3, cursor=cursor)
+            pages.append(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert everything.total == 7 and everything.next_cursor is None
+        assert [z.id for p in pages for z in p.items] == [z.id for z in everything.items]
+        assert [len(p.items) for p in pages] == [3, 3, 1]
+        assert [p.total for p in pages] == [7, None, None]
+        assert everything.items[0].created_at == max(z.created_at for z in zones)
+
+    @pytest.mark.asyncio
+    async def test_mixed_directions(self, db_session, farm, zones):
+        repo = BaseRepository(Zone, db_session)
+        query = select(Zone).where(Zone.farm_id == farm.id)
+        order_by = [(Zone.created_at, False), (Zone.name, True)]
+        first = await repo.get_page(query, limit=4, order_by=order_by)
+        rest = await repo.get_page(query, limit=4, order_by=order_by, cursor=first.next_cursor)
+
+        names = [z.name for z in first.items + rest.items]
+        assert names == ["Z2", "Z1", "Z0", "Z5", "Z4", "Z3", "Z6"]
+
+    @pytest.mark.asyncio
+    async def test_count_modes(self, db_session, farm, zones):
+        repo = BaseRepository(Zone, db_session)
+        query = select(Zone).where(Zone.farm_id == farm.id)
+
+        with statements(db_session) as sent:
+            exact = await repo.get_page(query, limit=2)
+        assert exact.total == 7 and len(sent) == 1
+
+        assert (await repo.get_page(query, limit=2, count=CountMode.NONE)).total is None
+        # Estimates need PostgreSQL's planner; elsewhere the count is exact.
+        estimated = await repo.get_page(query, limit=2, count=CountMode.ESTIMATED)
+        assert estimated.total == 7 and not estimated.total_estimated
+        assert (await repo.get_page(query, limit=2, skip=50)).total == 7
+
+    @pytest.mark.asyncio
+    async def test_tampered_cursor_is_rejected(self, db_session, zones):
+        repo = BaseRepository(Zone, db_session)
+        with pytest.raises(BadRequestException):
+            await repo.get_page(cursor="not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_estimate_uses_the_postgres_planner(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect = postgresql.dialect()
+        plan = MagicMock()
+        plan.scalar.return_value = '[{"Plan": {"Plan Rows": 1234}}]'
+        connection = MagicMock()
+        connection.exec_driver_sql = AsyncMock(return_value=plan)
+        db.connection = AsyncMock(return_value=connection)
+        farm_id = uuid4()
+
+        estimate = await BaseRepository(Zone, db)._estimate_count(
+            select(Zone).where(Zone.farm_id == farm_id)
+        )
+
+        assert estimate == 1234
+        sql = connection.exec_driver_sql.await_args.args[0]
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT") and str(farm_id) in sql
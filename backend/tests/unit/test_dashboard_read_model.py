@@ -0,0 +1,317 @@
+"""Tests for the event-maintained Redis dashboard read model."""
+import json
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.constants import DashboardQueryMode
+from app.models.base import Base
+from app.models.farm import Farm
+from app.models.sensor import Sensor
+from app.models.task import Task
+from app.models.user import User
+from app.repositories.outbox_repo import OutboxRepository
+from app.services.dashboard_read_model import DashboardReadModel
+from app.services.dashboard_service import DashboardService
+from app.services.outbox_service import OutboxService
+
+
+class FakePipeline:
+    """Immediate between WATCH and MULTI, queued otherwise, like redis-py."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.immediate = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, *keys):
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    async def reset(self):
+        self.calls, self.immediate = [], False
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if self.immediate:
+                return getattr(self.redis, name)(*args, **kwargs)
+            self.calls.append((name, args, kwargs))
+        return call
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hexists(self, key, field):
+        return field in self.hashes.get(key, {})
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def sismember(self, key, member):
+        return member in self.sets.get(key, set())
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        fields = self.hashes.setdefault(key, {})
+        for f, v in (mapping or {field: value}).items():
+            fields[f] = str(v)
+
+    async def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    async def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def expire(self, key, seconds):
+        pass
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Read Model Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    db_session.add_all([
+        Sensor(farm_id=farm.id, name="T1", sensor_type="temperature",
+               last_value=Decimal("21.5"), last_reading_at=datetime.utcnow() - timedelta(minutes=5)),
+        Sensor(farm_id=farm.id, name="EC", sensor_type="ec"),
+        Task(farm_id=farm.id, title="Flush lines", task_type="maintenance",
+             due_date=date.today() - timedelta(days=1), created_by=owner.id),
+    ])
+    await db_session.flush()
+    return farm
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("app.core.redis_client.redis_client", fake):
+        yield fake
+
+
+async def relay(db_session, now: datetime) -> None:
+    with patch(
+        "app.services.notification_service.NotificationService.publish_event",
+        new_callable=AsyncMock,
+    ):
+        await OutboxService(db_session).relay_batch(now=now)
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    """Sessions on a file database that reads like PostgreSQL's READ COMMITTED.
+
+    pysqlite runs each SELECT outside a transaction, so every statement sees
+    the latest commit; only a transaction begun SERIALIZABLE gets a BEGIN and
+    with it one snapshot for all its reads.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def wal(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin(conn):
+        if conn.get_execution_options().get("isolation_level") == "SERIALIZABLE":
+            conn.exec_driver_sql("BEGIN")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+class TestRebuildSnapshot:
+    @pytest.mark.asyncio
+    async def test_event_committed_between_the_reads_is_applied_once(self, sessions, redis):
+        async with sessions() as db:
+            owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+            farm = Farm(id=uuid4(), name="Snapshot Farm", owner_id=owner.id)
+            db.add_all([owner, farm])
+            await db.commit()
+
+        get_pending_ids = OutboxRepository.get_pending_ids
+
+        async def commit_task_after(repo, *args):
+            pending = await get_pending_ids(repo, *args)
+            async with sessions() as writer:
+                writer.add(Task(farm_id=farm.id, title="Seed", task_type="seeding", created_by=owner.id))
+                OutboxService(writer).update_dashboard(
+                    farm.id, DashboardReadModel.task_changed(None, ("pending", None))
+                )
+                await writer.commit()
+            return pending
+
+        with patch.object(OutboxRepository, "get_pending_ids", commit_task_after):
+            async with sessions() as db:
+                rebuilt = await DashboardReadModel.rebuild(db, farm.id)
+        assert rebuilt["tasks"]["pending_count"] == 0
+
+        async with sessions() as db:
+            await relay(db, datetime.utcnow() + timedelta(seconds=1))
+            await db.commit()
+        assert (await DashboardReadModel.get(farm.id))["tasks"]["pending_count"] == 1
+
+
+class TestDashboardReadModel:
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_database_dashboard(self, db_session, farm, redis):
+        rebuilt = await DashboardReadModel.rebuild(db_session, farm.id)
+        cached = await DashboardReadModel.get(farm.id)
+        computed = await DashboardService(db_session, mode=DashboardQueryMode.SEQUENTIAL).get_dashboard(farm.id)
+
+        for dashboard in (rebuilt, cached, computed):
+            dashboard.pop("generated_at")
+            dashboard["sensor_summary"].sort(key=lambda s: s["sensor_type"])
+        assert rebuilt == cached == computed
+        assert cached["tasks"] == {"pending_count": 1, "overdue_count": 1}
+
+    @pytest.mark.asyncio
+    async def test_committed_changes_are_applied_through_the_outbox(self, db_session, farm, redis):
+        await DashboardReadModel.rebuild(db_session, farm.id, now=datetime.utcnow() - timedelta(minutes=1))
+        outbox = OutboxService(db_session)
+        yesterday = date.today() - timedelta(days=1)
+        outbox.update_dashboard(farm.id, DashboardReadModel.task_changed(None, ("pending", yesterday)))
+        outbox.update_dashboard(farm.id, DashboardReadModel.dosing_recorded(datetime.utcnow()))
+        outbox.update_dashboard(farm.id, DashboardReadModel.alert_changed(None, "active"))
+        outbox.publish(farm.id, "sensor_reading", {
+            "sensor_id": str(uuid4()), "sensor_type": "ph", "value": 6.2,
+            "recorded_at": datetime.utcnow().isoformat(),
+        })
+        await db_session.flush()
+        await relay(db_session, datetime.utcnow() + timedelta(seconds=1))
+
+        dashboard = await DashboardReadModel.get(farm.id)
+        assert dashboard["tasks"] == {"pending_count": 2, "overdue_count": 2}
+        assert dashboard["dosing"]["events_24h"] == 1
+        assert dashboard["alerts"]["active_count"] == 1
+        assert dashboard["environment"]["ph"] == 6.2
+
+        # Completing a task moves both counters back.
+        await DashboardReadModel.apply(
+            farm.id, DashboardReadModel.task_changed(("pending", yesterday), ("completed", yesterday)),
+            uuid4(),
+        )
+        assert (await DashboardReadModel.get(farm.id))["tasks"] == {"pending_count": 1, "overdue_count": 1}
+
+    @pytest.mark.asyncio
+    async def test_ops_are_skipped_without_a_document_or_when_redelivered(self, db_session, farm, redis):
+        ops = DashboardReadModel.alert_changed(None, "active")
+        event_id = uuid4()
+        assert not await DashboardReadModel.apply(farm.id, ops, event_id)
+        assert DashboardReadModel.key(farm.id) not in redis.hashes
+
+        await DashboardReadModel.rebuild(db_session, farm.id)
+        assert await DashboardReadModel.apply(farm.id, ops, event_id)
+        assert not await DashboardReadModel.apply(farm.id, ops, event_id)
+        assert (await DashboardReadModel.get(farm.id))["alerts"]["active_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rebuild_marks_pending_events_applied(self, db_session, farm, redis):
+        outbox = OutboxService(db_session)
+        before = outbox.update_dashboard(farm.id, DashboardReadModel.task_changed(None, ("pending", None)))
+        # The task itself, which the rebuild counts.
+        db_session.add(Task(farm_id=farm.id, title="Seed", task_type="seeding", created_by=farm.owner_id))
+        await db_session.flush()
+        await DashboardReadModel.rebuild(db_session, farm.id)
+        # Committed after the rebuild even if created before it.
+        after = outbox.update_dashboard(farm.id, DashboardReadModel.alert_changed(None, "active"))
+        after.created_at = before.created_at
+        await db_session.flush()
+        await relay(db_session, datetime.utcnow() + timedelta(seconds=1))
+
+        dashboard = await DashboardReadModel.get(farm.id)
+        assert dashboard["tasks"]["pending_count"] == 2
+        assert dashboard["alerts"]["active_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_portfolio_computes_only_uncached_farms(self, db_session, farm, redis):
+        other = Farm(id=uuid4(), name="Uncached Farm", owner_id=farm.owner_id)
+        db_session.add(other)
+        await db_session.flush()
+        await DashboardReadModel.rebuild(db_session, farm.id)
+
+        with patch.object(
+            DashboardService, "get_portfolio", wraps=DashboardService(db_session).get_portfolio
+        ) as computed:
+            portfolio = await DashboardReadModel.get_portfolio(db_session, [farm.id, other.id])
+
+        assert computed.await_args.args == ([other.id],)
+        assert portfolio[farm.id][1] is True
+        assert portfolio[other.id][1] is False
+        assert portfolio[farm.id][0]["tasks"]["overdue_count"] == 1
+        assert portfolio[other.id][0]["tasks"]["overdue_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_portfolio_fans_out_on_the_sessions_database(self, db_session, farm, redis):
+        replica_sessions = object()
+        factories = []
+
+        async def get_portfolio(service, farm_ids):
+            factories.append(service.session_factory)
+            return {farm_id: {} for farm_id in farm_ids}
+
+        with patch(
+            "app.services.dashboard_read_model.sessionmaker_for", return_value=replica_sessions
+        ), patch.object(DashboardService, "get_portfolio", get_portfolio):
+            await DashboardReadModel.get_portfolio(db_session, [farm.id])
+        assert factories == [replica_sessions]
+
+    def test_render_drops_buckets_outside_their_window(self):
+        now = datetime(2026, 3, 10, 12, 30)
+        harvest = {"id": "h", "weight_kg": 2.0, "grade": "A", "harvested_at": "2026-03-01"}
+        fields = {
+            "built_at": "2026-03-09T03:30:00.000000",
+            "orders:2026-03-09": "4",
+            "orders:2026-03-10": "1",
+            "dosing:2026-03-09T11": "5",
+            "dosing:2026-03-09T12": "2",
+            "open_due:2026-03-10": "3",
+            "open_due:2026-03-09": "1",
+            "harvest:h": json.dumps(harvest),
+        }
+        dashboard = DashboardReadModel.render(fields, now)
+        assert dashboard["orders"]["today_count"] == 1
+        assert dashboard["dosing"]["events_24h"] == 2
+        assert dashboard["tasks"]["overdue_count"] == 1
+        assert dashboard["harvests"]["recent"] == []
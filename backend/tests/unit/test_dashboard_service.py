@@ -0,0 +1,128 @@
+"""Tests for dashboard aggregation across query modes."""
+import contextlib
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.constants import DashboardQueryMode
+from app.models.dosing import DosingEvent, DosingPump
+from app.models.farm import Farm
+from app.models.sensor import Sensor
+from app.models.task import Task
+from app.models.user import User
+from app.services.dashboard_service import DashboardService
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Dashboard Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+
+    now = datetime.utcnow()
+    db_session.add_all([
+        Sensor(farm_id=farm.id, name="T1", sensor_type="temperature",
+               last_value=Decimal("21.5"), last_reading_at=now - timedelta(minutes=5)),
+        Sensor(farm_id=farm.id, name="T2", sensor_type="temperature",
+               last_value=Decimal("23.25"), last_reading_at=now),
+        Sensor(farm_id=farm.id, name="pH", sensor_type="ph", last_value=Decimal("0")),
+        Task(farm_id=farm.id, title="Flush lines", task_type="maintenance",
+             due_date=date.today() - timedelta(days=1), created_by=owner.id),
+    ])
+    pump = DosingPump(farm_id=farm.id, name="Acid", pump_type="ph_down", ml_per_second=Decimal("1.5"))
+    db_session.add(pump)
+    await db_session.flush()
+    db_session.add(
+        DosingEvent(pump_id=pump.id, trigger="auto", volume_ml=Decimal("5"),
+                    duration_seconds=Decimal("3.3"), sensor_reading_before=Decimal("6.8"))
+    )
+    await db_session.flush()
+    return farm
+
+
+class TestDashboardService:
+    @pytest.mark.asyncio
+    async def test_sequential_aggregates_farm_metrics(self, db_session, farm):
+        dashboard = await DashboardService(db_session, mode=DashboardQueryMode.SEQUENTIAL).get_dashboard(farm.id)
+
+        summary = {s["sensor_type"]: s for s in dashboard["sensor_summary"]}
+        assert summary["temperature"]["count"] == 2
+        assert summary["temperature"]["max_value"] == 23.25
+        assert summary["ph"]["avg_value"] == 0.0
+        assert dashboard["environment"]["temperature"] == 23.25
+        assert dashboard["environment"]["ph"] == 0.0
+        assert dashboard["environment"]["co2"] is None
+        assert dashboard["tasks"] == {"pending_count": 1, "overdue_count": 1}
+        assert dashboard["dosing"]["events_24h"] == 1
+        assert dashboard["alerts"]["active_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_each_query_on_its_own_session(self, db_session, farm):
+        opened = []
+
+        @contextlib.asynccontextmanager
+        async def session_factory():
+            opened.append(1)
+            yield db_session
+
+        sequential = await DashboardService(db_session, mode=DashboardQueryMode.SEQUENTIAL).get_dashboard(farm.id)
+        concurrent = await DashboardService(
+            db_session, session_factory=session_factory, mode=DashboardQueryMode.CONCURRENT
+        ).get_dashboard(farm.id)
+
+        assert len(opened) == 9
+        sequential.pop("generated_at"), concurrent.pop("generated_at")
+        assert concurrent == sequential
+
+    @pytest.mark.asyncio
+    async def test_single_mode_is_one_statement_on_postgres(self):
+        db = MagicMock()
+        db.bind.dialect.name = "postgresql"
+        result = MagicMock()
+        result.mappings.return_value.one.return_value = {
+            "sensor_summary": [
+                {"sensor_type": "ph", "count": 1, "avg_value": 6.1234, "min_value": 6.1234, "max_value": 6.1234}
+            ],
+            "active_alerts": 2, "active_crops": 1, "pending_tasks": 0, "overdue_tasks": 0,
+            "recent_harvests": [{"id": "h1", "weight_kg": 1.5, "grade": "A", "harvest_date": "2026-01-02"}],
+            "today_orders": 3, "dosing_events_24h": 4,
+            "environment": [{"sensor_type": "ph", "last_value": 6.1234}],
+        }
+        db.execute = AsyncMock(return_value=result)
+        service = DashboardService(db, mode=DashboardQueryMode.SINGLE)
+
+        dashboard = await service.get_dashboard(uuid4())
+
+        db.execute.assert_awaited_once()
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "DISTINCT ON (sensors.farm_id, sensors.sensor_type)" in sql
+        assert dashboard["alerts"]["active_count"] == 2
+        assert dashboard["environment"]["ph"] == 6.12
+        assert dashboard["harvests"]["recent"][0]["harvested_at"] == "2026-01-02"
+        assert dashboard["sensor_summary"][0]["avg_value"] == 6.12
+
+    @pytest.mark.asyncio
+    async def test_portfolio_matches_each_farms_dashboard(self, db_session, farm):
+        other = Farm(id=uuid4(), name="Second Farm", owner_id=farm.owner_id)
+        db_session.add(other)
+        await db_session.flush()
+        db_session.add(Sensor(farm_id=other.id, name="CO2", sensor_type="co2", last_value=Decimal("800")))
+        await db_session.flush()
+        service = DashboardService(db_session, mode=DashboardQueryMode.SEQUENTIAL)
+
+        portfolio = await service.get_portfolio([farm.id, other.id])
+
+        assert set(portfolio) == {farm.id, other.id}
+        for farm_id, dashboard in portfolio.items():
+            expected = await service.get_dashboard(farm_id)
+            dashboard.pop("generated_at"), expected.pop("generated_at")
+            assert dashboard == expected
+        assert portfolio[other.id]["environment"]["co2"] == 800.0
+        assert portfolio[other.id]["tasks"] == {"pending_count": 0, "overdue_count": 0}
@@ -0,0 +1,246 @@
+"""Tests for pooled email delivery and digests, against a local aiosmtpd server."""
+import socket
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from aiosmtpd.controller import Controller
+
+from app.services.email_service import EmailQueue, EmailWorker, OutgoingEmail, SMTPPool
+from app.services.notification_service import NotificationService
+
+
+class RecordingHandler:
+    def __init__(self, replies: list[str] | None = None):
+        self.replies = list(replies or [])
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(replies: list[str] | None = None):
+        handler = RecordingHandler(replies)
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        servers.append(controller)
+        return handler, SMTPPool(size=2, hostname="127.0.0.1", port=controller.port)
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def email(n: int = 0) -> OutgoingEmail:
+    return OutgoingEmail(to=f"user{n}@example.com", subject=f"Alert {n}", body="pH high")
+
+
+class FakePipeline:
+    """Immediate between WATCH and MULTI, queued otherwise, like redis-py."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.immediate = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, *keys):
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if self.immediate:
+                return getattr(self.redis, name)(*args, **kwargs)
+            self.calls.append((name, args, kwargs))
+        return call
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    async def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    async def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+    async def lmove(self, source, destination, src="LEFT", dest="RIGHT"):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop(0 if src == "LEFT" else -1)
+        target = self.lists.setdefault(destination, [])
+        target.insert(0 if dest == "LEFT" else len(target), value)
+        return value
+
+    async def blmove(self, source, destination, timeout, src="LEFT", dest="RIGHT"):
+        return await self.lmove(source, destination, src, dest)
+
+    async def delete(self, key):
+        return 1 if self.lists.pop(key, None) is not None else 0
+
+    async def zadd(self, key, mapping, nx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and member in zset):
+                zset[member] = score
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def zrangebyscore(self, key, low, high):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        return [m for m, score in items if score <= high]
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("app.core.redis_client.redis_client", fake):
+        yield fake
+
+
+async def feed(worker: EmailWorker) -> None:
+    """What the worker process does: hand everything queued to the senders."""
+    while (queued := await EmailQueue.pop(0)) is not None:
+        await worker.submit(queued)
+
+
+class TestEmailWorker:
+    @pytest.mark.asyncio
+    async def test_reuses_pooled_connections(self, smtp_server, redis):
+        handler, pool = smtp_server()
+        worker = EmailWorker(pool, concurrency=2, queue_size=5)
+        await worker.start()
+        for n in range(20):
+            await EmailQueue.push(email(n))
+        await feed(worker)
+        await worker.stop()
+
+        assert len(handler.messages) == 20
+        assert len(handler.sessions) <= 2
+        assert redis.lists[EmailQueue.PROCESSING_KEY] == []
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_failure(self, smtp_server, redis):
+        handler, pool = smtp_server(replies=["451 Try again later"])
+        worker = EmailWorker(pool, concurrency=1)
+        await worker.start()
+        await EmailQueue.push(email())
+        await feed(worker)
+        await worker._queue.join()
+
+        # Scheduled in Redis, not held by the worker.
+        [scheduled] = redis.zsets[EmailQueue.RETRY_KEY]
+        assert OutgoingEmail.from_json(scheduled).attempts == 1
+        assert redis.lists[EmailQueue.PROCESSING_KEY] == []
+        assert await EmailQueue.requeue_due_retries(now=0) == 0
+
+        assert await EmailQueue.requeue_due_retries(now=10_000_000_000) == 1
+        await feed(worker)
+        await worker.stop()
+
+        assert len(handler.messages) == 1
+        # The rejected message didn't cost a new connection.
+        assert len(handler.sessions) == 1
+        assert redis.zsets[EmailQueue.RETRY_KEY] == {}
+        assert redis.lists[EmailQueue.PROCESSING_KEY] == []
+
+    @pytest.mark.asyncio
+    async def test_permanent_rejection_is_not_retried(self, smtp_server, redis):
+        handler, pool = smtp_server(replies=["554 Rejected"])
+        worker = EmailWorker(pool, concurrency=1)
+        await worker.start()
+        await EmailQueue.push(email())
+        await feed(worker)
+        await worker.stop()
+        assert handler.messages == []
+        assert not redis.zsets.get(EmailQueue.RETRY_KEY)
+        assert redis.lists[EmailQueue.PROCESSING_KEY] == []
+
+    @pytest.mark.asyncio
+    async def test_unsettled_emails_are_recovered_first(self, redis):
+        for n in range(3):
+            await EmailQueue.push(email(n))
+        # Taken by a worker that stopped before sending them.
+        await EmailQueue.pop(0)
+        await EmailQueue.pop(0)
+
+        assert await EmailQueue.recover() == 2
+        assert [(await EmailQueue.pop(0)).to for _ in range(3)] == [
+            "user0@example.com", "user1@example.com", "user2@example.com"
+        ]
+
+
+class TestDigests:
+    @pytest.mark.asyncio
+    async def test_batches_items_per_recipient_window(self, redis):
+        with patch("app.services.email_service.settings.EMAIL_DIGEST_MINUTES", 15):
+            for n in range(3):
+                await EmailQueue.add_to_digest("a@example.com", f"Warning {n}", "EC low", now=1000.0 + n)
+            await EmailQueue.add_to_digest("b@example.com", "Warning", "pH high", now=1500.0)
+
+            assert await EmailQueue.queue_due_digests(now=1000.0 + 15 * 60 - 1) == []
+            [digest] = await EmailQueue.queue_due_digests(now=1000.0 + 15 * 60)
+            assert digest.to == "a@example.com"
+            assert digest.subject.endswith("digest: 3 notifications")
+            assert all(f"Warning {n}" in digest.body for n in range(3))
+            # Sent like any other email, so it is settled the same way.
+            assert (await EmailQueue.pop(0)).id == digest.id
+
+            # The next item opens a new window rather than joining the sent one.
+            await EmailQueue.add_to_digest("a@example.com", "Warning 3", "EC low", now=2000.0)
+            due = await EmailQueue.queue_due_digests(now=2000.0 + 15 * 60)
+            assert sorted(d.to for d in due) == ["a@example.com", "b@example.com"]
+            assert await EmailQueue.queue_due_digests(now=10_000.0) == []
+
+    @pytest.mark.asyncio
+    async def test_notification_service_routes_digest_emails(self):
+        with patch("app.core.redis_client.redis_client", AsyncMock()), patch(
+            "app.services.notification_service.EmailQueue"
+        ) as queue:
+            queue.add_to_digest = AsyncMock()
+            queue.push = AsyncMock()
+            await NotificationService.send_email_notification("a@example.com", "s", "b", digest=True)
+            await NotificationService.send_email_notification("a@example.com", "s", "b")
+
+        queue.add_to_digest.assert_awaited_once_with("a@example.com", "s", "b")
+        assert queue.push.await_args.args[0].to == "a@example.com"
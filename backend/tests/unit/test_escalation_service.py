@@ -0,0 +1,223 @@
+"""Tests for the escalation scheduler and runner."""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.core.constants import OutboxDestination
+from app.services.escalation_service import EscalationScheduler, EscalationService
+from app.services.outbox_service import OutboxService
+
+
+class FakePipeline:
+    """Immediate between WATCH and MULTI, queued otherwise, like redis-py."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.immediate = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, *keys):
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    async def reset(self):
+        self.calls, self.immediate = [], False
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if self.immediate:
+                return getattr(self.redis, name)(*args, **kwargs)
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class FakeRedis:
+    """Just enough of a sorted set and hash for the scheduler."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        return 1 if self.zsets.get(key, {}).pop(member, None) is not None else 0
+
+    async def zrangebyscore(self, key, low, high, start=0, num=None):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        members = [m for m, score in items if score <= high]
+        return members[start:start + num] if num else members[start:]
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    async def hdel(self, key, *fields):
+        for f in fields:
+            self.hashes.get(key, {}).pop(f, None)
+
+
+class TestEscalationScheduler:
+    @pytest.mark.asyncio
+    async def test_claim_due_leases_only_due_steps(self):
+        fake = FakeRedis()
+        with patch("app.core.redis_client.redis_client", fake):
+            scheduler = EscalationScheduler()
+            due_alert, later_alert, policy = uuid4(), uuid4(), uuid4()
+            await scheduler.schedule(due_alert, policy, 1, 100.0)
+            await scheduler.schedule(later_alert, policy, 0, 500.0)
+
+            assert await scheduler.claim_due(200.0) == [(due_alert, policy, 1)]
+            assert await scheduler.claim_due(200.0) == []
+            # Never settled: due again once the lease runs out.
+            lease_end = 200.0 + EscalationScheduler.LEASE_SECONDS
+            assert fake.zsets[EscalationScheduler.DUE_KEY][str(due_alert)] == lease_end
+            assert (due_alert, policy, 1) in await scheduler.claim_due(lease_end)
+
+    @pytest.mark.asyncio
+    async def test_cancel_removes_pending_step(self):
+        fake = FakeRedis()
+        with patch("app.core.redis_client.redis_client", fake):
+            scheduler = EscalationScheduler()
+            alert_id = uuid4()
+            await scheduler.schedule(alert_id, uuid4(), 0, 100.0)
+            await scheduler.cancel(alert_id)
+            assert await scheduler.claim_due(200.0) == []
+            assert fake.hashes[EscalationScheduler.STEP_KEY] == {}
+
+    @pytest.mark.asyncio
+    async def test_no_redis(self):
+        with patch("app.core.redis_client.redis_client", None):
+            scheduler = EscalationScheduler()
+            # Raised so the outbox relay retries the step later.
+            with pytest.raises(RuntimeError):
+                await scheduler.schedule(uuid4(), uuid4(), 0, 100.0)
+            await scheduler.cancel(uuid4())
+            assert await scheduler.claim_due(200.0) == []
+
+    @pytest.mark.asyncio
+    async def test_outbox_events_settle_the_scheduler(self):
+        fake = FakeRedis()
+        alert_id, policy_id = uuid4(), uuid4()
+        outbox = OutboxService(MagicMock())
+        step = outbox.schedule_escalation(uuid4(), alert_id, policy_id, 2, 300.0)
+        end = outbox.end_escalation(uuid4(), alert_id)
+        with patch("app.core.redis_client.redis_client", fake):
+            await OutboxService.handlers[OutboxDestination.ESCALATION.value](None, step)
+            assert fake.zsets[EscalationScheduler.DUE_KEY] == {str(alert_id): 300.0}
+            assert fake.hashes[EscalationScheduler.STEP_KEY][str(alert_id)] == f"{policy_id}:2"
+
+            await OutboxService.handlers[OutboxDestination.ESCALATION.value](None, end)
+            assert fake.zsets[EscalationScheduler.DUE_KEY] == {}
+
+
+class TestEscalationRunner:
+    @pytest.mark.asyncio
+    async def test_executes_step_and_schedules_next(self):
+        fake = FakeRedis()
+        policy = SimpleNamespace(
+            id=uuid4(),
+            steps=[{"delay_minutes": 0, "channels": ["push"]}, {"delay_minutes": 15}],
+        )
+        alert = SimpleNamespace(
+            id=uuid4(),
+            severity="critical",
+            title="PH alert",
+            message=None,
+            alert_rule=SimpleNamespace(farm_id=uuid4()),
+        )
+
+        def result(items):
+            r = MagicMock()
+            r.scalars.return_value.all.return_value = items
+            return r
+
+        db = AsyncMock()
+        db.add = MagicMock()
+        db.execute.side_effect = [result([alert]), result([policy])]
+
+        with patch("app.core.redis_client.redis_client", fake), patch(
+            "app.services.escalation_service.OutboxService.publish"
+        ) as publish:
+            await EscalationScheduler().schedule(alert.id, policy.id, 0, 100.0)
+            executed = await EscalationService(db).run_due(now=200.0)
+
+        assert executed == 1
+        # The caller commits; the next step reaches the scheduler through the outbox.
+        db.commit.assert_not_awaited()
+        publish.assert_called_once()
+        assert publish.call_args.args[1] == "escalation"
+        events = [c.args[0] for c in db.add.call_args_list]
+        [step] = [e for e in events if e.destination == OutboxDestination.ESCALATION.value]
+        assert step.payload == {
+            "alert_id": str(alert.id),
+            "policy_id": str(policy.id),
+            "step": 1,
+            "due_at": 200.0 + 15 * 60,
+        }
+        # Still leased until the outbox event settles it.
+        assert fake.zsets[EscalationScheduler.DUE_KEY] == {
+            str(alert.id): 200.0 + EscalationScheduler.LEASE_SECONDS
+        }
+
+    @pytest.mark.asyncio
+    async def test_failed_step_stays_scheduled(self):
+        fake = FakeRedis()
+        policy = SimpleNamespace(id=uuid4(), steps=[{"delay_minutes": 0}])
+        alert = SimpleNamespace(id=uuid4(), alert_rule=SimpleNamespace(farm_id=uuid4()))
+        db = AsyncMock()
+        db.execute.side_effect = [
+            MagicMock(**{"scalars.return_value.all.return_value": [alert]}),
+            MagicMock(**{"scalars.return_value.all.return_value": [policy]}),
+        ]
+
+        with patch("app.core.redis_client.redis_client", fake), patch.object(
+            EscalationService, "_execute_step", AsyncMock(side_effect=RuntimeError("smtp down"))
+        ):
+            await EscalationScheduler().schedule(alert.id, policy.id, 0, 100.0)
+            with pytest.raises(RuntimeError):
+                await EscalationService(db).run_due(now=200.0)
+
+        db.add.assert_not_called()
+        assert str(alert.id) in fake.zsets[EscalationScheduler.DUE_KEY]
+        assert fake.hashes[EscalationScheduler.STEP_KEY][str(alert.id)] == f"{policy.id}:0"
+
+    @pytest.mark.asyncio
+    async def test_start_schedules_only_through_the_outbox(self):
+        fake = FakeRedis()
+        policy = SimpleNamespace(id=uuid4(), steps=[{"delay_minutes": 5}])
+        rule = SimpleNamespace(farm_id=uuid4(), escalation_policy_id=policy.id)
+        alert = SimpleNamespace(id=uuid4())
+        db = AsyncMock()
+        db.add = MagicMock()
+        service = EscalationService(db)
+        service.policy_repo.get_by_id = AsyncMock(return_value=policy)
+
+        with patch("app.core.redis_client.redis_client", fake):
+            await service.start(alert, rule)
+
+        assert fake.zsets == {}
+        [event] = [c.args[0] for c in db.add.call_args_list]
+        assert event.destination == OutboxDestination.ESCALATION.value
+        assert event.payload["alert_id"] == str(alert.id)
+        assert event.payload["step"] == 0
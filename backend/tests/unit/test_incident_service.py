@@ -0,0 +1,157 @@
+"""Tests for alert incident grouping."""
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.models.farm import Farm, Zone
+from app.models.user import User
+from app.repositories.alert_repo import AlertIncidentRepository
+from app.services.incident_service import IncidentService
+
+
+def make_incident(**kwargs):
+    now = datetime(2025, 1, 1, 12, 0)
+    defaults = dict(
+        id=uuid4(),
+        zone_id=None,
+        root_sensor_type="temperature",
+        sensor_types=["temperature"],
+        severity="warning",
+        status="open",
+        alert_count=1,
+        suppressed_count=0,
+        unreported_count=0,
+        opened_at=now,
+        last_alert_at=now,
+        last_notified_at=now,
+    )
+    defaults.update(kwargs)
+    return SimpleNamespace(**defaults)
+
+
+def make_service(open_incident=None):
+    service = IncidentService(AsyncMock())
+    service.incident_repo = AsyncMock()
+    service.incident_repo.get_open_incident.return_value = open_incident
+    service.incident_repo.create_open_incident.side_effect = lambda data: make_incident(**data)
+    return service
+
+
+def make_sensor(sensor_type="temperature"):
+    return SimpleNamespace(farm_id=uuid4(), zone_id=uuid4(), sensor_type=sensor_type)
+
+
+class TestIncidentCorrelation:
+    @pytest.mark.asyncio
+    async def test_first_alert_opens_incident(self):
+        service = make_service()
+        incident, materialize = await service.correlate(
+            make_sensor(), "warning", datetime(2025, 1, 1, 12, 0), []
+        )
+        assert materialize is True
+        assert incident.root_sensor_type == "temperature"
+        service.incident_repo.create_open_incident.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_followup_alert_is_suppressed(self):
+        incident = make_incident()
+        service = make_service(incident)
+        _, materialize = await service.correlate(
+            make_sensor("humidity"), "warning", datetime(2025, 1, 1, 12, 1), []
+        )
+        assert materialize is False
+        assert incident.alert_count == 2
+        assert incident.suppressed_count == 1
+        assert incident.sensor_types == ["temperature", "humidity"]
+        service.incident_repo.create_open_incident.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_severity_escalation_is_materialized(self):
+        incident = make_incident()
+        service = make_service(incident)
+        _, materialize = await service.correlate(
+            make_sensor("co2"), "critical", datetime(2025, 1, 1, 12, 1), []
+        )
+        assert materialize is True
+        assert incident.severity == "critical"
+        assert incident.suppressed_count == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_open_incident_is_closed_and_replaced(self):
+        stale = make_incident(unreported_count=2)
+        service = make_service(stale)
+        rollups = []
+        incident, materialize = await service.correlate(
+            make_sensor(), "warning", stale.last_alert_at + timedelta(hours=2), rollups
+        )
+        assert materialize is True
+        assert incident is not stale
+        assert stale.status == "closed" and rollups == [stale]
+
+    @pytest.mark.asyncio
+    async def test_losing_a_concurrent_open_joins_the_winner(self):
+        winner = make_incident()
+        service = make_service()
+        service.incident_repo.get_open_incident.side_effect = [None, winner]
+        service.incident_repo.create_open_incident.side_effect = None
+        service.incident_repo.create_open_incident.return_value = None
+        incident, materialize = await service.correlate(
+            make_sensor(), "warning", datetime(2025, 1, 1, 12, 1), []
+        )
+        assert incident is winner and materialize is False
+        assert winner.alert_count == 2
+
+
+class TestIncidentRollup:
+    def test_rollup_waits_for_interval(self):
+        service = make_service()
+        incident = make_incident(unreported_count=3)
+        assert service.take_rollup(incident, incident.last_notified_at + timedelta(minutes=1)) is False
+        assert service.take_rollup(incident, incident.last_notified_at + timedelta(minutes=5)) is True
+        assert incident.unreported_count == 0
+
+    def test_no_rollup_without_suppressed_alerts(self):
+        service = make_service()
+        incident = make_incident()
+        assert service.take_rollup(incident, incident.last_notified_at + timedelta(hours=1)) is False
+
+    def test_rollup_payload(self):
+        payload = IncidentService.rollup_payload(make_incident(alert_count=40, suppressed_count=39))
+        assert payload["alert_count"] == 40
+        assert payload["suppressed_count"] == 39
+        assert payload["zone_id"] is None
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Incident Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    return farm
+
+
+class TestOpenIncidentIndex:
+    @pytest.mark.asyncio
+    async def test_only_one_open_incident_per_zone(self, db_session, farm):
+        zone = Zone(farm_id=farm.id, name="Z1")
+        db_session.add(zone)
+        await db_session.flush()
+        repo = AlertIncidentRepository(db_session)
+        data = {
+            key: value
+            for key, value in vars(make_incident(farm_id=farm.id, zone_id=zone.id)).items()
+            if key != "id"
+        }
+        first = await repo.create_open_incident(dict(data))
+        assert first is not None
+        assert await repo.create_open_incident(dict(data)) is None
+
+        first.status = "closed"
+        await db_session.flush()
+        assert await repo.create_open_incident(dict(data)) is not None
+        assert await repo.get_open_incident(farm.id, zone.id) is not None
@@ -1,105 +1,257 @@
 """Tests for notification service."""
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from uuid import uuid4
 
-from app.services.notification_service import NotificationService
+from redis.exceptions import WatchError
+
+from app.services.notification_service import NotificationService, event_seq
 
 
 class TestNotificationService:
     """Test notification publishing and caching."""
 
     @pytest.mark.asyncio
-    async def test_publish_alert_no_redis(self):
-        """Should handle missing Redis gracefully."""
-        with patch("app.services.notification_service.redis_client", None):
-            await NotificationService.publish_alert(
-                uuid4(), {"message": "test alert"}
-            )
-            # Should not raise
+    async def test_publish_event_no_redis(self):
+        """Raises so the outbox relay retries the event."""
+        with patch("app.core.redis_client.redis_client", None):
+            with pytest.raises(RuntimeError):
+                await NotificationService.publish_event(uuid4(), "alert", {"message": "test"})
 
     @pytest.mark.asyncio
-    async def test_publish_sensor_reading_no_redis(self):
-        with patch("app.services.notification_service.redis_client", None):
-            await NotificationService.publish_sensor_reading(
-                uuid4(), {"value": 6.5}
+    async def test_publish_alert_event(self):
+        mock_redis = AsyncMock()
+        mock_redis.xadd.return_value = "1700000000000-0"
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            farm_id = uuid4()
+            event_id = await NotificationService.publish_event(
+                farm_id, "alert", {"message": "pH too high"}
             )
+            assert event_id == "1700000000000-0"
+            mock_redis.publish.assert_called_once()
+            channel, payload = mock_redis.publish.call_args.args
+            assert channel == f"greenos:notifications:{farm_id}:alerts"
+            assert json.loads(payload)["id"] == "1700000000000-0"
+            assert mock_redis.xadd.call_args.args[0] == f"greenos:events:{farm_id}"
 
     @pytest.mark.asyncio
-    async def test_publish_dosing_event_no_redis(self):
-        with patch("app.services.notification_service.redis_client", None):
-            await NotificationService.publish_dosing_event(
-                uuid4(), {"action": "ph_up"}
+    async def test_publish_sensor_event(self):
+        mock_redis = AsyncMock()
+        mock_redis.xadd.return_value = "1-0"
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            farm_id = uuid4()
+            await NotificationService.publish_event(
+                farm_id, "sensor_reading", {"sensor_type": "ph", "value": 6.5}
             )
+            channel, _ = mock_redis.publish.call_args.args
+            assert channel == f"greenos:notifications:{farm_id}:sensors"
 
     @pytest.mark.asyncio
-    async def test_publish_task_update_no_redis(self):
-        with patch("app.services.notification_service.redis_client", None):
-            await NotificationService.publish_task_update(
-                uuid4(), {"task_id": str(uuid4())}
-            )
+    async def test_send_email_notification_without_redis_raises(self):
+        """The outbox relay retries the email until Redis is back."""
+        with patch("app.core.redis_client.redis_client", None):
+            with pytest.raises(RuntimeError):
+                await NotificationService.send_email_notification(
+                    "test@example.com", "Test Subject", "Test Body"
+                )
+
+
+def stream_entry(event_id: str, event_type: str = "alert") -> tuple:
+    return (event_id, {"event": json.dumps({"type": event_type, "farm_id": "f", "data": {}})})
+
+
+class TestEventStream:
+    """Test resuming from the per-farm event stream."""
 
     @pytest.mark.asyncio
-    async def test_publish_alert_with_redis(self):
+    async def test_read_events_since(self):
         mock_redis = AsyncMock()
-        with patch("app.services.notification_service.redis_client", mock_redis):
-            farm_id = uuid4()
-            alert_data = {"message": "pH too high"}
-            await NotificationService.publish_alert(farm_id, alert_data)
-            mock_redis.publish.assert_called_once()
+        mock_redis.xrange.side_effect = [
+            [stream_entry("100-0")],
+            [stream_entry("105-0"), stream_entry("106-0", "task_update")],
+        ]
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            events = await NotificationService.read_events_since(uuid4(), "104-3", limit=10)
+        assert [e["id"] for e in events] == ["105-0", "106-0"]
+        assert events[1]["type"] == "task_update"
+        assert mock_redis.xrange.call_args.kwargs["min"] == "(104-3"
 
     @pytest.mark.asyncio
-    async def test_publish_sensor_with_redis(self):
+    async def test_trimmed_past_cursor_needs_snapshot(self):
         mock_redis = AsyncMock()
-        with patch("app.services.notification_service.redis_client", mock_redis):
-            await NotificationService.publish_sensor_reading(
-                uuid4(), {"sensor_type": "ph", "value": 6.5}
-            )
-            mock_redis.publish.assert_called_once()
+        mock_redis.xrange.return_value = [stream_entry("200-0")]
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            assert await NotificationService.read_events_since(uuid4(), "104-3", limit=10) is None
 
     @pytest.mark.asyncio
-    async def test_cache_notification(self):
+    async def test_too_many_events_needs_snapshot(self):
         mock_redis = AsyncMock()
-        with patch("app.services.notification_service.redis_client", mock_redis):
-            user_id = uuid4()
-            notif = {"type": "alert", "message": "Test"}
-            await NotificationService.cache_notification(user_id, notif)
-            mock_redis.lpush.assert_called_once()
-            mock_redis.ltrim.assert_called_once()
-            mock_redis.expire.assert_called_once()
+        mock_redis.xrange.side_effect = [
+            [stream_entry("100-0")],
+            [stream_entry(f"{105 + i}-0") for i in range(3)],
+        ]
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            assert await NotificationService.read_events_since(uuid4(), "104-0", limit=2) is None
+
+    def test_event_seq_orders_numerically(self):
+        assert event_seq("99-5") < event_seq("100-0") < event_seq("100-10")
+
+
+class FakePipeline:
+    """Buffers commands, except between WATCH and MULTI where they run at once."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.watched = None
+        self.buffering = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def watch(self, key):
+        self.watched = (key, self.redis.versions.get(key, 0))
+        self.buffering = False
+
+    def multi(self):
+        self.buffering = True
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def call(*args, **kwargs):
+            if not self.buffering:
+                return command(*args, **kwargs)
+            self.calls.append((command, args, kwargs))
+            return self
+        return call
+
+    async def execute(self):
+        calls, self.calls = self.calls, []
+        watched, self.watched = self.watched, None
+        if watched and self.redis.versions.get(watched[0], 0) != watched[1]:
+            raise WatchError()
+        return [await command(*args, **kwargs) for command, args, kwargs in calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.streams = {}
+        self.values = {}
+        self.versions = {}
+        self.seq = 0
+        self.before_xrange = None
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.seq += 1
+        entry_id = f"{1000 + self.seq}-0"
+        entries = self.streams.setdefault(key, [])
+        entries.append((entry_id, fields))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        self.versions[key] = self.versions.get(key, 0) + 1
+        return entry_id
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = str(value)
+
+    def _after(self, key, bound):
+        entries = self.streams.get(key, [])
+        if bound in ("-", None):
+            return list(entries)
+        exclusive = bound.startswith("(")
+        low = event_seq(bound.lstrip("("))
+        return [e for e in entries if event_seq(e[0]) > low or (not exclusive and event_seq(e[0]) == low)]
+
+    async def xrange(self, key, min="-", max="+"):
+        if self.before_xrange:
+            hook, self.before_xrange = self.before_xrange, None
+            await hook()
+        return self._after(key, min)
+
+    async def xrevrange(self, key, max="+", min="-", count=None):
+        return list(reversed(self._after(key, min)))[:count]
+
+
+class TestNotificationInbox:
+    @pytest.fixture
+    def redis(self):
+        fake = FakeRedis()
+        with patch("app.core.redis_client.redis_client", fake):
+            yield fake
+
+    @staticmethod
+    async def add(user_id, n: int) -> None:
+        await NotificationService.add_to_inbox(user_id, {"type": "escalation", "n": n})
+
+    @pytest.mark.asyncio
+    async def test_unread_count_and_mark_read(self, redis):
+        user_id = uuid4()
+        for n in range(3):
+            await self.add(user_id, n)
+        assert await NotificationService.unread_count(user_id) == 3
+
+        items, unread = await NotificationService.get_inbox(user_id)
+        assert [i["n"] for i in items] == [2, 1, 0]
+        assert unread == 3 and not any(i["read"] for i in items)
+
+        assert await NotificationService.mark_read(user_id, items[1]["id"]) == 1
+        items, unread = await NotificationService.get_inbox(user_id)
+        assert [i["read"] for i in items] == [False, True, True]
+        assert unread == 1 == await NotificationService.unread_count(user_id)
+
+        # A stale tab can't move the cursor back.
+        assert await NotificationService.mark_read(user_id, items[2]["id"]) == 1
 
     @pytest.mark.asyncio
-    async def test_get_user_notifications_no_redis(self):
-        with patch("app.services.notification_service.redis_client", None):
-            result = await NotificationService.get_user_notifications(uuid4())
-            assert result == []
+    async def test_returns_only_entries_after_cursor(self, redis):
+        user_id = uuid4()
+        await self.add(user_id, 0)
+        [first], _ = await NotificationService.get_inbox(user_id)
+        await self.add(user_id, 1)
+        await self.add(user_id, 2)
+        items, _ = await NotificationService.get_inbox(user_id, after=first["id"])
+        assert [i["n"] for i in items] == [2, 1]
 
     @pytest.mark.asyncio
-    async def test_get_user_notifications_with_redis(self):
-        import json
-        mock_redis = AsyncMock()
-        notifs = [json.dumps({"type": "alert", "msg": "test"})]
-        mock_redis.lrange.return_value = notifs
-        with patch("app.services.notification_service.redis_client", mock_redis):
-            result = await NotificationService.get_user_notifications(uuid4(), limit=10)
-            assert len(result) == 1
-            assert result[0]["type"] == "alert"
+    async def test_mark_read_counts_concurrent_arrival(self, redis):
+        user_id = uuid4()
+        await self.add(user_id, 0)
+        [item], _ = await NotificationService.get_inbox(user_id)
+        redis.before_xrange = lambda: self.add(user_id, 1)
+        assert await NotificationService.mark_read(user_id, item["id"]) == 1
+        assert await NotificationService.unread_count(user_id) == 1
 
     @pytest.mark.asyncio
-    async def test_send_email_notification(self):
-        """Email notification should log without error."""
-        await NotificationService.send_email_notification(
-            "test@example.com", "Test Subject", "Test Body"
-        )
-        # Should complete without error
+    async def test_inbox_is_capped(self, redis):
+        user_id = uuid4()
+        with patch("app.services.notification_service.settings.NOTIFICATION_INBOX_SIZE", 2):
+            for n in range(5):
+                await self.add(user_id, n)
+            items, unread = await NotificationService.get_inbox(user_id, limit=10)
+            assert [i["n"] for i in items] == [4, 3]
+            assert unread == 2
 
     @pytest.mark.asyncio
-    async def test_publish_alert_redis_error(self):
-        """Should handle Redis errors gracefully."""
-        mock_redis = AsyncMock()
-        mock_redis.publish.side_effect = Exception("Redis connection lost")
-        with patch("app.services.notification_service.redis_client", mock_redis):
-            # Should not raise
-            await NotificationService.publish_alert(
-                uuid4(), {"message": "test"}
-            )
+    async def test_no_redis(self):
+        with patch("app.core.redis_client.redis_client", None):
+            with pytest.raises(RuntimeError):
+                await NotificationService.add_to_inbox(uuid4(), {"type": "alert"})
+            assert await NotificationService.get_inbox(uuid4()) == ([], 0)
+            assert await NotificationService.unread_count(uuid4()) == 0
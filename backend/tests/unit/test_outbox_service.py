@@ -0,0 +1,169 @@
+"""Tests for the transactional outbox."""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.constants import OutboxDestination
+from app.core.mqtt_client import AckTrackingStorage
+from app.models.farm import Farm
+from app.models.outbox import OutboxEvent
+from app.models.user import User
+from app.services.outbox_service import OutboxService
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Outbox Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    return farm
+
+
+async def pending(db_session) -> list[OutboxEvent]:
+    result = await db_session.execute(
+        select(OutboxEvent).order_by(OutboxEvent.created_at)
+    )
+    return list(result.scalars().all())
+
+
+class TestOutboxService:
+    @pytest.mark.asyncio
+    async def test_enqueue_is_part_of_the_transaction(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        with patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            new_callable=AsyncMock,
+        ) as publish:
+            outbox.publish(farm.id, "escalation", {"alert_id": "a"})
+            await db_session.flush()
+            publish.assert_not_awaited()
+
+        [event] = await pending(db_session)
+        assert event.destination == OutboxDestination.REDIS.value
+        assert event.published_at is None
+        assert event.attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_relay_delivers_and_marks_published(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        outbox.publish(farm.id, "escalation", {"alert_id": "a"})
+        outbox.publish(farm.id, "task_update", {"task_id": "t"})
+        await db_session.flush()
+
+        now = datetime.utcnow() + timedelta(seconds=1)
+        with patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            new_callable=AsyncMock,
+        ) as publish:
+            assert await outbox.relay_batch(limit=10, now=now) == 2
+            assert await outbox.relay_batch(limit=10, now=now) == 0
+
+        assert [c.args[1] for c in publish.await_args_list] == ["escalation", "task_update"]
+        assert all(e.published_at == now for e in await pending(db_session))
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_backs_off(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        outbox.publish(farm.id, "escalation", {})
+        await db_session.flush()
+
+        now = datetime.utcnow() + timedelta(seconds=1)
+        with patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            AsyncMock(side_effect=ConnectionError("redis down")),
+        ):
+            assert await outbox.relay_batch(now=now) == 1
+            # Not due again until the backoff has passed.
+            assert await outbox.relay_batch(now=now + timedelta(seconds=1)) == 0
+            assert await outbox.relay_batch(now=now + timedelta(seconds=2)) == 1
+
+        [event] = await pending(db_session)
+        assert event.attempts == 2
+        assert event.last_error == "redis down"
+        assert event.published_at is None
+        assert event.available_at == now + timedelta(seconds=2 + 4)
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        event = outbox.publish(farm.id, "escalation", {})
+        event.attempts = OutboxService.MAX_ATTEMPTS - 1
+        await db_session.flush()
+
+        now = datetime.utcnow() + timedelta(seconds=1)
+        with patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            AsyncMock(side_effect=ConnectionError("redis down")),
+        ):
+            assert await outbox.relay_batch(now=now) == 1
+            assert await outbox.relay_batch(now=now + timedelta(days=1)) == 0
+
+    @pytest.mark.asyncio
+    async def test_device_command_goes_to_mqtt(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        outbox.send_device_command(farm.id, "greenos/pump/1/cmd", {"action": "dose"})
+        await db_session.flush()
+
+        with patch("app.core.mqtt_client.publish_acked", new_callable=AsyncMock) as publish:
+            assert await outbox.relay_batch(now=datetime.utcnow() + timedelta(seconds=1)) == 1
+
+        publish.assert_awaited_once_with("greenos/pump/1/cmd", '{"action": "dose"}')
+        [event] = await pending(db_session)
+        assert event.published_at is not None
+
+    @pytest.mark.asyncio
+    async def test_device_command_waits_for_puback(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        outbox.send_device_command(farm.id, "greenos/pump/1/cmd", {"action": "dose"})
+        await db_session.flush()
+
+        storage = AckTrackingStorage(5)
+        broker_acks = False
+
+        def publish(*args, **kwargs):
+            storage.push_message_nowait(7, b"")
+            if broker_acks:
+                asyncio.ensure_future(storage.remove_message_by_mid(7))
+
+        client = MagicMock()
+        client.publish.side_effect = publish
+        with patch("app.core.mqtt_client.mqtt_client", client), \
+                patch("app.core.mqtt_client._storage", storage), \
+                patch.object(settings, "MQTT_PUBACK_TIMEOUT_SECONDS", 0.01):
+            assert await outbox.relay_batch(now=datetime.utcnow() + timedelta(seconds=1)) == 1
+            [event] = await pending(db_session)
+            assert event.published_at is None and event.attempts == 1
+
+            broker_acks = True
+            assert await outbox.relay_batch(now=event.available_at) == 1
+            assert event.published_at is not None
+
+    @pytest.mark.asyncio
+    async def test_has_due(self, db_session, farm):
+        outbox = OutboxService(db_session)
+        assert not await outbox.has_due()
+        outbox.publish(farm.id, "escalation", {})
+        await db_session.flush()
+        assert await outbox.has_due(datetime.utcnow() + timedelta(seconds=1))
+
+    @pytest.mark.asyncio
+    async def test_webhook_event_types_also_go_to_webhooks(self, db_session, farm):
+        OutboxService(db_session).publish(farm.id, "alert", {"alert_id": "a"})
+        await db_session.flush()
+        assert sorted(e.destination for e in await pending(db_session)) == [
+            OutboxDestination.REDIS.value,
+            OutboxDestination.WEBHOOK.value,
+        ]
+
+    def test_backoff_is_capped(self):
+        assert OutboxService._backoff(1) == OutboxService.BASE_BACKOFF_SECONDS
+        assert OutboxService._backoff(3) == OutboxService.BASE_BACKOFF_SECONDS * 4
+        assert OutboxService._backoff(30) == OutboxService.MAX_BACKOFF_SECONDS
@@ -0,0 +1,122 @@
+"""Tests for read-replica routing."""
+import contextlib
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import AppSession
+from app.core.dependencies import get_read_db
+from app.core.read_replica import ReadReplica
+from app.models.user import Permission
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = (value, ex)
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("app.core.redis_client.redis_client", fake):
+        yield fake
+
+
+@pytest.fixture(autouse=True)
+def replica_settings():
+    with patch.object(settings, "DATABASE_REPLICA_URL", "postgresql+asyncpg://replica/greenos"), \
+            patch.object(settings, "DB_REPLICA_MAX_LAG_SECONDS", 5.0), \
+            patch.object(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 60.0), \
+            patch.object(ReadReplica, "_checked_at", None), \
+            patch.object(ReadReplica, "_lag", None):
+        yield
+
+
+async def first_session(user_id, primary):
+    dependency = get_read_db(db=primary, current_user=SimpleNamespace(id=user_id))
+    session = await dependency.__anext__()
+    await dependency.aclose()
+    return session
+
+
+class TestReadReplica:
+    @pytest.mark.asyncio
+    async def test_lag_is_checked_once_per_interval(self):
+        session = SimpleNamespace(scalar=AsyncMock(return_value=2.5))
+        assert await ReadReplica.within_lag(session)
+        session.scalar.return_value = 30.0
+        assert await ReadReplica.within_lag(session)
+        session.scalar.assert_awaited_once()
+
+        ReadReplica._checked_at = None
+        assert not await ReadReplica.within_lag(session)
+
+    @pytest.mark.asyncio
+    async def test_failed_lag_check_reads_from_primary(self):
+        session = SimpleNamespace(scalar=AsyncMock(side_effect=RuntimeError("replica down")))
+        assert not await ReadReplica.within_lag(session)
+
+    @pytest.mark.asyncio
+    async def test_commits_that_write_make_reads_sticky(self, engine, redis):
+        user_id = uuid4()
+        async with AppSession(engine) as session:
+            session.info["user_id"] = user_id
+            await session.get(Permission, uuid4())
+            await session.commit()
+        assert not await ReadReplica.recently_wrote(user_id)
+
+        async with AppSession(engine) as session:
+            session.info["user_id"] = user_id
+            await session.execute(update(Permission).where(Permission.codename == "missing"))
+            await session.commit()
+        assert await ReadReplica.recently_wrote(user_id)
+        assert redis.values[ReadReplica.write_key(user_id)][1] == settings.DB_READ_YOUR_WRITES_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_sessionmaker_follows_the_session(self, engine):
+        replica_factory = object()
+        async with AsyncSession(engine) as session:
+            assert database.sessionmaker_for(session) is database.AsyncSessionLocal
+            with patch.object(database, "replica_engine", engine), \
+                    patch.object(database, "ReplicaSessionLocal", replica_factory):
+                assert database.sessionmaker_for(session) is replica_factory
+
+    @pytest.mark.asyncio
+    async def test_without_redis_reads_stay_on_primary(self):
+        with patch("app.core.redis_client.redis_client", None):
+            assert await ReadReplica.recently_wrote(uuid4())
+
+    @pytest.mark.asyncio
+    async def test_get_read_db_routing(self, redis):
+        primary, replica = object(), object()
+
+        @contextlib.asynccontextmanager
+        async def replica_factory():
+            yield replica
+
+        lag = AsyncMock(return_value=True)
+        with patch.object(database, "ReplicaSessionLocal", replica_factory), \
+                patch.object(ReadReplica, "within_lag", lag):
+            reader, writer = uuid4(), uuid4()
+            await ReadReplica.mark_write(writer)
+
+            assert await first_session(reader, primary) is replica
+            assert await first_session(writer, primary) is primary
+            lag.return_value = False
+            assert await first_session(reader, primary) is primary
+
+        with patch.object(settings, "DATABASE_REPLICA_URL", None):
+            assert await first_session(reader, primary) is primary
+
@@ -0,0 +1,237 @@
+"""Tests for the per-process realtime fan-out hub."""
+import asyncio
+import fnmatch
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.api.v1.realtime import _authorize, _catch_up, _forward
+from app.core.security import create_refresh_token
+from app.services.notification_service import NotificationService
+from app.services.realtime_hub import RealtimeHub, SensorStream
+
+
+def pattern(farm_id: str) -> str:
+    return NotificationService.farm_pattern(farm_id)
+
+
+def message(farm_id: str, n: int = 0) -> str:
+    return json.dumps({"type": "sensor_reading", "farm_id": farm_id, "data": {"n": n}})
+
+
+class FakePubSub:
+    """Delivers queued publishes to matching patterns until all are unsubscribed."""
+
+    def __init__(self):
+        self.patterns: set[str] = set()
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def psubscribe(self, *patterns):
+        self.patterns.update(patterns)
+
+    async def punsubscribe(self, *patterns):
+        self.patterns.difference_update(patterns)
+        await self.inbox.put(None)
+
+    def publish(self, channel: str, data: str) -> None:
+        self.inbox.put_nowait((channel, data))
+
+    async def listen(self):
+        while self.patterns:
+            item = await self.inbox.get()
+            if item is None:
+                continue
+            channel, data = item
+            for p in list(self.patterns):
+                if fnmatch.fnmatchcase(channel, p):
+                    yield {"type": "pmessage", "pattern": p, "channel": channel, "data": data}
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestRealtimeHub:
+    @pytest.mark.asyncio
+    async def test_routes_by_matched_pattern(self):
+        hub = RealtimeHub()
+        a, b = str(uuid4()), str(uuid4())
+        queue_a1, queue_a2 = await hub.subscribe(a), await hub.subscribe(a)
+        queue_b = await hub.subscribe(b)
+        queue_all = await hub.subscribe(RealtimeHub.ALL_FARMS)
+        raw = message(a)
+        channel = NotificationService.channel(a, "alerts")
+        hub.dispatch(pattern(a), channel, raw)
+        hub.dispatch(NotificationService.farm_pattern(), channel, raw)
+        assert queue_a1.get_nowait() == raw
+        assert queue_a2.get_nowait() == raw
+        assert queue_b.empty()
+        assert queue_all.get_nowait() == raw
+
+    @pytest.mark.asyncio
+    async def test_slow_client_drops_oldest(self):
+        hub = RealtimeHub()
+        hub.QUEUE_SIZE = 3
+        farm_id = str(uuid4())
+        queue = await hub.subscribe(farm_id)
+        for n in range(5):
+            hub.dispatch(pattern(farm_id), NotificationService.channel(farm_id, "tasks"), message(farm_id, n))
+        assert [json.loads(queue.get_nowait())["data"]["n"] for _ in range(3)] == [2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_sensor_messages_are_decoded_once(self):
+        hub = RealtimeHub()
+        farm_id = str(uuid4())
+        queues = [await hub.subscribe(farm_id) for _ in range(3)]
+        raw = json.dumps({"type": "sensor_reading", "farm_id": farm_id, "data": {"sensor_id": "s", "n": 7}})
+        hub.dispatch(pattern(farm_id), NotificationService.channel(farm_id, "sensors"), raw)
+        items = [q.get_nowait() for q in queues]
+        assert items[0]["data"] == {"sensor_id": "s", "n": 7}
+        assert all(item is items[0] for item in items)
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_empty_farm(self):
+        hub = RealtimeHub()
+        farm_id = str(uuid4())
+        queue = await hub.subscribe(farm_id)
+        await hub.unsubscribe(farm_id, queue)
+        assert farm_id not in hub._queues
+        await hub.unsubscribe(farm_id, queue)  # idempotent
+
+    @pytest.mark.asyncio
+    async def test_subscribes_only_to_watched_farms(self):
+        hub = RealtimeHub()
+        watched, other = str(uuid4()), str(uuid4())
+        pubsub = FakePubSub()
+        mock_redis = MagicMock()
+        mock_redis.pubsub.return_value = pubsub
+
+        with patch("app.core.redis_client.redis_client", mock_redis):
+            await hub.start()
+            queues = [await hub.subscribe(watched) for _ in range(100)]
+            await asyncio.sleep(0)
+            assert pubsub.patterns == {pattern(watched)}
+
+            pubsub.publish(NotificationService.channel(other, "sensors"), message(other, 1))
+            pubsub.publish(NotificationService.channel(watched, "alerts"), message(watched, 2))
+            raw = await asyncio.wait_for(queues[0].get(), timeout=1)
+            assert json.loads(raw)["data"]["n"] == 2
+            assert all(q.qsize() == 1 for q in queues[1:])
+
+            for queue in queues:
+                await hub.unsubscribe(watched, queue)
+            await asyncio.sleep(0.01)
+            assert pubsub.patterns == set()
+            assert pubsub.closed
+            await hub.stop()
+
+        # One connection regardless of socket count.
+        mock_redis.pubsub.assert_called_once()
+
+
+def reading(sensor_id: str, value: float, zone_id: str = "z1", sensor_type: str = "ph") -> dict:
+    return {"sensor_id": sensor_id, "zone_id": zone_id, "sensor_type": sensor_type, "value": value}
+
+
+def event(data: dict, event_id: str = "1-0") -> dict:
+    return {"id": event_id, "type": "sensor_reading", "farm_id": "f", "data": data}
+
+
+class TestSensorStream:
+    def test_coalesces_to_latest_value_per_interval(self):
+        stream = SensorStream(interval=1.0)
+        stream.add(event(reading("a", 6.0)))
+        assert stream.seconds_until_flush(0.0) == 0.0
+        assert json.loads(stream.flush(0.0))["data"] == [reading("a", 6.0)]
+
+        for value in (6.1, 6.2, 6.3):
+            stream.add(event(reading("a", value)))
+        stream.add(event(reading("b", 1.5), "7-0"))
+        assert stream.seconds_until_flush(0.4) == pytest.approx(0.6)
+        assert stream.flush(0.4) is None
+        frame = json.loads(stream.flush(1.0))
+        assert frame["type"] == "sensor_readings"
+        assert frame["id"] == "7-0"
+        assert frame["data"] == [reading("a", 6.3), reading("b", 1.5)]
+        assert stream.seconds_until_flush(1.5) is None
+
+    def test_sends_only_changed_values(self):
+        stream = SensorStream(interval=1.0)
+        stream.add(event(reading("a", 6.0)))
+        stream.add(event(reading("b", 1.5)))
+        stream.flush(0.0)
+        stream.add(event(reading("a", 6.0)))
+        stream.add(event(reading("b", 1.6)))
+        assert json.loads(stream.flush(1.0))["data"] == [reading("b", 1.6)]
+        stream.add(event(reading("a", 6.0)))
+        assert stream.flush(2.0) is None
+
+    def test_filters_zones_and_types(self):
+        stream = SensorStream(interval=1.0, zone_ids={"z1"}, sensor_types={"ph", "ec"})
+        stream.add(event(reading("a", 6.0, zone_id="z2")))
+        stream.add(event(reading("b", 22.0, sensor_type="temperature")))
+        assert stream.seconds_until_flush(0.0) is None
+        stream.add(event(reading("c", 1.2, sensor_type="ec")))
+        assert [r["sensor_id"] for r in json.loads(stream.flush(0.0))["data"]] == ["c"]
+
+
+class TestRealtimeAuthorization:
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_token(self):
+        assert await _authorize("not-a-jwt", uuid4()) is False
+
+    @pytest.mark.asyncio
+    async def test_rejects_refresh_token_type(self):
+        token = create_refresh_token({"sub": str(uuid4())})
+        assert await _authorize(token, uuid4()) is False
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+class TestResume:
+    @pytest.mark.asyncio
+    async def test_replays_missed_events(self):
+        websocket = FakeWebSocket()
+        stream = SensorStream(interval=1.0)
+        events = [
+            {"id": "5-0", "type": "alert", "farm_id": "f", "data": {}},
+            event(reading("a", 6.0), "6-0"),
+        ]
+        with patch(
+            "app.services.notification_service.NotificationService.read_events_since",
+            AsyncMock(return_value=events),
+        ):
+            cursor = await _catch_up(websocket, uuid4(), "4-0", stream)
+        assert cursor == "6-0"
+        assert [m["id"] for m in websocket.sent] == ["5-0"]
+        assert json.loads(stream.flush(0.0))["id"] == "6-0"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_snapshot(self):
+        websocket = FakeWebSocket()
+        snapshot = {"type": "snapshot", "id": "9-0", "data": {"sensors": [], "active_alerts": []}}
+        with patch(
+            "app.services.notification_service.NotificationService.read_events_since",
+            AsyncMock(return_value=None),
+        ), patch("app.api.v1.realtime._snapshot", AsyncMock(return_value=snapshot)):
+            cursor = await _catch_up(websocket, uuid4(), "1-0", SensorStream(interval=1.0))
+        assert cursor == "9-0"
+        assert websocket.sent == [snapshot]
+
+    @pytest.mark.asyncio
+    async def test_forward_skips_already_replayed_events(self):
+        websocket = FakeWebSocket()
+        queue: asyncio.Queue = asyncio.Queue()
+        for event_id in ("5-0", "6-0", "7-0"):
+            queue.put_nowait(json.dumps({"id": event_id, "type": "alert", "data": {}}))
+        task = asyncio.create_task(_forward(websocket, queue, SensorStream(interval=1.0), "6-0"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        assert [m["id"] for m in websocket.sent] == ["7-0"]
@@ -0,0 +1,173 @@
+"""Tests for the tag-invalidated response cache."""
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi import Depends, FastAPI
+from pydantic import BaseModel, ConfigDict
+
+from app.core.constants import VersionedEntity
+from app.core.response_cache import cached_response
+from app.core.response_versions import ResponseVersions
+from app.core.security import get_current_active_user
+from app.models.farm import Farm
+from app.models.user import Role, User
+from app.repositories.farm_repo import RackRepository, ZoneRepository
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name, args))
+        return call
+
+    async def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.values = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, value)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value.decode() if isinstance(value, bytes) else value
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("app.core.redis_client.redis_client", fake):
+        yield fake
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Cached Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    return farm
+
+
+class ZoneOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    name: str
+
+
+def layout_app(calls: list, user: User) -> FastAPI:
+    app = FastAPI()
+    app.dependency_overrides[get_current_active_user] = lambda: user
+
+    @app.get("/farms/{farm_id}/zones", response_model=list[ZoneOut])
+    @cached_response(VersionedEntity.FARM_LAYOUT)
+    async def list_zones(farm_id: str, _: User = Depends(get_current_active_user)):
+        calls.append(farm_id)
+        return [SimpleNamespace(name="Zone A")]
+
+    return app
+
+
+async def get(app: FastAPI, url: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(url)
+
+
+def profile_app(calls: list) -> FastAPI:
+    app = FastAPI()
+    app.dependency_overrides[get_current_active_user] = lambda: User(is_superuser=True)
+
+    @app.get("/crops/profiles/{profile_id}", response_model=ZoneOut)
+    @cached_response(VersionedEntity.CROP_PROFILES)
+    async def get_profile(profile_id: str, _: User = Depends(get_current_active_user)):
+        calls.append(profile_id)
+        return SimpleNamespace(name=profile_id)
+
+    return app
+
+
+class TestResponseCache:
+    @pytest.mark.asyncio
+    async def test_repeated_reads_are_served_from_redis(self, redis):
+        calls = []
+        operator = User(is_superuser=False, role=Role(name="operator"))
+        app = layout_app(calls, operator)
+        url = f"/farms/{uuid4()}/zones"
+
+        first = await get(app, url)
+        second = await get(app, url)
+
+        assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+        assert first.json() == second.json() == [{"name": "Zone A"}]
+        assert len(calls) == 1
+
+        # Other roles and query strings get their own entries.
+        await get(layout_app(calls, User(is_superuser=True)), url)
+        await get(app, url + "?limit=5")
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_repository_writes_invalidate_on_commit(self, db_session, farm, redis):
+        calls = []
+        app = layout_app(calls, User(is_superuser=True))
+        url = f"/farms/{farm.id}/zones"
+        other_url = f"/farms/{uuid4()}/zones"
+        await get(app, url)
+        await get(app, other_url)
+
+        zone = await ZoneRepository(db_session).create({"farm_id": farm.id, "name": "Zone B"})
+        await ResponseVersions.bump(ResponseVersions.pop_pending(db_session))
+        assert (await get(app, url)).headers["x-cache"] == "MISS"
+        assert (await get(app, other_url)).headers["x-cache"] == "HIT"
+
+        # Racks don't know their farm, so they invalidate every farm's layout.
+        await RackRepository(db_session).create({"zone_id": zone.id, "name": "R1"})
+        assert ResponseVersions.pop_pending(db_session) == {(None, VersionedEntity.FARM_LAYOUT.value)}
+        await ResponseVersions.bump([(None, VersionedEntity.FARM_LAYOUT.value)])
+        assert (await get(app, other_url)).headers["x-cache"] == "MISS"
+        assert len(calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_path_parameters_get_their_own_entries(self, redis):
+        calls = []
+        app = profile_app(calls)
+
+        a = await get(app, "/crops/profiles/a")
+        b = await get(app, "/crops/profiles/b")
+        again = await get(app, "/crops/profiles/b")
+
+        assert a.json() == {"name": "a"} and b.json() == {"name": "b"}
+        assert b.headers["x-cache"] == "MISS" and again.headers["x-cache"] == "HIT"
+        assert calls == ["a", "b"]
@@ -0,0 +1,149 @@
+"""Tests for per-farm response versions and conditional GETs."""
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from fastapi import Depends, FastAPI
+
+from app.core import redis_client
+from app.core.celery_app import run_async
+from app.core.constants import VersionedEntity
+from app.core.database import AppSession
+from app.core.dependencies import conditional_get
+from app.core.response_versions import ResponseVersions
+from app.core.security import get_current_active_user
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name, args))
+        return call
+
+    async def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, value)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+
+@pytest.fixture
+def redis():
+    fake = FakeRedis()
+    with patch("app.core.redis_client.redis_client", fake):
+        yield fake
+
+
+class TestResponseVersions:
+    @pytest.mark.asyncio
+    async def test_versions_are_bumped_only_on_commit(self, engine, redis):
+        farm_id = uuid4()
+        etag = await ResponseVersions.etag(farm_id, [VersionedEntity.TASKS])
+        orders_etag = await ResponseVersions.etag(farm_id, [VersionedEntity.ORDERS])
+
+        async with AppSession(engine) as session:
+            ResponseVersions.touch(session, farm_id, VersionedEntity.TASKS)
+            await session.rollback()
+            await session.commit()
+        assert await ResponseVersions.etag(farm_id, [VersionedEntity.TASKS]) == etag
+
+        async with AppSession(engine) as session:
+            ResponseVersions.touch(session, farm_id, VersionedEntity.TASKS, VersionedEntity.TASKS)
+            await session.commit()
+        assert redis.hashes[ResponseVersions.key(farm_id)][VersionedEntity.TASKS.value] == "1"
+        assert await ResponseVersions.etag(farm_id, [VersionedEntity.TASKS]) != etag
+        assert await ResponseVersions.etag(farm_id, [VersionedEntity.ORDERS]) == orders_etag
+
+    @pytest.mark.asyncio
+    async def test_a_flushed_redis_does_not_reuse_etags(self, redis):
+        farm_id = uuid4()
+        etag = await ResponseVersions.etag(farm_id, [VersionedEntity.SENSORS])
+        redis.hashes.clear()
+        assert await ResponseVersions.etag(farm_id, [VersionedEntity.SENSORS]) != etag
+
+    @pytest.mark.asyncio
+    async def test_dropped_bump_is_logged(self, caplog):
+        with patch("app.core.redis_client.redis_client", None):
+            await ResponseVersions.bump([])
+            assert not caplog.records
+            await ResponseVersions.bump([(None, VersionedEntity.TASKS.value)])
+        assert "not bumped" in caplog.records[0].getMessage()
+
+    def test_celery_tasks_run_with_redis(self):
+        fake = MagicMock(close=AsyncMock())
+        seen = []
+
+        async def task():
+            seen.append(redis_client.redis_client)
+            return 42
+
+        with patch("app.core.redis_client.aioredis.from_url", return_value=fake):
+            assert run_async(task()) == 42
+        assert seen == [fake]
+        fake.close.assert_awaited_once()
+        assert redis_client.redis_client is None
+
+    def test_matches_uses_weak_comparison(self):
+        etag = 'W/"abc"'
+        assert ResponseVersions.matches('"abc"', etag)
+        assert ResponseVersions.matches('W/"xyz", W/"abc"', etag)
+        assert ResponseVersions.matches("*", etag)
+        assert not ResponseVersions.matches('"xyz"', etag)
+        assert not ResponseVersions.matches(None, etag)
+
+    @pytest.mark.asyncio
+    async def test_conditional_get_skips_the_endpoint_when_unchanged(self, redis):
+        app = FastAPI()
+        app.dependency_overrides[get_current_active_user] = lambda: None
+        calls = []
+
+        @app.get(
+            "/farms/{farm_id}/tasks",
+            dependencies=[Depends(conditional_get(VersionedEntity.TASKS))],
+        )
+        async def list_tasks(farm_id: str):
+            calls.append(farm_id)
+            return {"items": []}
+
+        farm_id = uuid4()
+        url = f"/farms/{farm_id}/tasks"
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get(url)
+            etag = first.headers["etag"]
+            cached = await client.get(url, headers={"If-None-Match": etag})
+            other_query = await client.get(url + "?skip=20", headers={"If-None-Match": etag})
+            await ResponseVersions.bump([(str(farm_id), VersionedEntity.TASKS.value)])
+            changed = await client.get(url, headers={"If-None-Match": etag})
+
+        assert first.status_code == 200
+        assert cached.status_code == 304 and cached.headers["etag"] == etag
+        assert other_query.status_code == 200
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert len(calls) == 3
@@ -1,11 +1,20 @@
 """Tests for sensor service."""
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
+from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 
+from sqlalchemy import select
+
 from app.core.constants import SensorType
 from app.core.exceptions import NotFoundException
+from app.models.alert import Alert, AlertRule
+from app.models.farm import Farm, Zone
+from app.models.sensor import Sensor
+from app.models.user import User
+from app.services.anomaly_detector import AnomalyState
+from app.services.outbox_service import OutboxService
 from app.services.sensor_service import SensorService
 from app.schemas.sensor import SensorCreate, SensorUpdate, SensorReadingCreate
 
@@ -91,3 +100,95 @@ class TestSensorService:
         await service.delete_sensor(sensor.id)
         with pytest.raises(NotFoundException):
             await service.get_sensor(sensor.id)
+
+
+@pytest.fixture
+async def zone(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Ingest Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    zone = Zone(farm_id=farm.id, name="Z1")
+    db_session.add(zone)
+    await db_session.flush()
+    return zone
+
+
+class TestReadingAlerts:
+    @pytest.mark.asyncio
+    async def test_recorded_reading_raises_stored_alert(self, db_session, zone):
+        sensor = Sensor(
+            farm_id=zone.farm_id, zone_id=zone.id, name="Air", sensor_type="temperature"
+        )
+        db_session.add(sensor)
+        db_session.add(
+            AlertRule(
+                farm_id=zone.farm_id,
+                sensor_type="temperature",
+                condition="above",
+                threshold_max=Decimal("30"),
+                severity="warning",
+            )
+        )
+        await db_session.flush()
+        service = SensorService(db_session)
+
+        with patch("app.core.redis_client.redis_client", None), patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            new_callable=AsyncMock,
+        ):
+            await service.record_reading(
+                sensor.id, {"value": 24.0, "recorded_at": datetime.utcnow()}
+            )
+            reading = await service.record_reading(
+                sensor.id, {"value": 31.5, "recorded_at": datetime.utcnow()}
+            )
+            # Nothing is evaluated until the reading's transaction is relayed.
+            assert (await db_session.execute(select(Alert))).scalars().all() == []
+            await OutboxService(db_session).relay_batch(
+                now=datetime.utcnow() + timedelta(seconds=1)
+            )
+
+        [alert] = (await db_session.execute(select(Alert))).scalars().all()
+        assert alert.sensor_id == sensor.id
+        assert alert.sensor_reading_id == reading.id
+        assert alert.triggered_value == Decimal("31.5")
+
+    @pytest.mark.asyncio
+    async def test_anomalous_reading_raises_stored_alert(self, db_session, zone):
+        baseline = AnomalyState(count=100, level=20.0, variance=0.25)
+        sensor = Sensor(
+            farm_id=zone.farm_id,
+            zone_id=zone.id,
+            name="Air",
+            sensor_type="temperature",
+            anomaly_state=baseline.to_dict(),
+        )
+        db_session.add(sensor)
+        db_session.add(
+            AlertRule(
+                farm_id=zone.farm_id,
+                sensor_type="temperature",
+                condition="anomaly",
+                threshold_max=Decimal("4"),
+                severity="warning",
+            )
+        )
+        await db_session.flush()
+
+        with patch("app.core.redis_client.redis_client", None), patch(
+            "app.services.notification_service.NotificationService.publish_event",
+            new_callable=AsyncMock,
+        ):
+            reading = await SensorService(db_session).record_reading(
+                sensor.id, {"value": 26.0, "recorded_at": datetime.utcnow()}
+            )
+            await OutboxService(db_session).relay_batch(
+                now=datetime.utcnow() + timedelta(seconds=1)
+            )
+
+        [alert] = (await db_session.execute(select(Alert))).scalars().all()
+        assert alert.sensor_reading_id == reading.id
+        assert sensor.anomaly_state["count"] == 101
@@ -50,17 +50,17 @@ class TestTaskService:
             await self._create_task(
                 service, sample_farm.id, sample_user.id, title=f"Task {i}"
             )
-        tasks, total = await service.list_tasks(sample_farm.id)
-        assert total >= 3
+        page = await service.list_tasks(sample_farm.id)
+        assert page.total >= 3
 
     @pytest.mark.asyncio
     async def test_list_tasks_filter_by_status(self, db_session, sample_farm, sample_user):
         service = TaskService(db_session)
         await self._create_task(service, sample_farm.id, sample_user.id)
-        tasks, total = await service.list_tasks(
+        page = await service.list_tasks(
             sample_farm.id, status=TaskStatus.PENDING
         )
-        assert all(t.status == TaskStatus.PENDING for t, in [(t,) for t in tasks])
+        assert all(t.status == TaskStatus.PENDING for t, in [(t,) for t in page.items])
 
     @pytest.mark.asyncio
     async def test_update_task(self, db_session, sample_farm, sample_user):
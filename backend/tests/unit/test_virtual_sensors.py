@@ -0,0 +1,54 @@
+"""Tests for virtual sensor formulas."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.sensor import Sensor
+from app.services.virtual_sensors import VIRTUAL_FORMULAS, vapor_pressure_deficit
+
+
+class TestVirtualFormulas:
+    def test_vpd_known_value(self):
+        assert vapor_pressure_deficit(25.0, 60.0) == pytest.approx(1.27, abs=0.01)
+
+    def test_vpd_needs_both_inputs(self):
+        vpd = VIRTUAL_FORMULAS["vpd"]
+        sensor = Sensor(sensor_type="vpd")
+        assert vpd.compute(sensor, {"temperature": 25.0}, {}, datetime(2025, 1, 1)) is None
+        assert vpd.compute(
+            sensor, {"temperature": 25.0, "humidity": 60.0}, {}, datetime(2025, 1, 1)
+        ) == pytest.approx(1.27, abs=0.01)
+
+    def test_dli_integrates_and_resets_daily(self):
+        dli = VIRTUAL_FORMULAS["dli"]
+        sensor = Sensor(sensor_type="dli")
+        state: dict = {}
+        start = datetime(2025, 1, 1, 6)
+        # 500 µmol/m²/s for one hour = 1.8 mol/m².
+        for minute in range(61):
+            value = dli.compute(
+                sensor, {"light": 500.0}, state, start + timedelta(minutes=minute)
+            )
+        assert value == pytest.approx(1.8)
+
+        next_day = dli.compute(sensor, {"light": 500.0}, state, datetime(2025, 1, 2, 6))
+        assert next_day == 0.0
+
+    def test_dli_ignores_out_of_order_readings(self):
+        dli = VIRTUAL_FORMULAS["dli"]
+        sensor = Sensor(sensor_type="dli")
+        state: dict = {}
+        dli.compute(sensor, {"light": 500.0}, state, datetime(2025, 1, 1, 6, 10))
+        assert dli.compute(sensor, {"light": 500.0}, state, datetime(2025, 1, 1, 6)) == 0.0
+
+    def test_ratio_uses_metadata(self):
+        ratio = VIRTUAL_FORMULAS["ratio"]
+        sensor = Sensor(
+            sensor_type="ec",
+            sensor_metadata={"numerator": "ec", "denominator": "water_level"},
+        )
+        assert ratio.input_types(sensor) == {"ec", "water_level"}
+        inputs = {"ec": 1.5, "water_level": 3.0}
+        assert ratio.compute(sensor, inputs, {}, datetime(2025, 1, 1)) == 0.5
+        inputs["water_level"] = 0.0
+        assert ratio.compute(sensor, inputs, {}, datetime(2025, 1, 1)) is None
@@ -0,0 +1,280 @@
+"""Tests for webhook fan-out, signed delivery, retries and dead letters."""
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import json
+import pytest
+import socket
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import httpx
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.models.farm import Farm
+from app.models.user import User
+from app.models.webhook import WebhookDeadLetter, WebhookDelivery
+from app.schemas.webhook import WebhookEndpointCreate
+from app.services.outbox_service import OutboxService
+from app.services.webhook_service import (
+    SIGNATURE_HEADER,
+    WebhookDispatcher,
+    WebhookService,
+    deliver_due,
+    sign,
+)
+from app.services.webhook_targets import PublicAddressBackend, UnsafeWebhookTarget
+
+
+@pytest.fixture(autouse=True)
+def public_dns():
+    """Registered hosts resolve to a public address without a real lookup."""
+    with patch(
+        "app.services.webhook_service.resolve_public",
+        AsyncMock(return_value=["93.184.216.34"]),
+    ):
+        yield
+
+
+def resolving_to(address: str):
+    info = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 443))]
+    return patch.object(asyncio.get_running_loop(), "getaddrinfo", AsyncMock(return_value=info))
+
+
+@pytest.fixture
+async def farm(db_session):
+    owner = User(id=uuid4(), email=f"{uuid4()}@example.com", hashed_password="x")
+    db_session.add(owner)
+    await db_session.flush()
+    farm = Farm(id=uuid4(), name="Webhook Farm", owner_id=owner.id)
+    db_session.add(farm)
+    await db_session.flush()
+    return farm
+
+
+async def rows(db_session, model) -> list:
+    return list((await db_session.execute(select(model))).scalars().all())
+
+
+def sessions(db_session, commits: list | None = None):
+    """A session factory handing out the test session; commits only flush."""
+
+    async def commit():
+        if commits is not None:
+            commits.append(datetime.utcnow())
+        await db_session.flush()
+
+    @contextlib.asynccontextmanager
+    async def factory():
+        with patch.object(db_session, "commit", commit):
+            yield db_session
+
+    return factory
+
+
+def later() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=1)
+
+
+async def queue_alert(db_session, farm, service: WebhookService, max_concurrency: int = 4):
+    endpoint = await service.create_endpoint(
+        farm.id,
+        {"url": "https://hooks.example.com/greenos", "event_types": ["alert"], "max_concurrency": max_concurrency},
+    )
+    outbox = OutboxService(db_session)
+    outbox.publish(farm.id, "alert", {"alert_id": "a1"})
+    await db_session.flush()
+    with patch(
+        "app.services.notification_service.NotificationService.publish_event",
+        new_callable=AsyncMock,
+    ):
+        await outbox.relay_batch(now=later())
+    return endpoint
+
+
+class TestWebhookDelivery:
+    def test_signature_is_hmac_of_timestamp_and_body(self):
+        header = sign("s3cret", 1700000000, b'{"a":1}')
+        expected = hmac.new(b"s3cret", b'1700000000.{"a":1}', hashlib.sha256).hexdigest()
+        assert header == f"t=1700000000,v1={expected}"
+
+    @pytest.mark.asyncio
+    async def test_fans_out_only_to_subscribed_endpoints(self, db_session, farm):
+        service = WebhookService(db_session)
+        await service.create_endpoint(
+            farm.id, {"url": "https://a.example.com/", "event_types": ["order"]}
+        )
+        endpoint = await queue_alert(db_session, farm, service)
+
+        [delivery] = await rows(db_session, WebhookDelivery)
+        assert delivery.endpoint_id == endpoint.id
+        assert delivery.payload == {"alert_id": "a1"}
+
+    @pytest.mark.asyncio
+    async def test_delivers_signed_request(self, db_session, farm):
+        service = WebhookService(db_session)
+        endpoint = await queue_alert(db_session, farm, service)
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(204)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await deliver_due(WebhookDispatcher(client), sessions(db_session), now=later()) == 1
+
+        [request] = requests
+        body = json.loads(request.content)
+        assert body["type"] == "alert" and body["data"] == {"alert_id": "a1"}
+        timestamp = request.headers[SIGNATURE_HEADER].split(",")[0][2:]
+        assert request.headers[SIGNATURE_HEADER] == sign(endpoint.secret, int(timestamp), request.content)
+        assert await rows(db_session, WebhookDelivery) == []
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrency_per_endpoint(self, db_session, farm):
+        service = WebhookService(db_session)
+        endpoint = await service.create_endpoint(
+            farm.id, {"url": "https://slow.example.com/", "event_types": ["alert"], "max_concurrency": 2}
+        )
+        for _ in range(6):
+            db_session.add(
+                WebhookDelivery(
+                    endpoint_id=endpoint.id, event_id=uuid4(), event_type="alert",
+                    payload={}, attempts=0, next_attempt_at=datetime.utcnow(),
+                )
+            )
+        await db_session.flush()
+        in_flight = peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await deliver_due(WebhookDispatcher(client), sessions(db_session), now=later()) == 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_posts_after_the_lease_is_committed(self, db_session, farm):
+        service = WebhookService(db_session)
+        await queue_alert(db_session, farm, service)
+        commits, posted_after = [], []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            posted_after.append(len(commits))
+            return httpx.Response(500)
+
+        now = later()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await deliver_due(WebhookDispatcher(client), sessions(db_session, commits), now=now) == 1
+        assert posted_after == [1] and len(commits) == 2
+
+    @pytest.mark.asyncio
+    async def test_lease_hides_claimed_deliveries_until_it_expires(self, db_session, farm):
+        service = WebhookService(db_session)
+        await queue_alert(db_session, farm, service)
+        now = later()
+
+        [delivery] = await service.claim_due(now=now)
+        assert delivery.next_attempt_at == now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+        assert await service.claim_due(now=now) == []
+        # The worker died without recording a result; the lease runs out.
+        assert await service.claim_due(now=delivery.next_attempt_at) == [delivery]
+
+    @pytest.mark.asyncio
+    async def test_retries_with_jittered_backoff_then_dead_letters(self, db_session, farm):
+        service = WebhookService(db_session)
+        endpoint = await queue_alert(db_session, farm, service)
+        transport = httpx.MockTransport(lambda request: httpx.Response(503, text="down"))
+
+        now = later()
+        async with httpx.AsyncClient(transport=transport) as client:
+            dispatcher = WebhookDispatcher(client)
+            with patch("app.services.webhook_service.settings.WEBHOOK_MAX_ATTEMPTS", 3):
+                assert await deliver_due(dispatcher, sessions(db_session), now=now) == 1
+                [delivery] = await rows(db_session, WebhookDelivery)
+                assert delivery.last_status == 503
+                delay = (delivery.next_attempt_at - now).total_seconds()
+                assert WebhookService.BASE_BACKOFF_SECONDS / 2 <= delay <= WebhookService.BASE_BACKOFF_SECONDS
+                assert await deliver_due(dispatcher, sessions(db_session), now=now) == 0
+
+                for _ in range(2):
+                    now += timedelta(hours=2)
+                    assert await deliver_due(dispatcher, sessions(db_session), now=now) == 1
+
+        assert await rows(db_session, WebhookDelivery) == []
+        [dead] = await service.list_dead_letters(farm.id, endpoint.id)
+        assert dead.attempts == 3 and dead.last_error == "HTTP 503"
+
+        await service.redeliver(farm.id, endpoint.id, dead.id)
+        [delivery] = await rows(db_session, WebhookDelivery)
+        assert delivery.event_id == dead.event_id and delivery.attempts == 0
+        assert await rows(db_session, WebhookDeadLetter) == []
+
+
+class TestWebhookTargets:
+    @pytest.mark.parametrize("url", [
+        "http://localhost:8000/hook",
+        "http://127.0.0.1/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://10.1.2.3/hook",
+        "http://[::1]/hook",
+        "http://[::ffff:192.168.0.1]/hook",
+    ])
+    def test_schema_rejects_local_hosts(self, url):
+        with pytest.raises(ValidationError):
+            WebhookEndpointCreate(url=url, event_types=["alert"])
+
+    @pytest.mark.asyncio
+    async def test_registration_rejects_names_resolving_to_private_addresses(self, db_session, farm):
+        service = WebhookService(db_session)
+        unsafe = UnsafeWebhookTarget("internal.example.com resolves to a non-public address")
+        with patch("app.services.webhook_service.resolve_public", AsyncMock(side_effect=unsafe)):
+            with pytest.raises(ValidationException):
+                await service.create_endpoint(
+                    farm.id, {"url": "https://internal.example.com/", "event_types": ["alert"]}
+                )
+
+    @pytest.mark.asyncio
+    async def test_connections_check_the_address_when_opened(self):
+        inner = AsyncMock()
+        backend = PublicAddressBackend(inner)
+        # Re-pointed at the metadata service after registration.
+        with resolving_to("169.254.169.254"):
+            with pytest.raises(UnsafeWebhookTarget):
+                await backend.connect_tcp("hooks.example.com", 443)
+        inner.connect_tcp.assert_not_awaited()
+
+        with resolving_to("93.184.216.34"):
+            await backend.connect_tcp("hooks.example.com", 443, timeout=5)
+        assert inner.connect_tcp.await_args.args == ("93.184.216.34", 443)
+
+    @pytest.mark.asyncio
+    async def test_redirects_are_not_followed_and_bodies_not_stored(self, db_session, farm):
+        service = WebhookService(db_session)
+        await queue_alert(db_session, farm, service)
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(
+                302, headers={"Location": "http://169.254.169.254/"}, text="secret internals"
+            )
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), follow_redirects=True
+        ) as client:
+            assert await deliver_due(WebhookDispatcher(client), sessions(db_session), now=later()) == 1
+
+        assert len(requests) == 1
+        [delivery] = await rows(db_session, WebhookDelivery)
+        assert delivery.last_status == 302 and delivery.last_error == "HTTP 302"